@@ -1,4 +1,6 @@
 import os
+import hmac
+import json
 import logging
 from typing import Optional, Dict
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -26,6 +28,9 @@ class Settings(BaseSettings):
     
     # Salon Configuration
     SALON_NAME: str = "Beauty Salon"
+    BUSINESS_HOURS: str = "mon-sun 09:00-17:00"  # e.g. "mon-fri 09:00-17:00; sat 10:00-14:00; sun closed"
+    CLOSED_DATES: str = ""  # Holidays/closures, comma separated: "2026-12-25,2026-12-31..2027-01-01"
+    SLOT_MINUTES: int = 30
     
     # Firebase Settings
     FIREBASE_PROJECT_ID: str = "appointment-booking-4c50f"
@@ -36,6 +41,110 @@ class Settings(BaseSettings):
     GOOGLE_CALENDAR_CREDENTIALS_PATH: Optional[str] = "client_secret.json"
     GOOGLE_CALENDAR_TOKEN_PATH: Optional[str] = "token.json"
     GOOGLE_CALENDAR_ID: Optional[str] = None
+    GOOGLE_CALENDAR_TIMEZONE: str = "UTC"
+    GOOGLE_CALENDAR_USE_FREEBUSY: bool = False  # Batch availability through the free/busy API
+    GOOGLE_CALENDAR_FREEBUSY_DAYS: int = 7  # Days fetched per free/busy request
+    GOOGLE_CALENDAR_CACHE_TTL: int = 300  # Seconds busy intervals stay cached
+    GOOGLE_CALENDAR_LOCAL_STUB: bool = False  # Use an in-memory calendar instead of Google (offline development and tests)
+    GOOGLE_CALENDAR_MIRROR_ENABLED: bool = False  # Mirror bookings to the calendar via the outbox
+    CALENDAR_OUTBOX_BATCH_SIZE: int = 50  # Inserts per batch HTTP request (capped at Google's limit of 50)
+    CALENDAR_OUTBOX_POLL_INTERVAL: float = 5.0  # Seconds between outbox drains
+    CALENDAR_OUTBOX_MAX_ATTEMPTS: int = 8
+    CALENDAR_OUTBOX_BACKOFF_BASE: float = 5.0  # Seconds, doubled per failed attempt
+    
+    # Caching
+    CATALOG_CACHE_TTL: int = 300  # Seconds services/barbers stay cached
+    AVAILABILITY_CACHE_TTL: int = 30  # Seconds booked slots per barber/day stay cached
+    DATA_COUNTS_CACHE_TTL: int = 30  # Seconds collection counts on /firebase-status stay cached
+    AVAILABILITY_HORIZON_DAYS: int = 14  # Days covered by the availability matrix
+    AVAILABILITY_MATRIX_TTL: int = 300  # Seconds before the matrix is rebuilt from the store
+    CATALOG_SNAPSHOT_ENABLED: bool = True  # Serve the last known catalog from disk at boot and during store outages
+    CATALOG_SNAPSHOT_PATH: str = "data/catalog_snapshot.json"
+    
+    # Booking journal (local write-ahead log replicated to Firestore in the background)
+    BOOKING_JOURNAL_ENABLED: bool = False
+    BOOKING_JOURNAL_DIR: str = "data/journal"
+    BOOKING_JOURNAL_SEGMENT_SIZE: int = 4 * 1024 * 1024  # Bytes per memory-mapped segment file
+    BOOKING_JOURNAL_FLUSH_INTERVAL_MS: int = 5  # Group-commit window for msync
+    BOOKING_CHECK_TIMEOUT: float = 2.0  # Seconds a journaled booking waits on a store read of booked slots
+    
+    # Circuit breakers around Firestore and the WhatsApp bridge
+    CIRCUIT_BREAKER_ENABLED: bool = True
+    CIRCUIT_BREAKER_WINDOW: int = 20  # Recent calls considered for the error/slow rates
+    CIRCUIT_BREAKER_MIN_CALLS: int = 5  # Calls needed in the window before the breaker can open
+    CIRCUIT_BREAKER_FAILURE_RATE: float = 0.5
+    CIRCUIT_BREAKER_SLOW_CALL_SECONDS: float = 2.0
+    CIRCUIT_BREAKER_SLOW_CALL_RATE: float = 0.8
+    CIRCUIT_BREAKER_OPEN_SECONDS: float = 30.0  # Fail fast this long before probing again
+    CIRCUIT_BREAKER_HALF_OPEN_CALLS: int = 2  # Successful probes needed to close
+    FIRESTORE_REQUEST_TIMEOUT: float = 5.0  # Seconds, REST API calls
+    WHATSAPP_REQUEST_TIMEOUT: float = 5.0  # Seconds, bridge sends
+    STORE_UNAVAILABLE_MESSAGE: str = "⏳ Our booking system is busy right now. Please send your choice again in a minute."
+    
+    # Webhook rate limiting (token buckets per phone and for all traffic)
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_PHONE_RATE: float = 0.5  # Messages per second refilled per phone
+    RATE_LIMIT_PHONE_BURST: int = 10
+    RATE_LIMIT_GLOBAL_RATE: float = 50.0  # Messages per second refilled across all phones
+    RATE_LIMIT_GLOBAL_BURST: int = 200
+    RATE_LIMIT_IDLE_SECONDS: int = 600  # Idle phone buckets are evicted after this long
+    RATE_LIMIT_BACKEND: str = "memory"  # "memory" (per worker) or "redis" (shared; needs the redis package)
+    RATE_LIMIT_REDIS_URL: str = "redis://localhost:6379/0"
+    RATE_LIMIT_REDIS_TIMEOUT: float = 0.2  # Seconds; a slower Redis falls back to the worker's own buckets
+    RATE_LIMIT_REPLY: str = "🐢 You're sending messages a little fast. Please wait a moment and try again."  # Sent once per throttled burst; empty for no reply
+    
+    # Conversation sessions: "memory" (one worker) or "sqlite" (shared by pre-forked workers)
+    SESSION_STORE: str = "memory"
+    SESSION_DB_PATH: str = "data/sessions.db"
+    SESSION_TTL: int = 3600  # Seconds an idle conversation is kept
+    WORKER_LOCK_DIR: str = "data/locks"  # Lock files coordinating pre-forked workers
+    
+    # Serialize responses and parse request bodies with orjson (falls back to the stdlib if it isn't installed)
+    FAST_JSON_ENABLED: bool = False
+    
+    # Realtime replica of upcoming bookings (Firestore listener), serving availability reads locally
+    BOOKING_REPLICA_ENABLED: bool = True
+    BOOKING_REPLICA_DAYS: int = 2  # Days covered, starting today
+    
+    # Returning customers: last service/barber per phone, for "rebook"
+    CUSTOMER_PROFILE_CACHE_SIZE: int = 10000
+    CUSTOMER_PROFILE_CACHE_TTL: int = 600  # Seconds a profile is served from memory
+    
+    # Appointment reminders sent over WhatsApp
+    REMINDERS_ENABLED: bool = True
+    REMINDER_OFFSETS_HOURS: str = "24,1"  # Hours before the appointment, comma separated
+    REMINDER_MAX_CONCURRENCY: int = 4  # Reminders sent at once
+    REMINDER_GRACE_SECONDS: int = 900  # A reminder later than this (e.g. after downtime) is skipped
+    REMINDER_RETRY_SECONDS: int = 300  # Wait before retrying a failed send
+    REMINDER_RESYNC_INTERVAL: int = 600  # Seconds between reloads when bookings come from several workers
+    
+    # Booking analytics: counters per date/barber/service, kept incrementally and served by /stats
+    BOOKING_STATS_FLUSH_INTERVAL: float = 5.0  # Seconds between counter writes to the store
+    BOOKING_STATS_REFRESH_INTERVAL: int = 300  # Seconds between reloads picking up other workers' counts (0 = never)
+    BOOKING_STATS_MAX_DAYS: int = 366  # Longest date range /stats answers
+    
+    # Tracing: spans from webhook to store, calendar and bridge calls, exported in batches off-thread
+    TRACING_ENABLED: bool = False
+    TRACING_EXPORTER: str = "file"  # "file" (JSON lines) or "otlp" (OTLP/HTTP JSON collector)
+    TRACING_FILE: str = "data/traces.jsonl"
+    TRACING_OTLP_ENDPOINT: str = "http://localhost:4318/v1/traces"
+    TRACING_SERVICE_NAME: str = "salon-booking-bot"
+    TRACING_BATCH_SIZE: int = 512  # Spans per export
+    TRACING_FLUSH_INTERVAL: float = 2.0  # Seconds before a partial batch is exported
+    TRACING_QUEUE_SIZE: int = 10000  # Finished spans waiting for export; beyond this they are dropped
+    TRACING_EXPORT_TIMEOUT: float = 5.0
+    
+    # Sampling profiler for the webhook path (off by default; /admin/profile serves the stacks)
+    PROFILER_ENABLED: bool = False
+    PROFILER_SAMPLE_EVERY: int = 100  # Profile 1 in N requests (plus any sent with "X-Profile: 1")
+    PROFILER_INTERVAL_MS: float = 2.0  # Stack sampling interval while a request is profiled
+    PROFILER_PATHS: str = "/webhook/whatsapp"  # Path prefixes eligible for profiling, comma separated
+    PROFILER_MAX_STACKS: int = 5000  # Distinct stacks kept; further samples are counted as dropped
+    ADMIN_TOKEN: str = ""  # Required in the X-Admin-Token header by /admin endpoints (empty = disabled)
+    
+    # Warmup (runs at startup; /ready reports 503 until it finishes)
+    WARMUP_ENABLED: bool = True
+    WARMUP_STEPS: str = "catalog,service_index,availability,calendar,booking_stats,connections"
     
     # App Settings
     DEBUG: bool = False
@@ -50,7 +159,19 @@ class Settings(BaseSettings):
         self._detect_environment()
         self._handle_backward_compatibility()
         self._setup_logging()
-        self._validate_settings()
+    
+    def get_calendar_credentials(self) -> Optional[Dict]:
+        """Load Google Calendar service account credentials, if configured"""
+        if not self.GOOGLE_CALENDAR_CREDENTIALS_PATH or not os.path.exists(self.GOOGLE_CALENDAR_CREDENTIALS_PATH):
+            return None
+        with open(self.GOOGLE_CALENDAR_CREDENTIALS_PATH, 'r') as f:
+            return json.load(f)
+    
+    def is_admin_token(self, token: Optional[str]) -> bool:
+        """Check a presented admin token in constant time (always False while ADMIN_TOKEN is empty)"""
+        if not self.ADMIN_TOKEN or not token:
+            return False
+        return hmac.compare_digest(token.encode("utf-8"), self.ADMIN_TOKEN.encode("utf-8"))
     
     def _detect_environment(self):
         """Detect deployment environment and adjust URLs accordingly"""
@@ -92,8 +213,12 @@ class Settings(BaseSettings):
             format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
         )
     
-    def _validate_settings(self):
-        """Validate required settings and log configuration"""
+    def validate_settings(self):
+        """Validate required settings and log configuration
+        
+        Not run on construction: the filesystem checks and logging belong to
+        application startup, not to every import of a module that reads settings.
+        """
         logger.info("✅ Smart WhatsApp Booking Bot Configuration loaded:")
         logger.info(f"🔧 DEBUG: {self.DEBUG}")
         logger.info(f"📊 LOG_LEVEL: {self.LOG_LEVEL}")
@@ -38,6 +38,8 @@ def run_config_check():
     logger.info("CONFIGURATION CHECK")
     logger.info("=" * 50)
     
+    get_settings().validate_settings()
+    
     whatsapp_ok = check_whatsapp_config()
     firebase_ok = check_firebase_config()
     
@@ -0,0 +1,455 @@
+"""
+Bulk import/export of services, barbers and bookings
+
+Usage:
+    python -m app.data_cli import services services.json
+    python -m app.data_cli import bookings history.csv --workers 4 --checkpoint import.ckpt
+    python -m app.data_cli export bookings bookings.csv
+    python -m app.data_cli import barbers barbers.json --backend sqlite --sqlite-path data/offline.db
+
+Writes are grouped into Firestore batched writes (up to 500 operations
+each) committed by a bounded pool of workers, or handed to a BulkWriter
+with --bulk-writer. With --checkpoint, committed chunks are recorded so an
+interrupted import resumes where it stopped. Imported bookings also update,
+in the same batch, the phone index, customer profiles and (once they exist)
+the stats counters, as bookings made in the app do. The sqlite backend runs the
+same pipeline offline against a local file. The memory backend writes to
+the CLI process's own in-memory store, which is gone when the command
+exits: use it as a dry run that validates a file and times the pipeline
+without writing anywhere.
+"""
+
+import os
+import re
+import csv
+import json
+import time
+import random
+import sqlite3
+import logging
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from app.services import firestore_simple
+from app.services.firestore_simple import Service, Barber, Booking, BOOKING_STATS_FIELDS
+from app.services.booking_stats import counter_key, _booking_delta
+
+logger = logging.getLogger(__name__)
+
+# Firestore allows at most 500 operations per batched write
+MAX_BATCH_SIZE = firestore_simple.MAX_BATCH_WRITES
+
+# Writes one imported booking can take in its batch: the booking, a phone
+# index addition or removal, the customer profile, and the stats counters
+# it leaves (a re-imported booking's old version) and joins
+WRITES_PER_BOOKING = 6
+
+MODELS = {
+    "services": Service,
+    "barbers": Barber,
+    "bookings": Booking,
+}
+
+# Fields stored as lists; CSV files keep them ';'-separated
+LIST_FIELDS = {"services", "working_days", "breaks", "days_off", "specialties", "attendees"}
+
+def document_id(collection: str, record: Dict) -> str:
+    """Get the document id for a record"""
+    if collection == "services":
+        return record["id"]
+    if collection == "bookings":
+        return record["booking_id"]
+    return record.get("id") or re.sub(r"[^a-z0-9]+", "_", record["name"].lower()).strip("_")
+
+def validate_record(collection: str, record: Dict) -> Dict:
+    """Validate a record against its model, keeping any extra fields (e.g. calendar_event_id)"""
+    model = MODELS[collection](**record)
+    return {**record, **model.model_dump()}
+
+def chunk_size(collection: str, batch_size: int) -> int:
+    """Documents per chunk, so that a chunk's writes fit one batched write"""
+    limit = MAX_BATCH_SIZE // WRITES_PER_BOOKING if collection == "bookings" else MAX_BATCH_SIZE
+    return max(1, min(batch_size, limit))
+
+def _active(booking: Dict) -> bool:
+    return booking.get("status", "confirmed") != "cancelled"
+
+def latest_bookings(docs: List[Tuple[str, Dict]]) -> Dict[str, str]:
+    """Phone -> id of its most recent active booking in an import (the one its profile is taken from)"""
+    latest: Dict[str, Tuple[str, str]] = {}
+    for booking_id, data in docs:
+        phone = data.get("phone")
+        if phone and _active(data) and data["created_at"] >= latest.get(phone, ("", ""))[0]:
+            latest[phone] = (data["created_at"], booking_id)
+    return {phone: booking_id for phone, (_, booking_id) in latest.items()}
+
+def booking_derived_writes(docs: List[Tuple[str, Dict]], existing: Dict[str, Dict], latest: Dict[str, str],
+                           profiles: Dict[str, Dict], count_stats: bool) -> Dict:
+    """
+    Phone index, customer profile and stats counter updates for a chunk of bookings
+
+    Args:
+        existing: Stored versions of these bookings; a re-import only counts the difference
+        latest: Phone -> id of its latest imported booking; only that one updates the profile
+        profiles: Stored profiles of the chunk's phones; a newer profile is left alone
+        count_stats: Whether to update stats counters (not before they exist: the first
+            stats load backfills them from every booking, imported ones included)
+    """
+    derived = {"index_add": {}, "index_remove": {}, "profiles": {}, "counters": {}}
+    for booking_id, data in docs:
+        phone = data.get("phone")
+        if phone:
+            derived["index_add" if _active(data) else "index_remove"].setdefault(phone, []).append(booking_id)
+            stored_at = (profiles.get(phone) or {}).get("last_booked_at") or ""
+            if latest.get(phone) == booking_id and data["created_at"] > stored_at:
+                derived["profiles"][phone] = firestore_simple._booking_profile_fields(data)
+        if not count_stats:
+            continue
+        for version, sign in ((existing.get(booking_id), -1), (data, 1)):
+            if version and _active(version):
+                counter = derived["counters"].setdefault(
+                    counter_key(version["date"], version["barber_name"], version["service_id"]),
+                    {"date": version["date"], "barber_name": version["barber_name"], "service_id": version["service_id"],
+                     "bookings": 0, "minutes": 0, "revenue": 0.0}
+                )
+                delta = _booking_delta(version)
+                for field in BOOKING_STATS_FIELDS:
+                    counter[field] += sign * delta[field]
+    derived["counters"] = {
+        key: counter for key, counter in derived["counters"].items()
+        if any(counter[field] for field in BOOKING_STATS_FIELDS)
+    }
+    return derived
+
+# ---- file formats ---------------------------------------------------
+
+def read_records(path: str) -> List[Dict]:
+    """Read records from a .json (list of objects) or .csv file"""
+    if path.endswith(".csv"):
+        with open(path, newline="", encoding="utf-8") as f:
+            records = []
+            for row in csv.DictReader(f):
+                record = {k: v for k, v in row.items() if v != ""}
+                for field in LIST_FIELDS & record.keys():
+                    record[field] = [item for item in record[field].split(";") if item]
+                records.append(record)
+            return records
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+def write_records(path: str, records: List[Dict]):
+    """Write records to a .json or .csv file"""
+    if path.endswith(".csv"):
+        fieldnames = sorted({key for record in records for key in record})
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=fieldnames)
+            writer.writeheader()
+            for record in records:
+                writer.writerow({
+                    k: ";".join(map(str, v)) if isinstance(v, list) else v
+                    for k, v in record.items()
+                })
+        return
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(records, f, indent=2, default=str)
+
+# ---- backends -------------------------------------------------------
+
+class FirestoreBackend:
+    """Firestore via the Admin SDK (batched writes or BulkWriter)"""
+
+    def __init__(self, use_bulk_writer: bool = False):
+        if not firestore_simple.is_firebase_connected():
+            raise SystemExit("❌ Firebase is not connected - check credentials or use --backend memory/sqlite")
+        self.client = firestore_simple.get_firebase_client()
+        self.use_bulk_writer = use_bulk_writer
+
+    def write_chunk(self, collection: str, docs: List[Tuple[str, Dict]], derived: Dict = None):
+        ref = self.client.collection(collection)
+        if self.use_bulk_writer:
+            writer = self.client.bulk_writer()
+            for doc_id, data in docs:
+                writer.set(ref.document(doc_id), data)
+            self._set_derived(writer, derived)
+            writer.close()  # flushes and waits, retrying throttled writes
+            return
+        batch = self.client.batch()
+        for doc_id, data in docs:
+            batch.set(ref.document(doc_id), data)
+        self._set_derived(batch, derived)
+        batch.commit()
+
+    def _set_derived(self, writer, derived: Dict = None):
+        """Add the phone index, profile and counter updates of a bookings chunk to a batch or BulkWriter"""
+        if not derived:
+            return
+        from firebase_admin import firestore
+        for phone, booking_ids in derived["index_add"].items():
+            writer.set(self.client.collection('phone_bookings').document(phone), {'booking_ids': firestore.ArrayUnion(booking_ids)}, merge=True)
+        for phone, booking_ids in derived["index_remove"].items():
+            writer.set(self.client.collection('phone_bookings').document(phone), {'booking_ids': firestore.ArrayRemove(booking_ids)}, merge=True)
+        for phone, fields in derived["profiles"].items():
+            writer.set(self.client.collection('customers').document(phone), fields, merge=True)
+        for key, counter in derived["counters"].items():
+            shard_ref = (
+                self.client.collection('booking_stats').document(key)
+                .collection('booking_stats_shards').document(str(random.randrange(firestore_simple.BOOKING_STATS_SHARDS)))
+            )
+            writer.set(shard_ref, {
+                'date': counter['date'],
+                'barber_name': counter['barber_name'],
+                'service_id': counter['service_id'],
+                **{field: firestore.Increment(counter[field]) for field in BOOKING_STATS_FIELDS}
+            }, merge=True)
+
+    def read(self, collection: str, doc_ids: List[str]) -> Dict[str, Dict]:
+        refs = [self.client.collection(collection).document(doc_id) for doc_id in doc_ids]
+        return {doc.id: doc.to_dict() for doc in self.client.get_all(refs) if doc.exists}
+
+    def has_counters(self) -> bool:
+        return any(True for _ in self.client.collection_group('booking_stats_shards').limit(1).stream())
+
+    def stream(self, collection: str) -> Iterator[Tuple[str, Dict]]:
+        for doc in self.client.collection(collection).stream():
+            yield doc.id, doc.to_dict()
+
+class MemoryBackend:
+    """
+    The in-memory fallback store of this process (a dry run for the CLI)
+
+    Nothing outlives the command; records are validated and chunked exactly
+    as for Firestore, so an import reports problems and throughput before
+    touching real data.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+
+    def write_chunk(self, collection: str, docs: List[Tuple[str, Dict]], derived: Dict = None):
+        storage = firestore_simple._in_memory_storage
+        with self.lock:
+            documents = storage.setdefault(collection, {})
+            for doc_id, data in docs:
+                documents[doc_id] = dict(data)
+            if not derived:
+                return
+            for phone, booking_ids in derived["index_add"].items():
+                storage['phone_bookings'].setdefault(phone, {'booking_ids': set(), 'complete': False})['booking_ids'].update(booking_ids)
+            for phone, booking_ids in derived["index_remove"].items():
+                storage['phone_bookings'].setdefault(phone, {'booking_ids': set(), 'complete': False})['booking_ids'].difference_update(booking_ids)
+            for phone, fields in derived["profiles"].items():
+                storage['customers'].setdefault(phone, {}).update(fields)
+            for key, counter in derived["counters"].items():
+                stored = storage['booking_stats'].setdefault(key, {**counter, "bookings": 0, "minutes": 0, "revenue": 0.0})
+                for field in BOOKING_STATS_FIELDS:
+                    stored[field] += counter[field]
+
+    def read(self, collection: str, doc_ids: List[str]) -> Dict[str, Dict]:
+        with self.lock:
+            documents = firestore_simple._in_memory_storage.get(collection, {})
+            return {doc_id: dict(documents[doc_id]) for doc_id in doc_ids if doc_id in documents}
+
+    def has_counters(self) -> bool:
+        return bool(firestore_simple._in_memory_storage.get('booking_stats'))
+
+    def stream(self, collection: str) -> Iterator[Tuple[str, Dict]]:
+        with self.lock:
+            items = list(firestore_simple._in_memory_storage.get(collection, {}).items())
+        for doc_id, data in items:
+            yield doc_id, dict(data)
+
+class SQLiteBackend:
+    """A local SQLite file with one JSON document per row, for offline runs and test fixtures"""
+
+    def __init__(self, path: str):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.lock = threading.Lock()
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS documents ("
+            "collection TEXT NOT NULL, id TEXT NOT NULL, data TEXT NOT NULL, "
+            "PRIMARY KEY (collection, id))"
+        )
+        self.conn.commit()
+
+    def write_chunk(self, collection: str, docs: List[Tuple[str, Dict]], derived: Dict = None):
+        rows = [(collection, doc_id, json.dumps(data, default=str)) for doc_id, data in docs]
+        with self.lock, self.conn:
+            self.conn.executemany("INSERT OR REPLACE INTO documents (collection, id, data) VALUES (?, ?, ?)", rows)
+            if not derived:
+                return
+            # Same documents as Firestore, but one counter per key instead of shards
+            for phone, booking_ids in derived["index_add"].items():
+                index = self._get('phone_bookings', phone) or {'booking_ids': []}
+                index['booking_ids'] = sorted(set(index['booking_ids']) | set(booking_ids))
+                self._put('phone_bookings', phone, index)
+            for phone, booking_ids in derived["index_remove"].items():
+                index = self._get('phone_bookings', phone) or {'booking_ids': []}
+                index['booking_ids'] = sorted(set(index['booking_ids']) - set(booking_ids))
+                self._put('phone_bookings', phone, index)
+            for phone, fields in derived["profiles"].items():
+                self._put('customers', phone, {**(self._get('customers', phone) or {}), **fields})
+            for key, counter in derived["counters"].items():
+                stored = self._get('booking_stats', key) or {**counter, "bookings": 0, "minutes": 0, "revenue": 0.0}
+                for field in BOOKING_STATS_FIELDS:
+                    stored[field] += counter[field]
+                self._put('booking_stats', key, stored)
+
+    def _get(self, collection: str, doc_id: str) -> Optional[Dict]:
+        row = self.conn.execute("SELECT data FROM documents WHERE collection = ? AND id = ?", (collection, doc_id)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _put(self, collection: str, doc_id: str, data: Dict):
+        self.conn.execute("INSERT OR REPLACE INTO documents (collection, id, data) VALUES (?, ?, ?)", (collection, doc_id, json.dumps(data, default=str)))
+
+    def read(self, collection: str, doc_ids: List[str]) -> Dict[str, Dict]:
+        with self.lock:
+            found = {doc_id: self._get(collection, doc_id) for doc_id in doc_ids}
+        return {doc_id: data for doc_id, data in found.items() if data is not None}
+
+    def has_counters(self) -> bool:
+        with self.lock:
+            return self.conn.execute("SELECT 1 FROM documents WHERE collection = 'booking_stats' LIMIT 1").fetchone() is not None
+
+    def stream(self, collection: str) -> Iterator[Tuple[str, Dict]]:
+        with self.lock:
+            rows = self.conn.execute("SELECT id, data FROM documents WHERE collection = ? ORDER BY id", (collection,)).fetchall()
+        for doc_id, data in rows:
+            yield doc_id, json.loads(data)
+
+def make_backend(args):
+    if args.backend == "memory":
+        return MemoryBackend()
+    if args.backend == "sqlite":
+        return SQLiteBackend(args.sqlite_path)
+    return FirestoreBackend(use_bulk_writer=args.bulk_writer)
+
+# ---- checkpoints ----------------------------------------------------
+
+class Checkpoint:
+    """Chunk indices already committed for one (collection, file) import"""
+
+    def __init__(self, path: str, collection: str, source: str, batch_size: int):
+        self.path = path
+        self.key = {"collection": collection, "source": os.path.abspath(source), "batch_size": batch_size}
+        self.done = set()
+        self.lock = threading.Lock()
+        if path and os.path.exists(path):
+            with open(path) as f:
+                saved = json.load(f)
+            if {k: saved.get(k) for k in self.key} == self.key:
+                self.done = set(saved.get("completed_chunks", []))
+            else:
+                logger.warning("⚠️ Checkpoint belongs to a different import - starting from scratch")
+
+    def mark(self, chunk_index: int):
+        if not self.path:
+            return
+        with self.lock:
+            self.done.add(chunk_index)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump({**self.key, "completed_chunks": sorted(self.done)}, f)
+            os.replace(tmp_path, self.path)
+
+# ---- commands -------------------------------------------------------
+
+def import_records(backend, collection: str, records: List[Dict], batch_size: int = MAX_BATCH_SIZE,
+                   workers: int = 4, checkpoint: Checkpoint = None) -> Dict:
+    """
+    Validate and write records in chunks with bounded parallelism
+
+    Returns:
+        Throughput report
+    """
+    batch_size = chunk_size(collection, batch_size)
+    docs = []
+    for record in records:
+        data = validate_record(collection, record)
+        docs.append((document_id(collection, data), data))
+    chunks = [docs[i:i + batch_size] for i in range(0, len(docs), batch_size)]
+    skipped = checkpoint.done if checkpoint else set()
+    todo = [i for i in range(len(chunks)) if i not in skipped]
+
+    write = backend.write_chunk
+    if collection == "bookings":
+        latest = latest_bookings(docs)
+        count_stats = backend.has_counters()
+
+        def write(collection: str, chunk: List[Tuple[str, Dict]]):
+            # Read before writing, so a resumed or repeated import neither recounts nor rolls back a profile
+            existing = backend.read("bookings", [doc_id for doc_id, _ in chunk])
+            profiles = backend.read("customers", sorted({data["phone"] for _, data in chunk if data.get("phone")}))
+            backend.write_chunk(collection, chunk, booking_derived_writes(chunk, existing, latest, profiles, count_stats))
+
+    started = time.perf_counter()
+    written = 0
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = {pool.submit(write, collection, chunks[i]): i for i in todo}
+        for future in as_completed(futures):
+            i = futures[future]
+            future.result()  # re-raise the first failed chunk; the checkpoint keeps completed ones
+            written += len(chunks[i])
+            if checkpoint:
+                checkpoint.mark(i)
+            logger.info(f"✅ Chunk {i + 1}/{len(chunks)} committed ({written} documents)")
+
+    elapsed = time.perf_counter() - started
+    return {
+        "collection": collection,
+        "documents": written,
+        "chunks": len(todo),
+        "skipped_chunks": len(chunks) - len(todo),
+        "seconds": round(elapsed, 3),
+        "docs_per_second": round(written / elapsed, 1) if elapsed > 0 else None
+    }
+
+def export_records(backend, collection: str) -> Tuple[List[Dict], Dict]:
+    """Read every document in a collection"""
+    started = time.perf_counter()
+    records = []
+    for doc_id, data in backend.stream(collection):
+        if collection == "barbers":
+            data.setdefault("id", doc_id)
+        records.append(data)
+    elapsed = time.perf_counter() - started
+    return records, {
+        "collection": collection,
+        "documents": len(records),
+        "seconds": round(elapsed, 3),
+        "docs_per_second": round(len(records) / elapsed, 1) if elapsed > 0 else None
+    }
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description="Bulk import/export salon data")
+    parser.add_argument("command", choices=["import", "export"])
+    parser.add_argument("collection", choices=sorted(MODELS))
+    parser.add_argument("path", help=".json or .csv file")
+    parser.add_argument("--backend", choices=["firestore", "memory", "sqlite"], default="firestore",
+                        help="memory is a dry run: records are validated and timed, then discarded")
+    parser.add_argument("--sqlite-path", default="data/offline.db")
+    parser.add_argument("--batch-size", type=int, default=MAX_BATCH_SIZE, help="Documents per batched write (max 500, or 83 bookings)")
+    parser.add_argument("--workers", type=int, default=4, help="Chunks committed in parallel")
+    parser.add_argument("--bulk-writer", action="store_true", help="Use Firestore BulkWriter instead of batched writes")
+    parser.add_argument("--checkpoint", default=None, help="Checkpoint file for resuming an interrupted import")
+    args = parser.parse_args(argv)
+
+    backend = make_backend(args)
+    if args.command == "import":
+        records = read_records(args.path)
+        checkpoint = Checkpoint(args.checkpoint, args.collection, args.path, chunk_size(args.collection, args.batch_size))
+        report = import_records(backend, args.collection, records, args.batch_size, args.workers, checkpoint)
+        print(f"📥 Imported {report['documents']} {args.collection} in {report['seconds']}s "
+              f"({report['docs_per_second']} docs/s, {report['skipped_chunks']} chunks resumed from checkpoint)")
+    else:
+        records, report = export_records(backend, args.collection)
+        write_records(args.path, records)
+        print(f"📤 Exported {report['documents']} {args.collection} to {args.path} in {report['seconds']}s "
+              f"({report['docs_per_second']} docs/s)")
+    return report
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Opt-in fast JSON (orjson) for request parsing and responses
+
+With FAST_JSON_ENABLED and orjson installed, `json_response` renders
+content straight to bytes with orjson. Types orjson can't handle go
+through FastAPI's `jsonable_encoder` one value at a time. Otherwise it
+falls back to the stdlib path: `jsonable_encoder` over the whole payload,
+then `json.dumps`.
+"""
+
+import json
+from typing import Any
+
+from fastapi import Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.config import get_settings
+
+settings = get_settings()
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+FAST_JSON = settings.FAST_JSON_ENABLED and orjson is not None
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered with orjson"""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(
+            content,
+            default=jsonable_encoder,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        )
+
+# Default response class for the app
+ResponseClass = FastJSONResponse if FAST_JSON else JSONResponse
+
+def json_response(content: Any, status_code: int = 200) -> JSONResponse:
+    """Build a JSON response directly, skipping FastAPI's whole-payload encoding pass when orjson is on"""
+    if FAST_JSON:
+        return FastJSONResponse(content, status_code=status_code)
+    return JSONResponse(jsonable_encoder(content), status_code=status_code)
+
+def loads(data: bytes) -> Any:
+    """Parse JSON bytes"""
+    return orjson.loads(data) if FAST_JSON else json.loads(data)
+
+async def parse_request_json(request: Request) -> Any:
+    """Parse a request body as JSON (replacement for `await request.json()`)"""
+    return loads(await request.body())
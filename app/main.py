@@ -1,21 +1,59 @@
 from app.services.firestore_simple import (
+    initialize_firebase,
     init_default_data,
     get_all_services,
     get_all_barbers,
     get_service,
     get_barbers_for_service,
     get_available_slots,
-    book_slot
+    book_slot,
+    cancel_booking,
+    get_upcoming_bookings,
+    load_catalog_snapshot,
+    get_catalog_snapshot_info,
+    get_single_flight_stats,
+    open_booking_journal,
+    close_booking_journal,
+    get_booking_journal_stats,
+    RESERVATIONS_FILE,
+    SLOT_TAKEN_MESSAGE
 )
 from fastapi import FastAPI, Request, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse
-from typing import Dict
+from fastapi.responses import HTMLResponse, PlainTextResponse
+from starlette.concurrency import run_in_threadpool
+from pydantic import ValidationError
+from typing import Dict, Optional
 from datetime import datetime, timedelta
+from contextlib import contextmanager
+import os
+import asyncio
 import logging
+import threading
 
 from app.services.whatsapp import check_whatsapp_service_health
+from app.services.warmup import run_warmup, record_warmup_failure, is_ready, get_warmup_status
+from app.services.availability import find_earliest_slot, find_open_days, find_open_slots, is_working_day, get_matrix_stats
+from app.services.load_balancer import pick_least_loaded_barber, get_load_stats
+from app.services.intent_matcher import match_intent
+from app.services.customer_profiles import get_profile, start_profile_tracking, get_profile_cache_stats
+from app.services.reminders import start_reminder_worker, stop_reminder_worker, get_reminder_stats
+from app.services.booking_replica import start_booking_replica, stop_booking_replica, get_booking_replica_stats
+from app.services.booking_stats import query_stats, start_stats_flusher, stop_stats_flusher, get_booking_stats_status
+from app.services.tracing import start_trace, span, set_attribute, parse_trace_context, start_tracing, stop_tracing, get_tracing_stats
+from app.services.profiler import ProfilerMiddleware, collapsed_stacks, speedscope_profile, reset_profile, get_profiler_stats
+from app.services.circuit_breaker import get_breaker_stats
+from app.services.rate_limiter import check_rate_limit, get_rate_limit_stats, uses_shared_backend
+from app.services.session_store import create_session_store
+from app.services.calendar_outbox import (
+    build_outbox_entry,
+    start_outbox_worker,
+    stop_outbox_worker,
+    get_outbox_stats
+)
 from app.config import get_settings
+from app.schemas import WhatsAppWebhookMessage, skip_reason
+from app.fast_json import ResponseClass, json_response, parse_request_json
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
@@ -23,7 +61,8 @@ settings = get_settings()
 app = FastAPI(
     title="WhatsApp Booking Bot",
     description="A simple WhatsApp-based booking system for a single salon",
-    version="3.0.0"
+    version="3.0.0",
+    default_response_class=ResponseClass
 )
 
 # Add CORS middleware
@@ -35,40 +74,284 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# In-memory session storage
-sessions = {}
+# Sampling profiler; a no-op unless PROFILER_ENABLED is set (see /admin/profiler)
+app.add_middleware(ProfilerMiddleware)
+
+# Matched free-text commands -> the exact messages process_message handles
+FREE_TEXT_COMMANDS = {
+    "greet": "hi",
+    "restart": "restart",
+    "my_bookings": "my bookings",
+    "rebook": "rebook",
+    "cancel": "cancel"
+}
+
+# Upper bound on per-worker journal directories under BOOKING_JOURNAL_DIR
+MAX_WORKER_JOURNALS = 64
+
+# Session storage (in-process, or shared by all workers with SESSION_STORE=sqlite)
+sessions = create_session_store()
+
+# Sessions loaded for messages being processed; written back by save_session
+_active_sessions: Dict[str, Dict] = {}
+
+# Messages are processed in the threadpool; one phone's messages take turns: phone -> [lock, holders]
+_session_locks: Dict[str, list] = {}
+_session_locks_guard = threading.Lock()
+
+# Startup initialization and warmup, running in a worker thread (held so the task isn't garbage collected)
+_warmup_task: Optional[asyncio.Task] = None
+
+# Inbound webhook traffic, by outcome of the early filter
+_webhook_stats = {"accepted": 0, "invalid": 0, "skipped_group": 0, "skipped_status": 0, "skipped_type": 0, "skipped_invalid": 0}
 
 def get_session_data(phone: str) -> Dict:
     """Get or create session data for a phone number"""
-    if phone not in sessions:
-        sessions[phone] = {
+    if phone not in _active_sessions:
+        _active_sessions[phone] = sessions.load(phone) or {
             "step": "service",
             "service": None,
             "barber": None,
             "date": None,
             "time_slot": None,
-            "contact_name": None
+            "contact_name": None,
+            "earliest": None,
+            "date_options": None,
+            "any_barber": False,
+            "cancel_options": None
         }
-    return sessions[phone]
+    return _active_sessions[phone]
 
 def clear_session(phone: str):
     """Clear session data for a phone number"""
-    if phone in sessions:
-        del sessions[phone]
+    _active_sessions.pop(phone, None)
+    sessions.delete(phone)
+
+def save_session(phone: str):
+    """Write back the session of a processed message (unless it was cleared)"""
+    session = _active_sessions.pop(phone, None)
+    if session is not None:
+        sessions.save(phone, session)
+
+@contextmanager
+def session_lock(phone: str):
+    """Hold a phone's session lock (dropped once no message from the phone holds or awaits it)"""
+    with _session_locks_guard:
+        entry = _session_locks.setdefault(phone, [threading.Lock(), 0])
+        entry[1] += 1
+    try:
+        with entry[0]:
+            yield
+    finally:
+        with _session_locks_guard:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del _session_locks[phone]
+
+def get_worker_slot():
+    """Stable worker index set by the pre-fork server after forking (gunicorn.conf.py); None under plain uvicorn"""
+    slot = os.environ.get("WORKER_SLOT")
+    return int(slot) if slot else None
+
+def get_worker_info() -> Dict:
+    """Identify the worker process answering"""
+    return {"pid": os.getpid(), "slot": get_worker_slot()}
+
+def _book_with(phone: str, contact_name: str, service, barber_name: str, date_str: str, selected_time: str) -> Dict:
+    """Book a slot with one barber; returns book_slot's result"""
+    booking_data = {
+        "service_id": service.id,
+        "service_name": service.name,
+        "barber_name": barber_name,
+        "time_slot": selected_time,
+        "phone": phone,
+        "date": date_str,
+        "contact_name": contact_name,
+        # As booked: stats and loads stay right if the catalog price or duration changes later
+        "price": float(service.price),
+        "duration": service.duration
+    }
+    
+    calendar_entry = None
+    if settings.GOOGLE_CALENDAR_MIRROR_ENABLED:
+        # Saved with the booking and mirrored by the background worker; the reply never waits on Google Calendar
+        barber = next((b for b in get_barbers_for_service(service.id) if b.name == barber_name), None)
+        attendees = [barber.email] if barber and barber.email else []
+        calendar_entry = lambda booking_id, data: build_outbox_entry(booking_id, data, service.duration, attendees)
+    
+    return book_slot(booking_data, calendar_entry)
+
+def confirm_booking(phone: str, contact_name: str, service, barber_name: str, date_str: str, selected_time: str, any_barber: bool = False) -> str:
+    """
+    Book a slot and return the confirmation (or failure) reply; clears the session
+
+    With `any_barber`, a slot found taken when booking (the barber was
+    picked from a possibly stale availability view) goes to the next
+    least-loaded barber instead.
+    """
+    session = get_session_data(phone)
+    tried = []
+    while True:
+        result = _book_with(phone, session.get("contact_name") or contact_name, service, barber_name, date_str, selected_time)
+        if not (any_barber and result["status"] == "error" and result["message"] == SLOT_TAKEN_MESSAGE):
+            break
+        tried.append(barber_name)
+        barber_name = pick_least_loaded_barber(service.id, date_str, selected_time, exclude=tried)
+        if not barber_name:
+            break
+    if result["status"] == "success":
+        # Format the date for display
+        booking_date = datetime.strptime(date_str, "%Y-%m-%d")
+        date_display = booking_date.strftime("%A, %B %d, %Y")
+        client_name = session.get("contact_name", "")
+        name_greeting = f"Hi {client_name}! " if client_name and client_name != "Unknown" else ""
+        
+        reply_message = f"🎉✨ Booking Confirmed! ✨🎉\n\n{name_greeting}📋 Your Appointment Details:\n💄 Service: {service.name}\n✂️ Barber: {barber_name}\n📅 Date: {date_display}\n⏰ Time: {selected_time}\n\n🤗 We look forward to seeing you at {settings.SALON_NAME}! Thank you for choosing us! 💖"
+    elif result["status"] == "unavailable":
+        # Keep the session so the customer can resend the same choice once the store recovers
+        return result["message"]
+    else:
+        reply_message = "😔 Sorry, that slot is no longer available. Please try again or say 'restart' to start over."
+    clear_session(phone)
+    return reply_message
+
+def format_booking(booking: Dict) -> str:
+    """One-line summary of a booking"""
+    date_display = datetime.strptime(booking["date"], "%Y-%m-%d").strftime("%A, %B %d")
+    return f"💄 {booking.get('service_name', 'Appointment')} with ✂️ {booking.get('barber_name')} - 📅 {date_display} at ⏰ {booking.get('time_slot')}"
+
+def offer_slots(session: Dict, service, barber_name: str = None, date_str: str = None, heading: str = "") -> str:
+    """
+    Jump straight to time slot choice for a service
+
+    Uses the barber if given and qualified, otherwise the first available
+    stylist. Shows the requested day, or the first open day when none is
+    given; falls back to the date choice when that day has no slots.
+    """
+    if barber_name not in [b.name for b in get_barbers_for_service(service.id)]:
+        barber_name = None
+    session.update({
+        "service": service.id,
+        "barber": barber_name,
+        "any_barber": barber_name is None,
+        "date_options": get_date_options(service.id, barber_name)
+    })
+    
+    candidates = [date_str] if date_str else session["date_options"]
+    for date_option in candidates:
+        slots = get_session_slots(session, datetime.strptime(date_option, "%Y-%m-%d"))
+        if slots:
+            session["date"] = date_option
+            session["step"] = "time"
+            slot_list = "\n".join([f"{i+1}. ⏰ {slot}" for i, slot in enumerate(slots)])
+            return f"{heading}✅ Available times for {format_date_option(date_option)}:\n\n{slot_list}\n\n⏰ Please choose your preferred time (or say 'restart' for another day):"
+    
+    session["step"] = "date"
+    date_list = "\n".join([f"{i+1}. {format_date_option(d)}" for i, d in enumerate(session["date_options"])])
+    no_slots = f"😔 No open times on {datetime.strptime(date_str, '%Y-%m-%d').strftime('%A, %B %d')}.\n\n" if date_str else ""
+    return f"{heading}{no_slots}📅 Please choose your preferred date:\n\n{date_list}"
+
+def start_rebook(session: Dict, profile: Dict) -> str:
+    """Repeat the customer's last service and barber, going straight to the first open day's time slots"""
+    service = get_service(profile.get("last_service_id", ""))
+    if not service:
+        return "😔 Sorry, your last service is no longer offered.\n\n💬 Say 'hi' to see our services!"
+    
+    # The last barber may have stopped offering the service: offer_slots matches any stylist instead
+    barber_name = profile.get("last_barber_name")
+    qualified = barber_name in [b.name for b in get_barbers_for_service(service.id)]
+    with_whom = f"with ✂️ {barber_name}" if qualified else "with the first available stylist"
+    return offer_slots(session, service, barber_name, heading=f"🔁 Rebooking {service.name} {with_whom}!\n\n")
+
+def interpret_free_text(session: Dict, intent: Dict) -> Optional[str]:
+    """
+    Translate a matched free-text message into the input the conversation already understands
+
+    Returns:
+        A command ("hi", "cancel", ...) or the number to pick in the current step,
+        or None when the message is a booking request (handled by offer_slots) or unmatched
+    """
+    command, service_id = intent["command"], intent["service_id"]
+    if command in ("cancel", "my_bookings", "rebook"):
+        return FREE_TEXT_COMMANDS[command]
+    
+    step = session["step"]
+    if step == "barber" and intent["barber_name"] and not service_id:
+        names = [b.name for b in get_barbers_for_service(session["service"])]
+        if intent["barber_name"] in names:
+            return str(names.index(intent["barber_name"]) + 1)
+    if step == "date" and intent["date"] and not service_id:
+        options = session.get("date_options") or []
+        if intent["date"] in options:
+            return str(options.index(intent["date"]) + 1)
+    if service_id and not intent["barber_name"] and not intent["date"]:
+        # Just a service: continue exactly as if its number had been picked
+        service_ids = [s.id for s in get_all_services()]
+        if service_id in service_ids:
+            session["step"] = "service"
+            return str(service_ids.index(service_id) + 1)
+    if service_id:
+        return None
+    return FREE_TEXT_COMMANDS.get(command)
+
+def get_date_options(service_id: str, barber_name: str = None) -> list:
+    """Get date choices: today and tomorrow when they are working days, then the next open days from the availability matrix
+    
+    With no barber_name, a day counts if any barber qualified for the service works (or is free) on it.
+    """
+    today = datetime.now()
+    nearby = [today.strftime("%Y-%m-%d"), (today + timedelta(days=1)).strftime("%Y-%m-%d")]
+    options = []
+    try:
+        options = [day for day in nearby if is_working_day(service_id, day, barber_name)]
+        # Up to five choices in all
+        options += find_open_days(service_id, count=5 - len(options), barber_name=barber_name, after=nearby[-1])
+    except Exception as e:
+        logger.error(f"Error finding open days: {str(e)}")
+        options = options or nearby
+    return options
+
+def get_session_slots(session: Dict, selected_date: datetime) -> list:
+    """Get open slots for the session's barber, or for any qualified barber"""
+    if session.get("any_barber"):
+        return find_open_slots(session["service"], selected_date.strftime("%Y-%m-%d"))
+    return get_available_slots(session["barber"], selected_date)
 
-async def process_message(message: str, phone: str, contact_name: str) -> str:
-    """Process message and return reply"""
+def format_date_option(date_str: str) -> str:
+    """Format a date choice with its emoji"""
+    day = datetime.strptime(date_str, "%Y-%m-%d")
+    date_display = day.strftime("%A, %B %d")
+    days_ahead = (day.date() - datetime.now().date()).days
+    if days_ahead == 0:
+        return f"📅 Today ({date_display})"
+    if days_ahead == 1:
+        return f"🌅 Tomorrow ({date_display})"
+    return f"🗓️ {date_display}"
+
+def process_message(message: str, phone: str, contact_name: str) -> str:
+    """Process message and return reply (blocking: store, calendar and journal calls)"""
     session = get_session_data(phone)
     session["contact_name"] = contact_name
     
     reply_message = ""
     
     try:
+        # Free text ("haircut tomorrow", "helo") is mapped onto the same commands and numbered choices
+        intent = None
+        if not message.isdigit() and message not in FREE_TEXT_COMMANDS.values():
+            try:
+                intent = match_intent(message)
+                message = interpret_free_text(session, intent) or message
+                logger.info(f"🧠 Free text matched: {intent} -> '{message}'")
+            except Exception as e:
+                logger.error(f"Error matching free text: {str(e)}")
+        
         # Handle message based on session state
         if message in ["hi", "hello", "start", "restart"]:
             logger.info(f"🎯 Handling greeting message: {message}")
             
-            if message in ["restart", "start"]:
+            # Leaving the cancel flow too, so the next number picks a service rather than a booking
+            if message in ["restart", "start"] or session["step"] == "cancel":
                 clear_session(phone)
                 session = get_session_data(phone)
                 session["contact_name"] = contact_name
@@ -81,6 +364,70 @@ async def process_message(message: str, phone: str, contact_name: str) -> str:
             else:
                 service_list = "\n".join([f"{i+1}. {s.name} (💰${s.price}, ⏱️{s.duration} mins)" for i, s in enumerate(services)])
                 reply_message = f"👋 Welcome to {settings.SALON_NAME}! ✨\n\nHere are our services:\n\n{service_list}\n\n📝 Please enter the number of the service you'd like to book."
+                
+                profile = get_profile(phone)
+                if profile and profile.get("last_service_name"):
+                    reply_message += f"\n\n🔁 Or reply 'REBOOK' for another {profile['last_service_name']} with {profile.get('last_barber_name')}."
+        
+        elif message in ["my bookings", "bookings"]:
+            logger.info(f"📋 Listing bookings for {phone}")
+            upcoming = get_upcoming_bookings(phone)
+            
+            if upcoming is None:
+                reply_message = settings.STORE_UNAVAILABLE_MESSAGE
+            elif not upcoming:
+                reply_message = "🤔 You don't have any upcoming bookings.\n\n💬 Say 'hi' to book, or 'REBOOK' to repeat your last appointment!"
+            else:
+                booking_list = "\n".join([f"{i+1}. {format_booking(b)}" for i, b in enumerate(upcoming)])
+                reply_message = f"📋 Your upcoming bookings:\n\n{booking_list}\n\n💬 Reply 'CANCEL' to cancel one, or 'REBOOK' to book your last service again."
+        
+        elif message in ["rebook", "book again"]:
+            logger.info(f"🔁 Handling rebook request from {phone}")
+            profile = get_profile(phone)
+            
+            if not profile or not profile.get("last_service_id"):
+                reply_message = "🤔 We couldn't find a previous booking to repeat.\n\n💬 Say 'hi' to start booking!"
+            else:
+                clear_session(phone)
+                session = get_session_data(phone)
+                session["contact_name"] = contact_name
+                reply_message = start_rebook(session, profile)
+        
+        elif message in ["cancel", "cancel booking"]:
+            logger.info(f"🗑️ Handling cancel request from {phone}")
+            upcoming = get_upcoming_bookings(phone)
+            
+            if upcoming is None:
+                reply_message = settings.STORE_UNAVAILABLE_MESSAGE
+            elif not upcoming:
+                reply_message = "🤔 You don't have any upcoming bookings to cancel.\n\n💬 Say 'hi' to book an appointment!"
+            else:
+                session["step"] = "cancel"
+                session["cancel_options"] = [b["booking_id"] for b in upcoming]
+                booking_list = "\n".join([f"{i+1}. {format_booking(b)}" for i, b in enumerate(upcoming)])
+                reply_message = f"🗑️ Which booking would you like to cancel?\n\n{booking_list}\n\n📝 Reply with its number, or say 'hi' to keep your bookings."
+        
+        elif session["step"] == "cancel" and message.isdigit():
+            logger.info(f"🗑️ Processing cancel selection: {message}")
+            options = session.get("cancel_options") or []
+            cancel_index = int(message) - 1
+            
+            if 0 <= cancel_index < len(options):
+                result = cancel_booking(options[cancel_index])
+                if result["status"] == "success":
+                    reply_message = f"✅ Your booking has been cancelled:\n\n{format_booking(result['booking'])}\n\n💬 Say 'hi' whenever you'd like to book again!"
+                    clear_session(phone)
+                elif result["status"] == "already_cancelled":
+                    reply_message = f"ℹ️ That booking was already cancelled:\n\n{format_booking(result['booking'])}"
+                    clear_session(phone)
+                elif result["status"] == "unavailable":
+                    # Keep the session so the customer can resend the same number
+                    reply_message = result["message"]
+                else:
+                    reply_message = "😔 Sorry, we couldn't cancel that booking. Please try again or contact us directly."
+                    clear_session(phone)
+            else:
+                reply_message = "❌ Invalid selection. Please choose a valid number from the bookings above."
         
         elif session["step"] == "service" and message.isdigit():
             logger.info(f"🔢 Processing service selection: {message}")
@@ -98,6 +445,19 @@ async def process_message(message: str, phone: str, contact_name: str) -> str:
                         session["service"] = selected_service.id
                         session["step"] = "barber"
                         barber_list = "\n".join([f"{i+1}. ✂️ {b.name}" for i, b in enumerate(barbers)])
+                        barber_list += f"\n{len(barbers)+1}. 🎲 Any available stylist"
+                        
+                        # Shortcut: earliest open slot with any qualified barber
+                        try:
+                            session["earliest"] = find_earliest_slot(selected_service.id)
+                        except Exception as e:
+                            logger.error(f"Error finding earliest slot: {str(e)}")
+                            session["earliest"] = None
+                        if session["earliest"]:
+                            earliest = session["earliest"]
+                            earliest_day = datetime.strptime(earliest["date"], "%Y-%m-%d").strftime("%A, %B %d")
+                            barber_list += f"\n{len(barbers)+2}. ⚡ Earliest available: {earliest_day} at {earliest['time_slot']} with {earliest['barber']}"
+                        
                         reply_message = f"✅ You've selected {selected_service.name}!\n\n👨‍💼 Please choose your preferred stylist:\n\n{barber_list}"
                 else:
                     service_list = "\n".join([f"{i+1}. {s.name} (💰${s.price}, ⏱️{s.duration} mins)" for i, s in enumerate(services)])
@@ -115,16 +475,28 @@ async def process_message(message: str, phone: str, contact_name: str) -> str:
                 if 0 <= barber_index < len(barbers):
                     selected_barber = barbers[barber_index]
                     session["barber"] = selected_barber.name
+                    session["any_barber"] = False
                     session["step"] = "date"
                     
-                    # Show date options (today and tomorrow)
-                    today = datetime.now()
-                    tomorrow = today + timedelta(days=1)
+                    # Show date options (today, tomorrow and the next open days)
+                    session["date_options"] = get_date_options(session["service"], selected_barber.name)
+                    date_list = "\n".join([f"{i+1}. {format_date_option(d)}" for i, d in enumerate(session["date_options"])])
+                    
+                    reply_message = f"🎉 Great! You've selected ✂️ {selected_barber.name}.\n\n📅 Please choose your preferred date:\n\n{date_list}"
+                elif barber_index == len(barbers):
+                    # Any stylist: the least-loaded free barber is assigned once a time is picked
+                    session["barber"] = None
+                    session["any_barber"] = True
+                    session["step"] = "date"
                     
-                    today_str = today.strftime("%A, %B %d")
-                    tomorrow_str = tomorrow.strftime("%A, %B %d")
+                    session["date_options"] = get_date_options(session["service"], None)
+                    date_list = "\n".join([f"{i+1}. {format_date_option(d)}" for i, d in enumerate(session["date_options"])])
                     
-                    reply_message = f"🎉 Great! You've selected ✂️ {selected_barber.name}.\n\n📅 Please choose your preferred date:\n\n1. 📅 Today ({today_str})\n2. 🌅 Tomorrow ({tomorrow_str})"
+                    reply_message = f"🎉 Great! We'll match you with the first available stylist.\n\n📅 Please choose your preferred date:\n\n{date_list}"
+                elif barber_index == len(barbers) + 1 and session.get("earliest"):
+                    earliest = session["earliest"]
+                    service = get_service(session["service"])
+                    reply_message = confirm_booking(phone, contact_name, service, earliest["barber"], earliest["date"], earliest["time_slot"])
                 else:
                     reply_message = "❌ Invalid selection. Please choose a valid number from the list above."
             except (IndexError, ValueError):
@@ -137,34 +509,30 @@ async def process_message(message: str, phone: str, contact_name: str) -> str:
         elif session["step"] == "date" and message.isdigit():
             logger.info(f"📅 Processing date selection: {message}")
             try:
-                today = datetime.now()
-                tomorrow = today + timedelta(days=1)
+                date_options = session.get("date_options") or get_date_options(session["service"], session["barber"])
+                date_index = int(message) - 1
                 
-                if message == "1":
-                    selected_date = today
-                    date_display = today.strftime("%A, %B %d")
-                    date_emoji = "📅"
-                elif message == "2":
-                    selected_date = tomorrow
-                    date_display = tomorrow.strftime("%A, %B %d")
-                    date_emoji = "🌅"
-                else:
-                    reply_message = "❌ Invalid selection. Please choose:\n\n1. 📅 Today\n2. 🌅 Tomorrow"
+                if not 0 <= date_index < len(date_options):
+                    date_list = "\n".join([f"{i+1}. {format_date_option(d)}" for i, d in enumerate(date_options)])
+                    reply_message = f"❌ Invalid selection. Please choose:\n\n{date_list}"
                     return reply_message
                 
+                selected_date = datetime.strptime(date_options[date_index], "%Y-%m-%d")
+                date_label = format_date_option(date_options[date_index])
+                
                 session["date"] = selected_date.strftime("%Y-%m-%d")
                 session["step"] = "time"
                 
                 # Get available slots for the selected date
-                slots = get_available_slots(session["barber"], selected_date)
+                slots = get_session_slots(session, selected_date)
                 if not slots:
-                    reply_message = f"😔 Sorry, no available slots found for {date_emoji} {date_display}.\n\n🔄 Please try the other date or say 'restart' to choose a different barber."
+                    reply_message = f"😔 Sorry, no available slots found for {date_label}.\n\n🔄 Please try another date or say 'restart' to choose a different barber."
                     # Go back to date selection
                     session["step"] = "date"
                     session["date"] = None
                 else:
                     slot_list = "\n".join([f"{i+1}. ⏰ {slot}" for i, slot in enumerate(slots)])
-                    reply_message = f"✅ Perfect! Available times for {date_emoji} {date_display}:\n\n{slot_list}\n\n⏰ Please choose your preferred time:"
+                    reply_message = f"✅ Perfect! Available times for {date_label}:\n\n{slot_list}\n\n⏰ Please choose your preferred time:"
             except Exception as e:
                 logger.error(f"Error processing date selection: {str(e)}")
                 reply_message = "😔 Sorry, there was an error processing your date selection. Please try again."
@@ -174,35 +542,22 @@ async def process_message(message: str, phone: str, contact_name: str) -> str:
             logger.info(f"⏰ Processing time selection: {message}")
             try:
                 selected_date = datetime.strptime(session["date"], "%Y-%m-%d")
-                slots = get_available_slots(session["barber"], selected_date)
+                slots = get_session_slots(session, selected_date)
                 slot_index = int(message) - 1
                 
                 if 0 <= slot_index < len(slots):
                     selected_time = slots[slot_index]
                     
                     service = get_service(session["service"])
-                    booking_data = {
-                        "service_id": service.id,
-                        "service_name": service.name,
-                        "barber_name": session["barber"],
-                        "time_slot": selected_time,
-                        "phone": phone,
-                        "date": session["date"],
-                        "contact_name": session.get("contact_name", contact_name)
-                    }
+                    barber_name = session["barber"]
+                    if session.get("any_barber"):
+                        barber_name = pick_least_loaded_barber(service.id, session["date"], selected_time)
                     
-                    result = book_slot(booking_data)
-                    if result["status"] == "success":
-                        # Format the date for display
-                        booking_date = datetime.strptime(session["date"], "%Y-%m-%d")
-                        date_display = booking_date.strftime("%A, %B %d, %Y")
-                        client_name = session.get("contact_name", "")
-                        name_greeting = f"Hi {client_name}! " if client_name and client_name != "Unknown" else ""
-                        
-                        reply_message = f"🎉✨ Booking Confirmed! ✨🎉\n\n{name_greeting}📋 Your Appointment Details:\n💄 Service: {service.name}\n✂️ Barber: {session['barber']}\n📅 Date: {date_display}\n⏰ Time: {selected_time}\n\n🤗 We look forward to seeing you at {settings.SALON_NAME}! Thank you for choosing us! 💖"
+                    if barber_name:
+                        reply_message = confirm_booking(phone, contact_name, service, barber_name, session["date"], selected_time, any_barber=bool(session.get("any_barber")))
                     else:
                         reply_message = "😔 Sorry, that slot is no longer available. Please try again or say 'restart' to start over."
-                    clear_session(phone)
+                        clear_session(phone)
                 else:
                     reply_message = "❌ Invalid selection. Please choose a valid number from the time slots above."
             except (IndexError, ValueError):
@@ -212,6 +567,15 @@ async def process_message(message: str, phone: str, contact_name: str) -> str:
                 reply_message = "😔 Sorry, there was an error processing your booking. Please try again or contact us directly."
                 clear_session(phone)
         
+        elif intent and intent["service_id"] and get_service(intent["service_id"]):
+            # "haircut with maya tomorrow": skip the steps already answered
+            service = get_service(intent["service_id"])
+            logger.info(f"🧠 Booking request: {service.name}, barber {intent['barber_name']}, date {intent['date']}")
+            clear_session(phone)
+            session = get_session_data(phone)
+            session["contact_name"] = contact_name
+            reply_message = offer_slots(session, service, intent["barber_name"], intent["date"], heading=f"✅ You've selected {service.name}!\n\n")
+        
         else:
             logger.info(f"❓ Unrecognized message: {message}")
             reply_message = f"🤔 I don't understand that message.\n\n💬 Please say 'hi' to start booking or 'restart' to start over.\n\n🆘 Need help? Just say 'hi'!"
@@ -225,8 +589,77 @@ async def process_message(message: str, phone: str, contact_name: str) -> str:
 @app.on_event("startup")
 async def startup_event():
     """Initialize the database with default data if empty"""
-    # Initialize database
-    init_default_data()
+    # Configuration checks and the Firebase connection run here rather than at import time
+    settings.validate_settings()
+    
+    # Serve the last known catalog immediately; warmup swaps in the store's copy once it loads
+    load_catalog_snapshot()
+    
+    # Connect, initialize and warm up in the background; /ready stays 503 until this finishes
+    global _warmup_task
+    _warmup_task = asyncio.create_task(asyncio.to_thread(_initialize_and_warm_up))
+    start_tracing()
+    start_stats_flusher()
+    start_profile_tracking()
+    
+    pre_forked = get_worker_slot() is not None
+    if settings.BOOKING_JOURNAL_ENABLED:
+        # Recover journaled bookings before taking traffic so their slots stay taken
+        if pre_forked:
+            _open_worker_journal()
+        else:
+            open_booking_journal()
+    
+    if settings.GOOGLE_CALENDAR_MIRROR_ENABLED:
+        # Every worker runs the loop, but only the holder of the lock drains the shared outbox
+        start_outbox_worker(os.path.join(settings.WORKER_LOCK_DIR, "calendar_outbox.lock") if pre_forked else None)
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop background workers"""
+    stop_outbox_worker()
+    stop_reminder_worker()
+    stop_booking_replica()
+    stop_stats_flusher()
+    close_booking_journal()
+    stop_tracing()
+
+def _open_worker_journal():
+    """
+    Open the first journal directory no other worker holds
+
+    A worker that takes over a directory left by an exited worker replays
+    whatever that worker had not replicated yet.
+    """
+    for index in range(MAX_WORKER_JOURNALS):
+        try:
+            open_booking_journal(
+                os.path.join(settings.BOOKING_JOURNAL_DIR, f"worker-{index}"),
+                os.path.join(settings.BOOKING_JOURNAL_DIR, RESERVATIONS_FILE)
+            )
+            return
+        except BlockingIOError:
+            continue
+    logger.error(f"❌ All {MAX_WORKER_JOURNALS} worker journals are in use - booking without the journal")
+
+def _initialize_and_warm_up():
+    """Connect to Firebase, initialize data and run the warmup pipeline"""
+    try:
+        initialize_firebase()
+        
+        # Initialize database
+        init_default_data()
+        # Subscribe before warmup so its availability reads can be served locally once the first snapshot lands
+        start_booking_replica()
+        run_warmup()
+    except Exception as e:
+        # Never leave /ready at 503 forever: serve degraded from the snapshot and fallbacks
+        record_warmup_failure(e)
+    
+    if settings.REMINDERS_ENABLED:
+        # Loads upcoming bookings once the store is reachable; with several workers only the lock holder sends
+        pre_forked = get_worker_slot() is not None
+        start_reminder_worker(os.path.join(settings.WORKER_LOCK_DIR, "reminders.lock") if pre_forked else None)
 
 @app.get("/")
 async def root():
@@ -269,6 +702,7 @@ async def health_check():
         health_data = {
             "status": overall_status,
             "timestamp": datetime.now().isoformat(),
+            "worker": get_worker_info(),
             "service": "WhatsApp Booking Bot",
             "salon": settings.SALON_NAME,
             "version": "3.0.0",
@@ -276,15 +710,22 @@ async def health_check():
                 "whatsapp_service": "healthy" if whatsapp_healthy else "unhealthy",
                 "database": "healthy" if db_healthy else "unhealthy",
                 "firebase": "connected" if firebase_connected else "using_fallback",
-                "api": "healthy"
+                "api": "healthy",
+                "warmup": ("degraded" if get_warmup_status()["degraded"] else "ready") if is_ready() else "warming_up"
             },
             "firebase_status": {
                 "connected": firebase_connected,
                 "storage_mode": "firebase" if firebase_connected else "in_memory_fallback"
-            }
+            },
+            "calendar_outbox": get_outbox_stats(),
+            "availability_matrix": get_matrix_stats(),
+            "booking_replica": get_booking_replica_stats(),
+            "booking_journal": get_booking_journal_stats(),
+            "catalog_snapshot": get_catalog_snapshot_info(),
+            "circuit_breakers": get_breaker_stats()
         }
         
-        return health_data
+        return json_response(health_data)
         
     except Exception as e:
         logger.error(f"Health check error: {e}")
@@ -294,34 +735,126 @@ async def health_check():
             "error": str(e)
         })
 
+@app.get("/metrics")
+async def metrics():
+    """Runtime metrics: circuit breakers, caches and background workers"""
+    return json_response({
+        "timestamp": datetime.now().isoformat(),
+        "worker": get_worker_info(),
+        "sessions": sessions.count(),
+        "webhook": _webhook_stats,
+        "circuit_breakers": get_breaker_stats(),
+        "rate_limits": get_rate_limit_stats(),
+        "store_coalescing": get_single_flight_stats(),
+        "calendar_outbox": get_outbox_stats(),
+        "availability_matrix": get_matrix_stats(),
+        "booking_journal": get_booking_journal_stats(),
+        "barber_loads": get_load_stats(),
+        "customer_profiles": get_profile_cache_stats(),
+        "reminders": get_reminder_stats(),
+        "booking_stats": get_booking_stats_status(),
+        "profiler": get_profiler_stats(),
+        "tracing": get_tracing_stats()
+    })
+
+@app.get("/stats")
+async def booking_stats(start_date: str = None, end_date: str = None, barber: str = None, service: str = None):
+    """
+    Booking analytics: bookings, occupied minutes, revenue and utilization
+    
+    Dates are YYYY-MM-DD (default: today). Answered from the incremental
+    counters, so the cost does not grow with booking history.
+    """
+    start_date = start_date or datetime.now().strftime("%Y-%m-%d")
+    end_date = end_date or start_date
+    try:
+        days = (datetime.strptime(end_date, "%Y-%m-%d") - datetime.strptime(start_date, "%Y-%m-%d")).days + 1
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Dates must be YYYY-MM-DD")
+    if days < 1 or days > settings.BOOKING_STATS_MAX_DAYS:
+        raise HTTPException(status_code=400, detail=f"Date range must cover 1 to {settings.BOOKING_STATS_MAX_DAYS} days")
+    
+    return json_response({
+        "status": "success",
+        "salon": settings.SALON_NAME,
+        **query_stats(start_date, end_date, barber, service)
+    })
+
+def require_admin(request: Request):
+    """Reject requests without the configured X-Admin-Token (all /admin endpoints are off when ADMIN_TOKEN is empty)"""
+    if not settings.ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Admin endpoints are disabled (set ADMIN_TOKEN)")
+    if not settings.is_admin_token(request.headers.get("x-admin-token")):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+@app.get("/admin/profile")
+async def get_profile_samples(request: Request, format: str = "collapsed"):
+    """
+    Aggregated webhook stacks from this worker's profiler
+    
+    `format=collapsed` returns "frame;frame;frame count" lines (flamegraph.pl,
+    speedscope); `format=speedscope` returns a speedscope JSON file.
+    """
+    require_admin(request)
+    if format == "collapsed":
+        return PlainTextResponse(collapsed_stacks())
+    if format == "speedscope":
+        return json_response(speedscope_profile())
+    raise HTTPException(status_code=400, detail="format must be 'collapsed' or 'speedscope'")
+
+@app.delete("/admin/profile")
+async def clear_profile_samples(request: Request):
+    """Discard this worker's aggregated stacks"""
+    require_admin(request)
+    reset_profile()
+    return json_response({"status": "success", "profiler": get_profiler_stats()})
+
+@app.post("/admin/profiler")
+async def configure_profiler(request: Request, enabled: Optional[bool] = None, sample_every: Optional[int] = None, interval_ms: Optional[float] = None):
+    """Turn the profiler on or off and tune it at runtime (this worker only; restarts go back to the environment)"""
+    require_admin(request)
+    if sample_every is not None and sample_every < 1:
+        raise HTTPException(status_code=400, detail="sample_every must be at least 1")
+    if interval_ms is not None and interval_ms <= 0:
+        raise HTTPException(status_code=400, detail="interval_ms must be positive")
+    if enabled is not None:
+        settings.PROFILER_ENABLED = enabled
+    if sample_every is not None:
+        settings.PROFILER_SAMPLE_EVERY = sample_every
+    if interval_ms is not None:
+        settings.PROFILER_INTERVAL_MS = interval_ms
+    logger.info(f"🔬 Profiler {'enabled' if settings.PROFILER_ENABLED else 'disabled'} (1 in {settings.PROFILER_SAMPLE_EVERY}, every {settings.PROFILER_INTERVAL_MS} ms)")
+    return json_response({"status": "success", "profiler": get_profiler_stats(), "worker": get_worker_info()})
+
+@app.get("/ready")
+async def readiness_check():
+    """Readiness endpoint: 503 until warmup has completed"""
+    ready = is_ready()
+    status = get_warmup_status()
+    status["status"] = "ready" if ready else "not ready"
+    status["timestamp"] = datetime.now().isoformat()
+    status["worker"] = get_worker_info()
+    return json_response(status, status_code=200 if ready else 503)
+
 @app.get("/firebase-status")
 async def firebase_status():
     """Check Firebase connection status and data"""
     try:
-        from app.services.firestore_simple import is_firebase_connected, get_firebase_client
+        from app.services.firestore_simple import is_firebase_connected, get_firebase_client, count_documents
         
         firebase_connected = is_firebase_connected()
         client = get_firebase_client()
         
-        # Get data counts
-        services = get_all_services()
-        barbers = get_all_barbers()
-        
-        try:
-            from app.services.firestore_simple import get_all_bookings
-            bookings = get_all_bookings()
-        except:
-            bookings = []
-        
         status_data = {
             "firebase_connected": firebase_connected,
             "client_type": "firebase_admin" if client and client != "REST_API" else ("rest_api" if client == "REST_API" else "none"),
             "data_source": "firebase" if firebase_connected else "in_memory_fallback",
             "salon": settings.SALON_NAME,
+            # Server-side counts (None if the store can't be queried), cached briefly
             "data_counts": {
-                "services": len(services),
-                "barbers": len(barbers),
-                "bookings": len(bookings)
+                "services": count_documents('services'),
+                "barbers": count_documents('barbers'),
+                "bookings": count_documents('bookings')
             },
             "timestamp": datetime.now().isoformat()
         }
@@ -331,7 +864,7 @@ async def firebase_status():
         else:
             status_data["message"] = "⚠️ Firebase not connected - no data available (requires Firebase connection)"
         
-        return status_data
+        return json_response(status_data)
         
     except Exception as e:
         logger.error(f"Firebase status check error: {e}")
@@ -342,37 +875,67 @@ async def firebase_status():
             "timestamp": datetime.now().isoformat()
         }
 
+def handle_message(message: str, phone: str, contact_name: str) -> str:
+    """Process a message and write its session back, one message per phone at a time (runs in the threadpool)"""
+    with session_lock(phone):
+        try:
+            return process_message(message, phone, contact_name)
+        finally:
+            set_attribute("step", _active_sessions.get(phone, {}).get("step"))
+            with span("session.save"):
+                save_session(phone)
+
 @app.post("/webhook/whatsapp")
 async def whatsapp_webhook(request: Request):
     """Main WhatsApp webhook endpoint"""
     try:
-        logger.info("🔔 Received WhatsApp webhook request")
+        try:
+            payload = await parse_request_json(request)
+        except ValueError:
+            payload = None
         
-        # Get JSON data from WhatsApp Web service
-        data = await request.json()
-        logger.info(f"📨 WhatsApp data received: {data}")
+        # Group, status and non-text traffic is dropped before any validation, logging or session work
+        skipped = skip_reason(payload)
+        if skipped:
+            _webhook_stats["skipped_" + skipped] += 1
+            return {"reply": None}
         
-        message = data.get("body", "").lower().strip()
-        phone = data.get("from", "").replace("@c.us", "").replace("@g.us", "")
-        contact_name = data.get("contactName", "Unknown")
+        data = WhatsAppWebhookMessage.model_validate(payload)
+        _webhook_stats["accepted"] += 1
+        trace_id, parent_id = parse_trace_context(data.trace_id, request.headers.get("traceparent"))
+        with start_trace("webhook.whatsapp", trace_id, parent_id):
+            message = data.body.lower()
+            phone = data.phone
+            contact_name = data.contact_name
         
-        logger.info(f"📱 Processing message: '{message}' from phone: {phone}, contact: {contact_name}")
+            logger.info(f"📱 Processing message {data.message_id}: '{message}' from phone: {phone}, contact: {contact_name}")
+            set_attribute("phone", phone)
         
-        # Skip group messages
-        if data.get("isGroupMsg", False) or "@g.us" in data.get("from", ""):
-            logger.info("⏭️ Skipping group message")
-            return {"reply": None}
+            if not message or not phone:
+                logger.error("❌ Missing message or phone in WhatsApp webhook")
+                return {"error": "Missing required data"}
         
-        if not message or not phone:
-            logger.error("❌ Missing message or phone in WhatsApp webhook")
-            return {"error": "Missing required data"}
+            # Throttle before any session or store work; the Redis round trip stays off the event loop
+            if uses_shared_backend():
+                allowed, scope, notify = await run_in_threadpool(check_rate_limit, phone)
+            else:
+                allowed, scope, notify = check_rate_limit(phone)
+            if not allowed:
+                logger.warning(f"🚦 Throttled message from {phone} ({scope} limit)")
+                set_attribute("throttled", scope)
+                return {"reply": settings.RATE_LIMIT_REPLY if notify and settings.RATE_LIMIT_REPLY else None}
             
-        # Process message
-        reply_message = await process_message(message, phone, contact_name)
+            # Process message off the event loop (the trace context goes with it)
+            reply_message = await run_in_threadpool(handle_message, message, phone, contact_name)
         
-        logger.info(f"📤 Sending reply: {reply_message}")
-        return {"reply": reply_message}
+            logger.info(f"📤 Sending reply: {reply_message}")
+            set_attribute("reply_chars", len(reply_message or ""))
+            return {"reply": reply_message}
         
+    except ValidationError as e:
+        _webhook_stats["invalid"] += 1
+        logger.warning(f"⚠️ Invalid WhatsApp webhook payload: {e.error_count()} errors")
+        return {"error": "Invalid message payload"}
     except Exception as e:
         logger.error(f"❌ Error in WhatsApp webhook: {str(e)}")
         return {
@@ -421,12 +984,12 @@ async def get_bookings():
     try:
         from app.services.firestore_simple import get_all_bookings
         bookings = get_all_bookings()
-        return {
+        return json_response({
             "status": "success",
             "salon": settings.SALON_NAME,
             "count": len(bookings),
             "bookings": bookings
-        }
+        })
     except Exception as e:
         logger.error(f"Error getting bookings: {str(e)}")
         return {
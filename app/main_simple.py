@@ -1,4 +1,5 @@
 from app.services.firestore_simple import (
+    initialize_firebase,
     init_default_data,
     get_all_services,
     get_all_barbers,
@@ -225,6 +226,10 @@ async def process_message(message: str, phone: str, contact_name: str) -> str:
 @app.on_event("startup")
 async def startup_event():
     """Initialize the database with default data if empty"""
+    # Configuration checks and the Firebase connection run here rather than at import time
+    settings.validate_settings()
+    initialize_firebase()
+    
     # Initialize database
     init_default_data()
 
@@ -0,0 +1,72 @@
+from typing import Any, Optional
+
+from pydantic import BaseModel, ConfigDict, Field, field_validator
+
+# Message types the bot answers; media, stickers, reactions and system notices are dropped
+CHAT_TYPES = frozenset({"chat"})
+
+# Senders that are never a customer's own chat: groups, and status/channel broadcasts
+GROUP_SUFFIX = "@g.us"
+BROADCAST_SUFFIXES = ("@broadcast", "@newsletter")
+
+_NON_DIGITS = str.maketrans("", "", "".join(chr(c) for c in range(128) if not chr(c).isdigit()))
+
+def normalize_phone(raw: str) -> str:
+    """
+    Canonical phone number: country code and digits only
+
+    "15551234567@c.us", "whatsapp:+1 (555) 123-4567" and "0015551234567"
+    all become "15551234567".
+    """
+    digits = raw.split("@", 1)[0].translate(_NON_DIGITS)
+    return digits[2:] if digits.startswith("00") else digits
+
+def skip_reason(payload: Any) -> Optional[str]:
+    """
+    Why an inbound payload is not a customer chat message, or None if it is
+
+    Only looks at a few raw keys, so group, status and non-text traffic is
+    dropped before validation, logging or any session work.
+    """
+    if not isinstance(payload, dict):
+        return "invalid"
+    sender = payload.get("from")
+    if not isinstance(sender, str):
+        sender = ""
+    if payload.get("isGroupMsg") or sender.endswith(GROUP_SUFFIX):
+        return "group"
+    if payload.get("isStatus") or sender.endswith(BROADCAST_SUFFIXES):
+        return "status"
+    message_type = payload.get("type", "chat")
+    if not isinstance(message_type, str) or message_type not in CHAT_TYPES:
+        return "type"
+    return None
+
+class WhatsAppWebhookMessage(BaseModel):
+    """Inbound message posted by the WhatsApp Web bridge"""
+    model_config = ConfigDict(populate_by_name=True, extra="ignore")
+
+    message_id: str = Field("", alias="id")  # e.g. "false_15551234567@c.us_3EB0..." (serialized WhatsApp id)
+    type: str = "chat"
+    timestamp: Optional[int] = None  # Seconds since the epoch, as sent by WhatsApp
+    from_: str = Field("", alias="from")  # e.g. "15551234567@c.us", or "...@g.us" for groups
+    body: str = ""
+    contact_name: str = Field("Unknown", alias="contactName")
+    is_group_msg: bool = Field(False, alias="isGroupMsg")
+    is_status: bool = Field(False, alias="isStatus")
+    trace_id: str = Field("", alias="traceId")  # 32 hex chars; spans for this message join the bridge's trace
+
+    @field_validator("body")
+    @classmethod
+    def _strip_body(cls, value: str) -> str:
+        return value.strip()
+
+    @field_validator("contact_name", mode="before")
+    @classmethod
+    def _default_contact_name(cls, value: Any) -> Any:
+        return value or "Unknown"
+
+    @property
+    def phone(self) -> str:
+        """Sender's canonical phone number (see normalize_phone)"""
+        return normalize_phone(self.from_)
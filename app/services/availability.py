@@ -0,0 +1,236 @@
+import time
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+from app.config import get_settings
+from app.services.firestore_simple import (
+    get_all_barbers,
+    get_all_services,
+    get_barbers_for_service,
+    get_bookings_in_range,
+    get_schedule,
+    add_booking_listener
+)
+
+if TYPE_CHECKING:
+    import numpy as np  # imported on first use: numpy costs ~100ms, and app.main imports this module
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+class AvailabilityMatrix:
+    """
+    Free/booked state for every barber over a window of days
+
+    `free[b, d, s]` is True when barber `b` has slot `s` open on day `d`, and
+    `scheduled[b, d, s]` when the barber works that slot at all. Per-service
+    views are row selections of the barbers qualified for the service, so a
+    booking is a single cell update shared by every service.
+    """
+
+    def __init__(self, barbers: List[str], days: List[str], slots: List[str]):
+        import numpy as np
+        self.barbers = barbers
+        self.days = days
+        self.slots = slots
+        self.barber_index = {name: i for i, name in enumerate(barbers)}
+        self.day_index = {day: i for i, day in enumerate(days)}
+        self.slot_index = {slot: i for i, slot in enumerate(slots)}
+        self.free = np.ones((len(barbers), len(days), len(slots)), dtype=bool)
+        self.scheduled = np.ones((len(barbers), len(days), len(slots)), dtype=bool)
+        self.day_ordinals = np.array([datetime.strptime(d, "%Y-%m-%d").toordinal() for d in days], dtype=np.int64)
+        self.slot_minutes = np.array(
+            [t.hour * 60 + t.minute for t in (datetime.strptime(s, "%I:%M %p") for s in slots)],
+            dtype=np.int64
+        )
+
+    def set_slot(self, barber_name: str, date_str: str, time_slot: str, free: bool):
+        """Mark one slot free or booked; unknown barbers, days or slots are ignored"""
+        b = self.barber_index.get(barber_name)
+        d = self.day_index.get(date_str)
+        s = self.slot_index.get(time_slot)
+        if b is not None and d is not None and s is not None:
+            self.free[b, d, s] = free
+
+    def open_mask(self, rows: "np.ndarray", now: datetime) -> "np.ndarray":
+        """Free slots for the given barber rows, with slots already in the past closed"""
+        today = now.toordinal()
+        now_minutes = now.hour * 60 + now.minute
+        past = (self.day_ordinals[:, None] < today) | (
+            (self.day_ordinals[:, None] == today) & (self.slot_minutes[None, :] <= now_minutes)
+        )
+        return self.free[rows] & self.scheduled[rows] & ~past[None, :, :]
+
+    def apply_schedule(self, schedule):
+        """Close every slot outside the barbers' compiled schedules"""
+        self.scheduled[:] = False
+        for b, barber_name in enumerate(self.barbers):
+            for d, day in enumerate(self.days):
+                slots = [self.slot_index[slot] for slot in schedule.slots_for(barber_name, day) if slot in self.slot_index]
+                self.scheduled[b, d, slots] = True
+
+# Shared matrix state: rebuilt in bulk after AVAILABILITY_MATRIX_TTL seconds
+_matrix: Optional[AvailabilityMatrix] = None
+_service_rows: Dict[str, "np.ndarray"] = {}
+_built_at = 0.0
+_built_schedule = None
+_build_lock = threading.Lock()
+
+def _on_booking_event(event: str, booking_data: Dict):
+    """Keep the matrix current as bookings are created or cancelled"""
+    if _matrix is not None:
+        _matrix.set_slot(
+            booking_data.get('barber_name'),
+            booking_data.get('date'),
+            booking_data.get('time_slot'),
+            free=(event == 'cancelled')
+        )
+
+def build_matrix(start: datetime = None) -> AvailabilityMatrix:
+    """Build the availability matrix from the catalog and one bookings range query"""
+    import numpy as np
+    global _matrix, _service_rows, _built_at, _built_schedule
+
+    start = start or datetime.now()
+    days = [(start + timedelta(days=i)).strftime("%Y-%m-%d") for i in range(settings.AVAILABILITY_HORIZON_DAYS)]
+    barbers = [b.name for b in get_all_barbers()]
+    schedule = get_schedule()
+    matrix = AvailabilityMatrix(barbers, days, list(schedule.grid))
+    matrix.apply_schedule(schedule)
+
+    for booking in get_bookings_in_range(days[0], days[-1]):
+        if booking.get('status', 'confirmed') != 'cancelled':
+            matrix.set_slot(booking.get('barber_name'), booking.get('date'), booking.get('time_slot'), free=False)
+
+    service_rows = {}
+    for service in get_all_services():
+        rows = [matrix.barber_index[b.name] for b in get_barbers_for_service(service.id) if b.name in matrix.barber_index]
+        service_rows[service.id] = np.array(rows, dtype=np.int64)
+
+    _matrix, _service_rows, _built_at, _built_schedule = matrix, service_rows, time.monotonic(), schedule
+    add_booking_listener(_on_booking_event)
+    logger.info(f"🧮 Availability matrix built: {len(barbers)} barbers × {len(days)} days × {len(matrix.slots)} slots")
+    return matrix
+
+def get_matrix() -> AvailabilityMatrix:
+    """Get the availability matrix, rebuilding it when stale, when the day rolls over or when schedules change"""
+    def stale() -> bool:
+        return (
+            _matrix is None
+            or time.monotonic() - _built_at > settings.AVAILABILITY_MATRIX_TTL
+            or _matrix.days[0] != datetime.now().strftime("%Y-%m-%d")
+            or _built_schedule is not get_schedule()
+        )
+    if stale():
+        with _build_lock:
+            if stale():
+                build_matrix()
+    return _matrix
+
+def _rows_for(matrix: AvailabilityMatrix, service_id: str, barber_name: str = None) -> "np.ndarray":
+    """Get matrix rows for a service, optionally narrowed to one barber"""
+    import numpy as np
+    rows = _service_rows.get(service_id, np.array([], dtype=np.int64))
+    if barber_name is not None:
+        b = matrix.barber_index.get(barber_name)
+        rows = rows[rows == b] if b is not None else np.array([], dtype=np.int64)
+    return rows
+
+def find_earliest_slot(service_id: str, now: datetime = None) -> Optional[Dict[str, str]]:
+    """
+    Find the earliest open slot with any barber qualified for a service
+
+    Returns:
+        Dict with barber, date and time_slot, or None if nothing is open in the horizon
+    """
+    import numpy as np
+    matrix = get_matrix()
+    rows = _rows_for(matrix, service_id)
+    if rows.size == 0:
+        return None
+
+    open_slots = matrix.open_mask(rows, now or datetime.now())
+    any_barber = open_slots.any(axis=0).ravel()
+    if not any_barber.any():
+        return None
+
+    flat = int(np.argmax(any_barber))
+    d, s = divmod(flat, len(matrix.slots))
+    # First qualified barber (in catalog order) free at that slot
+    b = int(rows[np.argmax(open_slots[:, d, s])])
+    return {
+        "barber": matrix.barbers[b],
+        "date": matrix.days[d],
+        "time_slot": matrix.slots[s]
+    }
+
+def find_open_days(service_id: str, count: int = 3, barber_name: str = None, now: datetime = None, after: str = None) -> List[str]:
+    """
+    Find the next days with at least one open slot for a service
+
+    Args:
+        service_id: Service to check
+        count: Maximum number of days to return
+        barber_name: Only consider this barber (defaults to any qualified barber)
+        now: Current time (slots before it are closed)
+        after: Only return days after this YYYY-MM-DD date
+    """
+    import numpy as np
+    matrix = get_matrix()
+    rows = _rows_for(matrix, service_id, barber_name)
+    if rows.size == 0:
+        return []
+
+    open_days = matrix.open_mask(rows, now or datetime.now()).any(axis=(0, 2))
+    if after is not None:
+        open_days &= np.array([day > after for day in matrix.days])
+    return [matrix.days[i] for i in np.flatnonzero(open_days)[:count]]
+
+def find_open_slots(service_id: str, date_str: str, now: datetime = None) -> List[str]:
+    """Get the slots on a day where at least one barber qualified for a service is free"""
+    import numpy as np
+    matrix = get_matrix()
+    rows = _rows_for(matrix, service_id)
+    d = matrix.day_index.get(date_str)
+    if rows.size == 0 or d is None:
+        return []
+
+    open_any = matrix.open_mask(rows, now or datetime.now())[:, d, :].any(axis=0)
+    return [matrix.slots[i] for i in np.flatnonzero(open_any)]
+
+def is_slot_open(barber_name: str, date_str: str, time_slot: str) -> bool:
+    """Check a single matrix cell; days outside the horizon count as open when the barber works the slot"""
+    matrix = get_matrix()
+    b = matrix.barber_index.get(barber_name)
+    d = matrix.day_index.get(date_str)
+    s = matrix.slot_index.get(time_slot)
+    if b is None or s is None:
+        return False
+    if d is None:
+        return time_slot in get_schedule().slots_for(barber_name, date_str)
+    return bool(matrix.free[b, d, s] and matrix.scheduled[b, d, s])
+
+def is_working_day(service_id: str, date_str: str, barber_name: str = None) -> bool:
+    """Check whether the barber (or any barber qualified for the service) works on a day"""
+    matrix = get_matrix()
+    rows = _rows_for(matrix, service_id, barber_name)
+    d = matrix.day_index.get(date_str)
+    if rows.size == 0:
+        return False
+    if d is None:
+        schedule = get_schedule()
+        return any(schedule.slots_for(matrix.barbers[b], date_str) for b in rows)
+    return bool(matrix.scheduled[rows, d].any())
+
+def get_matrix_stats() -> Dict:
+    """Get availability matrix statistics"""
+    if _matrix is None:
+        return {"built": False}
+    return {
+        "built": True,
+        "shape": list(_matrix.free.shape),
+        "open_slots": int((_matrix.free & _matrix.scheduled).sum()),
+        "age_seconds": round(time.monotonic() - _built_at, 1)
+    }
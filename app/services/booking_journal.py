@@ -0,0 +1,289 @@
+import os
+import json
+import mmap
+import time
+import zlib
+import queue
+import struct
+import logging
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.services.file_lock import try_lock
+
+logger = logging.getLogger(__name__)
+
+# Record header: payload length, CRC32 of payload. A zero length marks the end of a segment's data.
+RECORD_HEADER = struct.Struct("<II")
+SEGMENT_PREFIX = "segment-"
+SEGMENT_SUFFIX = ".log"
+LOCK_FILE = ".lock"
+
+class JournalSegment:
+    """A preallocated, memory-mapped journal file"""
+
+    def __init__(self, path: str, size: int):
+        self.path = path
+        self.seq = int(os.path.basename(path)[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)])
+        exists = os.path.exists(path)
+        self.file = open(path, "r+b" if exists else "w+b")
+        if not exists:
+            self.file.truncate(size)
+        self.size = os.path.getsize(path)
+        self.mm = mmap.mmap(self.file.fileno(), self.size)
+        self.position = 0
+
+    def records(self) -> List[Dict]:
+        """Read valid records from the start, stopping at the end marker or a torn/corrupt record"""
+        records = []
+        position = 0
+        while position + RECORD_HEADER.size <= self.size:
+            length, checksum = RECORD_HEADER.unpack_from(self.mm, position)
+            if length == 0 or position + RECORD_HEADER.size + length > self.size:
+                break
+            payload = self.mm[position + RECORD_HEADER.size:position + RECORD_HEADER.size + length]
+            if zlib.crc32(payload) != checksum:
+                logger.warning(f"⚠️ Journal checksum mismatch in {self.path} at offset {position}; ignoring the rest of the segment")
+                break
+            records.append(json.loads(payload))
+            position += RECORD_HEADER.size + length
+        self.position = position
+        return records
+
+    def fits(self, length: int) -> bool:
+        """Check if a payload of this length fits, leaving room for the end marker"""
+        return self.position + 2 * RECORD_HEADER.size + length <= self.size
+
+    def append(self, payload: bytes):
+        """Write a record at the current position (not yet flushed)"""
+        RECORD_HEADER.pack_into(self.mm, self.position, len(payload), zlib.crc32(payload))
+        start = self.position + RECORD_HEADER.size
+        self.mm[start:start + len(payload)] = payload
+        self.position = start + len(payload)
+
+    def flush(self):
+        """msync the mapped pages to disk"""
+        self.mm.flush()
+
+    def close(self):
+        self.mm.flush()
+        self.mm.close()
+        self.file.close()
+
+class BookingJournal:
+    """
+    Append-only write-ahead journal for bookings
+
+    `append` writes a checksummed record into the active memory-mapped
+    segment and returns once a group flush covers it. A replayer thread
+    hands each booking to `replicate` and then appends a 'replicated'
+    marker. `replicate` must be idempotent, because a booking may be
+    replayed again after a crash. Leading segments whose bookings have all
+    been replicated are deleted.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        replicate: Callable[[str, Dict], None],
+        segment_size: int = 4 * 1024 * 1024,
+        flush_interval_ms: int = 5,
+        retry_delay: float = 1.0
+    ):
+        self.directory = directory
+        self.replicate = replicate
+        self.segment_size = segment_size
+        self.flush_interval = flush_interval_ms / 1000.0
+        self.retry_delay = retry_delay
+
+        self._lock = threading.Lock()
+        self._flushed = threading.Condition(self._lock)
+        self._written_seq = 0
+        self._flushed_seq = 0
+        self._segments: List[JournalSegment] = []
+        self._pending: Dict[str, Tuple[int, Dict]] = {}  # booking_id -> (segment seq, booking data)
+        self._queue: "queue.Queue[str]" = queue.Queue()
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._lock_file = None
+        self._stats = {"appended": 0, "replicated": 0, "replay_failures": 0, "flushes": 0, "recovered": 0}
+
+    # ---- lifecycle -------------------------------------------------
+
+    def open(self):
+        """
+        Recover existing segments, queue unreplicated bookings and start the background threads
+
+        Raises:
+            BlockingIOError: If another process has this journal directory open
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        self._lock_file = try_lock(os.path.join(self.directory, LOCK_FILE))
+        if self._lock_file is None:
+            raise BlockingIOError(f"Journal {self.directory} is in use by another process")
+        replicated = set()
+        bookings: Dict[str, Tuple[int, Dict]] = {}
+
+        names = sorted(n for n in os.listdir(self.directory) if n.startswith(SEGMENT_PREFIX) and n.endswith(SEGMENT_SUFFIX))
+        for name in names:
+            segment = JournalSegment(os.path.join(self.directory, name), self.segment_size)
+            for record in segment.records():
+                if record.get("op") == "booking":
+                    # A later version of a booking (e.g. cancelled) needs replicating again
+                    bookings[record["booking_id"]] = (segment.seq, record["data"])
+                    replicated.discard(record["booking_id"])
+                elif record.get("op") == "replicated":
+                    replicated.add(record["booking_id"])
+            self._segments.append(segment)
+
+        if not self._segments:
+            self._segments.append(self._new_segment(1))
+
+        self._pending = {bid: entry for bid, entry in bookings.items() if bid not in replicated}
+        for booking_id in self._pending:
+            self._queue.put(booking_id)
+        self._stats["recovered"] = len(self._pending)
+        if self._pending:
+            logger.info(f"📒 Recovered {len(self._pending)} unreplicated bookings from the journal")
+        self._compact()
+
+        self._stop.clear()
+        self._threads = [
+            threading.Thread(target=self._flush_loop, name="journal-flusher", daemon=True),
+            threading.Thread(target=self._replay_loop, name="journal-replayer", daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def drain(self, timeout: float = 10.0) -> int:
+        """
+        Replicate in-flight bookings, then stop the background threads
+
+        Returns:
+            Number of bookings still unreplicated (they are replayed on next startup)
+        """
+        deadline = time.monotonic() + timeout
+        while self._pending and time.monotonic() < deadline:
+            time.sleep(0.05)
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(max(0.0, deadline - time.monotonic()) + 1.0)
+        with self._lock:
+            for segment in self._segments:
+                segment.close()
+            self._segments = []
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+        remaining = len(self._pending)
+        if remaining:
+            logger.warning(f"⚠️ Journal closed with {remaining} unreplicated bookings; they will be replayed on startup")
+        return remaining
+
+    # ---- writes ----------------------------------------------------
+
+    def _new_segment(self, seq: int) -> JournalSegment:
+        path = os.path.join(self.directory, f"{SEGMENT_PREFIX}{seq:08d}{SEGMENT_SUFFIX}")
+        return JournalSegment(path, self.segment_size)
+
+    def _write(self, record: Dict) -> Tuple[int, int]:
+        """Append a record under the lock; returns (segment seq, write seq)"""
+        payload = json.dumps(record, separators=(",", ":")).encode("utf-8")
+        segment = self._segments[-1]
+        if not segment.fits(len(payload)):
+            segment.flush()
+            segment = self._new_segment(segment.seq + 1)
+            self._segments.append(segment)
+            if not segment.fits(len(payload)):
+                raise ValueError(f"Journal record of {len(payload)} bytes exceeds segment size")
+        segment.append(payload)
+        self._written_seq += 1
+        return segment.seq, self._written_seq
+
+    def append(self, booking_id: str, booking_data: Dict):
+        """Durably record a booking and queue it for replication"""
+        with self._lock:
+            segment_seq, write_seq = self._write({"op": "booking", "booking_id": booking_id, "data": booking_data})
+            self._pending[booking_id] = (segment_seq, booking_data)
+            # Group commit: wait for the flusher to msync a batch that includes this record
+            while self._flushed_seq < write_seq and not self._stop.is_set():
+                self._flushed.wait(self.flush_interval * 4)
+        self._stats["appended"] += 1
+        self._queue.put(booking_id)
+
+    def _flush_loop(self):
+        while not self._stop.is_set():
+            time.sleep(self.flush_interval)
+            with self._lock:
+                if self._flushed_seq < self._written_seq:
+                    self._segments[-1].flush()
+                    self._flushed_seq = self._written_seq
+                    self._stats["flushes"] += 1
+                    self._flushed.notify_all()
+
+    # ---- replication -----------------------------------------------
+
+    def _replay_loop(self):
+        while not self._stop.is_set():
+            try:
+                booking_id = self._queue.get(timeout=0.2)
+            except queue.Empty:
+                continue
+            entry = self._pending.get(booking_id)
+            if entry is None:
+                continue
+            try:
+                self.replicate(booking_id, entry[1])
+            except Exception as e:
+                self._stats["replay_failures"] += 1
+                logger.warning(f"⚠️ Replicating journaled booking {booking_id} failed, will retry: {str(e)}")
+                self._stop.wait(self.retry_delay)
+                self._queue.put(booking_id)
+                continue
+            with self._lock:
+                if self._pending.get(booking_id) is not entry:
+                    continue  # a newer version was appended meanwhile and is queued
+                self._write({"op": "replicated", "booking_id": booking_id})
+                self._pending.pop(booking_id, None)
+                self._compact()
+            self._stats["replicated"] += 1
+
+    def _compact(self):
+        """
+        Delete fully replicated segments from the front, up to the first one still needed
+
+        Only a prefix is deleted: a segment's 'replicated' markers may cover
+        bookings recorded in earlier segments, and deleting the markers while
+        those records survive would replay the bookings again on recovery.
+        """
+        live = {seq for seq, _ in self._pending.values()}
+        while len(self._segments) > 1 and self._segments[0].seq not in live:
+            segment = self._segments.pop(0)
+            segment.close()
+            os.remove(segment.path)
+
+    # ---- reads -----------------------------------------------------
+
+    def pending_slots(self, barber_name: str, date_str: str) -> List[str]:
+        """Time slots of journaled bookings for a barber/day not yet replicated"""
+        return [
+            data.get("time_slot") for _, data in list(self._pending.values())
+            if data.get("barber_name") == barber_name and data.get("date") == date_str
+            and data.get("status") != "cancelled"
+        ]
+
+    def pending_bookings_for_phone(self, phone: str) -> List[str]:
+        """Ids of journaled bookings for a phone not yet replicated"""
+        return [booking_id for booking_id, (_, data) in list(self._pending.items()) if data.get("phone") == phone]
+
+    def pending_booking(self, booking_id: str) -> Optional[Dict]:
+        """A journaled booking not yet replicated, if any"""
+        entry = self._pending.get(booking_id)
+        return dict(entry[1]) if entry else None
+
+    def stats(self) -> Dict:
+        return {
+            **self._stats,
+            "pending": len(self._pending),
+            "segments": len(self._segments)
+        }
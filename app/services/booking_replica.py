@@ -0,0 +1,201 @@
+import time
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from app.config import get_settings
+from app.services.firestore_simple import (
+    add_booking_listener,
+    get_firebase_client,
+    is_firebase_connected,
+    set_local_booked_slots
+)
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Seconds between checks of the listener's health and of the day rolling over
+CHECK_SECONDS = 30
+
+class BookingReplica:
+    """
+    In-process copy of the bookings in a rolling date window
+
+    Kept current by a Firestore `on_snapshot` listener (and by this
+    process's own bookings as they happen) and indexed by (barber, date),
+    so an availability read is a dict lookup. It answers only while the
+    listener is live and only for dates inside the window.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._bookings: Dict[str, Tuple[str, str]] = {}  # booking id -> (barber, date) of a confirmed booking
+        self._slots: Dict[Tuple[str, str], Dict[str, str]] = {}  # (barber, date) -> booking id -> time slot
+        self._watch = None
+        self._generation = 0
+        self.window: Tuple[str, str] = ("", "")
+        self.live = False
+        self.last_snapshot_at: Optional[float] = None
+        self.stats = {"snapshots": 0, "changes": 0, "subscriptions": 0, "served": 0, "fallbacks": 0}
+
+    def _remove(self, booking_id: str):
+        key = self._bookings.pop(booking_id, None)
+        if key is not None:
+            slots = self._slots.get(key)
+            if slots is not None:
+                slots.pop(booking_id, None)
+                if not slots:
+                    del self._slots[key]
+
+    def _apply(self, booking_id: str, booking: Optional[Dict]):
+        """Insert, update or remove one booking (lock held)"""
+        self._remove(booking_id)
+        if not booking or booking.get('status') == 'cancelled':
+            return
+        date_str = booking.get('date')
+        if not (self.window[0] <= (date_str or "") <= self.window[1]):
+            return
+        key = (booking.get('barber_name'), date_str)
+        self._bookings[booking_id] = key
+        self._slots.setdefault(key, {})[booking_id] = booking.get('time_slot')
+
+    def subscribe(self, client, days: int):
+        """(Re)subscribe to bookings from today through `days` - 1 days ahead"""
+        self.unsubscribe()
+        today = datetime.now()
+        window = (today.strftime("%Y-%m-%d"), (today + timedelta(days=days - 1)).strftime("%Y-%m-%d"))
+        with self._lock:
+            self._generation += 1
+            generation = self._generation
+            self.window = window
+            self.live = False
+            self._bookings.clear()
+            self._slots.clear()
+        query = client.collection('bookings').where('date', '>=', window[0]).where('date', '<=', window[1])
+        self._watch = query.on_snapshot(lambda docs, changes, read_time: self._on_snapshot(generation, changes))
+        self.stats["subscriptions"] += 1
+        logger.info(f"📡 Booking replica subscribed to {window[0]} .. {window[1]}")
+
+    def unsubscribe(self):
+        watch, self._watch = self._watch, None
+        with self._lock:
+            self.live = False
+        if watch is not None:
+            try:
+                watch.unsubscribe()
+            except Exception as e:
+                logger.warning(f"⚠️ Error closing booking listener: {str(e)}")
+
+    def _on_snapshot(self, generation: int, changes):
+        """Listener callback (runs on the Firestore watch thread); the first call carries every booking as ADDED"""
+        with self._lock:
+            if generation != self._generation:
+                return  # a listener that has since been replaced
+            for change in changes:
+                document = change.document
+                self._apply(document.id, None if change.type.name == 'REMOVED' else document.to_dict())
+            self.stats["snapshots"] += 1
+            self.stats["changes"] += len(changes)
+            self.last_snapshot_at = time.time()
+            if not self.live:
+                self.live = True
+                logger.info(f"✅ Booking replica live: {len(self._bookings)} bookings in {self.window[0]} .. {self.window[1]}")
+
+    def is_healthy(self) -> bool:
+        """Whether the listener stream is still open (a closed stream never calls back again)"""
+        return self._watch is not None and getattr(self._watch, "is_active", True)
+
+    def on_booking_event(self, event: str, booking_data: Dict):
+        """Apply this process's own bookings and cancellations before the listener echoes them"""
+        booking_id = booking_data.get('booking_id')
+        if not booking_id:
+            return
+        with self._lock:
+            if self.live:
+                self._apply(booking_id, booking_data if event == 'booked' else None)
+
+    def booked_slots(self, barber_name: str, date_str: str) -> Optional[List[str]]:
+        """Booked slots for a barber and date, or None when the replica can't answer"""
+        with self._lock:
+            # A stream that closed since its last snapshot misses every change after it
+            if not self.live or not self.is_healthy() or not (self.window[0] <= date_str <= self.window[1]):
+                self.stats["fallbacks"] += 1
+                return None
+            self.stats["served"] += 1
+            return list(self._slots.get((barber_name, date_str), {}).values())
+
+    def status(self) -> Dict:
+        with self._lock:
+            return {
+                "live": self.live,
+                "window": list(self.window),
+                "bookings": len(self._bookings),
+                "last_snapshot_age_seconds": round(time.time() - self.last_snapshot_at, 1) if self.last_snapshot_at else None,
+                **self.stats
+            }
+
+_replica: Optional[BookingReplica] = None
+_maintainer: Optional[threading.Thread] = None
+_stop_event = threading.Event()
+
+def _maintain(replica: BookingReplica, client):
+    """Resubscribe when the day rolls over (moving the window) or when the listener stream closes"""
+    while not _stop_event.wait(CHECK_SECONDS):
+        today = datetime.now().strftime("%Y-%m-%d")
+        if replica.window[0] == today and replica.is_healthy():
+            continue
+        reason = "day rolled over" if replica.window[0] != today else "listener closed"
+        logger.info(f"🔁 Resubscribing booking replica ({reason})")
+        try:
+            replica.subscribe(client, settings.BOOKING_REPLICA_DAYS)
+        except Exception as e:
+            # Reads fall back to the store until a later check succeeds
+            replica.unsubscribe()
+            logger.error(f"❌ Booking replica resubscribe failed: {str(e)}")
+
+def start_booking_replica() -> bool:
+    """
+    Start the realtime replica of upcoming bookings (Firebase Admin SDK only)
+
+    Availability reads for dates in the window are then served locally;
+    other dates, and all reads while the listener is down, go to the store.
+    """
+    global _replica, _maintainer
+    if not settings.BOOKING_REPLICA_ENABLED or _replica is not None:
+        return False
+    client = get_firebase_client() if is_firebase_connected() else None
+    if client is None or client == "REST_API":
+        logger.info("📭 Booking replica needs the Firebase Admin SDK - availability reads query the store")
+        return False
+
+    replica = BookingReplica()
+    try:
+        replica.subscribe(client, settings.BOOKING_REPLICA_DAYS)
+    except Exception as e:
+        logger.error(f"❌ Could not start the booking replica: {str(e)}")
+        return False
+    _replica = replica
+    add_booking_listener(replica.on_booking_event)
+    set_local_booked_slots(replica.booked_slots)
+    _stop_event.clear()
+    _maintainer = threading.Thread(target=_maintain, args=(replica, client), name="booking-replica", daemon=True)
+    _maintainer.start()
+    return True
+
+def stop_booking_replica():
+    """Close the listener; reads go back to the store"""
+    global _replica
+    _stop_event.set()
+    if _maintainer:
+        _maintainer.join(5.0)
+    set_local_booked_slots(None)
+    if _replica is not None:
+        _replica.unsubscribe()
+        _replica = None
+
+def get_booking_replica_stats() -> Dict:
+    """Get replica status and hit/fallback counters"""
+    if _replica is None:
+        return {"enabled": False}
+    return {"enabled": True, **_replica.status()}
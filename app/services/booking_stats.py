@@ -0,0 +1,306 @@
+import os
+import re
+import time
+import logging
+import threading
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from app.config import get_settings
+from app.services.file_lock import try_lock
+from app.services.firestore_simple import (
+    BOOKING_STATS_FIELDS,
+    get_all_barbers,
+    get_all_bookings,
+    get_service,
+    get_schedule,
+    get_booking_stats_shards,
+    increment_booking_stats,
+    add_booking_listener
+)
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+def _zero() -> Dict:
+    return {"bookings": 0, "minutes": 0, "revenue": 0.0}
+
+def _add(target: Dict, delta: Dict, sign: int = 1):
+    for field in BOOKING_STATS_FIELDS:
+        target[field] += sign * delta[field]
+
+class BookingAggregates:
+    """
+    Booking counts, occupied minutes and revenue per (date, barber, service)
+
+    Each change updates the cell and its per-day, per-day-per-barber and
+    per-day-per-service rollups. Any single-day query is then a dict
+    lookup, however many bookings exist.
+    """
+
+    def __init__(self):
+        self.cells: Dict[Tuple[str, str, str], Dict] = defaultdict(_zero)
+        self.by_day: Dict[str, Dict] = defaultdict(_zero)
+        self.by_day_barber: Dict[Tuple[str, str], Dict] = defaultdict(_zero)
+        self.by_day_service: Dict[Tuple[str, str], Dict] = defaultdict(_zero)
+        self.totals = _zero()
+
+    def apply(self, date_str: str, barber_name: str, service_id: str, delta: Dict, sign: int = 1):
+        _add(self.cells[(date_str, barber_name, service_id)], delta, sign)
+        _add(self.by_day[date_str], delta, sign)
+        _add(self.by_day_barber[(date_str, barber_name)], delta, sign)
+        _add(self.by_day_service[(date_str, service_id)], delta, sign)
+        _add(self.totals, delta, sign)
+
+    def day(self, date_str: str, barber_name: str = None, service_id: str = None) -> Dict:
+        """Totals for one day, optionally narrowed to a barber and/or service"""
+        if barber_name and service_id:
+            table, key = self.cells, (date_str, barber_name, service_id)
+        elif barber_name:
+            table, key = self.by_day_barber, (date_str, barber_name)
+        elif service_id:
+            table, key = self.by_day_service, (date_str, service_id)
+        else:
+            table, key = self.by_day, date_str
+        return dict(table[key]) if key in table else _zero()
+
+_aggregates = BookingAggregates()
+_lock = threading.Lock()
+_loaded = False
+_loaded_at = 0.0
+
+# Counter deltas not yet written to the store: counter key -> delta
+_pending: Dict[str, Dict] = {}
+# Backfill deltas not yet written, kept apart from _pending: while any remain
+# the backfill is retried from here and never rebuilt, so it can't be queued twice
+_backfill_pending: Dict[str, Dict] = {}
+_flusher: Optional[threading.Thread] = None
+_stop_event = threading.Event()
+_stats = {"events": 0, "flushes": 0, "flush_failures": 0, "backfilled": False}
+
+def counter_key(date_str: str, barber_name: str, service_id: str) -> str:
+    """Document id of a stats counter"""
+    return re.sub(r"[^A-Za-z0-9_-]", "-", f"{date_str}__{barber_name}__{service_id}")
+
+def _recorded(booking_data: Dict, field: str, cast) -> Optional[float]:
+    """A number recorded on the booking when it was made (REST-stored bookings hold it as a string)"""
+    try:
+        return cast(float(booking_data[field]))
+    except (KeyError, TypeError, ValueError):
+        return None
+
+def _booking_delta(booking_data: Dict) -> Dict:
+    """
+    Bookings, minutes and revenue contributed by one booking
+
+    Uses the price and duration recorded on the booking, so a cancellation
+    after a catalog change takes back exactly what the booking added. The
+    catalog is the fallback for bookings made before they were recorded.
+    """
+    minutes = _recorded(booking_data, 'duration', int)
+    revenue = _recorded(booking_data, 'price', float)
+    if minutes is None or revenue is None:
+        service = get_service(booking_data.get('service_id', ''))
+        if minutes is None:
+            minutes = service.duration if service else settings.SLOT_MINUTES
+        if revenue is None:
+            revenue = float(service.price) if service else 0.0
+    return {"bookings": 1, "minutes": minutes, "revenue": revenue}
+
+def _record(booking_data: Dict, sign: int):
+    """Apply a booking to the in-memory aggregates and queue the counter increment"""
+    date_str, barber_name, service_id = booking_data['date'], booking_data['barber_name'], booking_data['service_id']
+    delta = _booking_delta(booking_data)
+    key = counter_key(date_str, barber_name, service_id)
+    with _lock:
+        _aggregates.apply(date_str, barber_name, service_id, delta, sign)
+        pending = _pending.setdefault(key, {"date": date_str, "barber_name": barber_name, "service_id": service_id, **_zero()})
+        _add(pending, delta, sign)
+    _stats["events"] += 1
+
+def _on_booking_event(event: str, booking_data: Dict):
+    """Keep aggregates current as bookings are created or cancelled"""
+    _record(booking_data, 1 if event == 'booked' else -1)
+
+def _unwritten(deltas: Dict[str, Dict]) -> Dict[str, Dict]:
+    """Write counter deltas to the store; returns the ones that were not written"""
+    written = increment_booking_stats(deltas)
+    return dict(list(deltas.items())[written:])
+
+def flush_stats() -> int:
+    """
+    Write queued counter deltas, and any backfill still unwritten, to the store
+
+    Returns:
+        Number of counters written (deltas not written are kept for the next flush)
+    """
+    with _lock:
+        deltas = dict(_pending)
+        _pending.clear()
+        backfill = dict(_backfill_pending)
+    if not deltas and not backfill:
+        return 0
+    written = 0
+    failed = False
+    if backfill:
+        unwritten = _unwritten(backfill)
+        with _lock:
+            for key in backfill:
+                if key not in unwritten:
+                    _backfill_pending.pop(key, None)
+        written += len(backfill) - len(unwritten)
+        failed = bool(unwritten)
+    if deltas:
+        unwritten = _unwritten(deltas)
+        with _lock:
+            for key, delta in unwritten.items():
+                _add(_pending.setdefault(key, {**delta, **_zero()}), delta)
+        written += len(deltas) - len(unwritten)
+        failed = failed or bool(unwritten)
+    _stats["flush_failures" if failed else "flushes"] += 1
+    return written
+
+def _backfill(aggregates: BookingAggregates) -> Dict[str, Dict]:
+    """Count every booking into `aggregates`; returns the matching counter deltas"""
+    deltas: Dict[str, Dict] = {}
+    for booking in get_all_bookings():
+        if booking.get('status', 'confirmed') == 'cancelled':
+            continue
+        date_str, barber_name, service_id = booking['date'], booking['barber_name'], booking['service_id']
+        delta = _booking_delta(booking)
+        aggregates.apply(date_str, barber_name, service_id, delta)
+        counter = deltas.setdefault(
+            counter_key(date_str, barber_name, service_id),
+            {"date": date_str, "barber_name": barber_name, "service_id": service_id, **_zero()}
+        )
+        _add(counter, delta)
+    return deltas
+
+def load_booking_stats() -> Dict:
+    """
+    Load aggregates from the sharded counters
+
+    If there are no counters yet but bookings exist, the counters are
+    backfilled once from a full bookings scan. Only the worker holding the
+    backfill lock does this, so pre-forked workers don't count bookings twice.
+    Backfill counters that could not be written are retried by flush_stats.
+    """
+    global _aggregates, _loaded, _loaded_at
+    shards = get_booking_stats_shards()
+    if shards is None:
+        return {"loaded": False}
+    aggregates = BookingAggregates()
+    for shard in shards:
+        delta = {field: shard.get(field, 0) or 0 for field in BOOKING_STATS_FIELDS}
+        aggregates.apply(shard['date'], shard['barber_name'], shard['service_id'], delta)
+
+    backfill: Dict[str, Dict] = {}
+    with _lock:
+        backfill_pending = bool(_backfill_pending)
+    if not shards and not backfill_pending:
+        lock_file = try_lock(os.path.join(settings.WORKER_LOCK_DIR, "booking_stats_backfill.lock"))
+        if lock_file:
+            try:
+                backfill = _backfill(aggregates)
+                unwritten = _unwritten(backfill) if backfill else {}
+                with _lock:
+                    _backfill_pending.update(unwritten)
+            finally:
+                lock_file.close()
+            if backfill:
+                _stats["backfilled"] = True
+                logger.info(f"📊 Booking stats backfilled into {len(backfill)} counters")
+
+    with _lock:
+        # Keep counts that are queued but not yet in the store (events recorded while loading, an earlier backfill)
+        for deltas in (_backfill_pending, _pending):
+            for key, delta in deltas.items():
+                if key not in backfill:
+                    aggregates.apply(delta['date'], delta['barber_name'], delta['service_id'], delta)
+        _aggregates = aggregates
+        _loaded = True
+        _loaded_at = time.monotonic()
+    logger.info(f"📊 Booking stats loaded from {len(shards)} counter shards")
+    return {"counter_shards": len(shards), "backfilled_counters": len(backfill)}
+
+def _flush_loop():
+    while not _stop_event.wait(settings.BOOKING_STATS_FLUSH_INTERVAL):
+        flush_stats()
+        # Other workers write counters too; pick their bookings up periodically
+        refresh = settings.BOOKING_STATS_REFRESH_INTERVAL
+        if refresh and _loaded and time.monotonic() - _loaded_at > refresh:
+            load_booking_stats()
+
+def start_stats_flusher():
+    """Register the booking listener and start writing counters in the background"""
+    global _flusher
+    if _flusher and _flusher.is_alive():
+        return
+    add_booking_listener(_on_booking_event)
+    _stop_event.clear()
+    _flusher = threading.Thread(target=_flush_loop, name="booking-stats", daemon=True)
+    _flusher.start()
+
+def stop_stats_flusher():
+    """Stop the background flusher and write what is left"""
+    _stop_event.set()
+    if _flusher:
+        _flusher.join(5.0)
+    flush_stats()
+
+def _with_utilization(totals: Dict, capacity: int) -> Dict:
+    return {
+        **totals,
+        "revenue": round(totals["revenue"], 2),
+        "utilization": round(totals["minutes"] / capacity, 4) if capacity else None
+    }
+
+def query_stats(start_date: str, end_date: str = None, barber_name: str = None, service_id: str = None) -> Dict:
+    """
+    Bookings, minutes, revenue and utilization over a date range
+
+    Each day costs a few dict lookups, so the cost depends on the range
+    length and the number of barbers, never on the number of bookings.
+    """
+    end_date = end_date or start_date
+    start = datetime.strptime(start_date, "%Y-%m-%d")
+    days = [(start + timedelta(days=i)).strftime("%Y-%m-%d") for i in range((datetime.strptime(end_date, "%Y-%m-%d") - start).days + 1)]
+    barbers = [barber_name] if barber_name else [b.name for b in get_all_barbers()]
+    schedule = get_schedule()
+
+    totals = _zero()
+    by_day: List[Dict] = []
+    by_barber = {name: _zero() for name in barbers}
+    # Scheduled minutes, so days off and breaks don't count as idle capacity
+    capacity = {name: 0 for name in barbers}
+    with _lock:
+        for day in days:
+            day_totals = _aggregates.day(day, barber_name, service_id)
+            _add(totals, day_totals)
+            day_capacity = 0
+            for name in barbers:
+                _add(by_barber[name], _aggregates.day(day, name, service_id))
+                minutes = schedule.capacity_minutes(name, day)
+                capacity[name] += minutes
+                day_capacity += minutes
+            by_day.append({"date": day, **_with_utilization(day_totals, day_capacity)})
+
+    return {
+        "start_date": start_date,
+        "end_date": end_date,
+        "barber": barber_name,
+        "service": service_id,
+        "totals": _with_utilization(totals, sum(capacity.values())),
+        "by_day": by_day,
+        "by_barber": {name: _with_utilization(t, capacity[name]) for name, t in by_barber.items()},
+        "all_time": _with_utilization(dict(_aggregates.totals), 0),
+        "loaded": _loaded
+    }
+
+def get_booking_stats_status() -> Dict:
+    """Get booking stats bookkeeping counters"""
+    with _lock:
+        pending = len(_pending)
+        backfill_pending = len(_backfill_pending)
+    return {**_stats, "loaded": _loaded, "pending_counters": pending, "pending_backfill_counters": backfill_pending}
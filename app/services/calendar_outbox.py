@@ -0,0 +1,240 @@
+import time
+import random
+import hashlib
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from app.config import get_settings
+from app.services.file_lock import try_lock
+from app.services.tracing import current_span, record_span
+from app.services.calendar_service import get_calendar_service, build_event_body, invalidate_event_days
+from app.services.firestore_simple import (
+    save_calendar_outbox_entry,
+    get_pending_calendar_outbox_entries,
+    update_booking
+)
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Longest wait between retries of a single entry
+MAX_BACKOFF_SECONDS = 3600
+
+# Google Calendar accepts at most 50 calls in one batch HTTP request
+CALENDAR_BATCH_MAX_REQUESTS = 50
+
+_worker_thread: Optional[threading.Thread] = None
+_stop_event = threading.Event()
+
+_stats = {
+    "enqueued": 0,
+    "batches": 0,
+    "created": 0,
+    "retried": 0,
+    "failed": 0,
+    "leader": False,  # whether this process is the one draining
+    "last_drain_at": None
+}
+
+def calendar_event_id(booking_id: str) -> str:
+    """
+    Derive a stable Calendar event id from a booking id
+
+    Calendar accepts client-chosen ids made of base32hex characters (0-9, a-v),
+    so a hex digest works. A retried insert of an event that was already
+    created then fails with 409 instead of creating a duplicate.
+    """
+    return hashlib.sha1(booking_id.encode("utf-8")).hexdigest()
+
+def build_outbox_entry(booking_id: str, booking_data: Dict, duration_minutes: int, attendees: List[str] = None) -> Dict:
+    """
+    Build the calendar outbox entry mirroring a booking
+
+    book_slot writes it in the same batched commit as the booking (or
+    journals it with the booking for the replayer to write), so a saved
+    booking always has its outbox entry and confirmation latency does not
+    depend on Google Calendar.
+    """
+    start = datetime.strptime(f"{booking_data['date']} {booking_data['time_slot']}", "%Y-%m-%d %I:%M %p")
+    entry = {
+        "booking_id": booking_id,
+        "summary": f"{booking_data['service_name']} - {booking_data.get('contact_name', 'Customer')}",
+        "description": (
+            f"Barber: {booking_data['barber_name']}\n"
+            f"Phone: {booking_data.get('phone', '')}\n"
+            f"Booking ID: {booking_id}"
+        ),
+        "start": start.isoformat(),
+        "duration_minutes": duration_minutes,
+        "attendees": attendees or [],
+        "status": "pending",
+        "attempts": 0,
+        "next_attempt_at": 0.0,
+        "created_at": datetime.now().isoformat(),
+        "last_error": None
+    }
+    # The worker records its calendar call into the booking request's trace
+    trace = current_span()
+    if trace:
+        entry.update({"trace_id": trace.trace_id, "parent_span_id": trace.span_id})
+    _stats["enqueued"] += 1
+    return entry
+
+def _batch_size() -> int:
+    """Entries per drain, clamped to Google's limit on requests per batch HTTP request"""
+    return max(1, min(settings.CALENDAR_OUTBOX_BATCH_SIZE, CALENDAR_BATCH_MAX_REQUESTS))
+
+def _backoff_seconds(attempts: int) -> float:
+    """Exponential backoff with full jitter"""
+    ceiling = min(MAX_BACKOFF_SECONDS, settings.CALENDAR_OUTBOX_BACKOFF_BASE * (2 ** (attempts - 1)))
+    return random.uniform(ceiling / 2, ceiling)
+
+def _record_success(entry: Dict, event_id: str):
+    """Mark an outbox entry as done and record the event id on its booking"""
+    entry.update({"status": "done", "event_id": event_id, "last_error": None})
+    save_calendar_outbox_entry(entry["booking_id"], entry)
+    update_booking(entry["booking_id"], {"calendar_event_id": event_id})
+    invalidate_event_days(datetime.fromisoformat(entry["start"]), entry.get("attendees") or None)
+    _stats["created"] += 1
+
+def _record_failure(entry: Dict, error: str):
+    """Schedule a retry for an outbox entry, or give up after the last attempt"""
+    entry["attempts"] = entry.get("attempts", 0) + 1
+    entry["last_error"] = error
+    if entry["attempts"] >= settings.CALENDAR_OUTBOX_MAX_ATTEMPTS:
+        entry["status"] = "failed"
+        _stats["failed"] += 1
+        logger.error(f"❌ Giving up on calendar event for {entry['booking_id']} after {entry['attempts']} attempts: {error}")
+    else:
+        entry["next_attempt_at"] = time.time() + _backoff_seconds(entry["attempts"])
+        _stats["retried"] += 1
+        logger.warning(f"⚠️ Calendar event for {entry['booking_id']} failed (attempt {entry['attempts']}), retrying later: {error}")
+    save_calendar_outbox_entry(entry["booking_id"], entry)
+
+def _record_call(entry: Dict, started_ns: int, error: Optional[str], batch_size: int):
+    """Record the batched insert as a span of the trace that queued the entry"""
+    record_span(
+        "calendar.insert_event", entry.get("trace_id"), entry.get("parent_span_id"), started_ns, time.time_ns(),
+        error=error, booking_id=entry["booking_id"], attempt=entry.get("attempts", 0) + 1, batch_size=batch_size
+    )
+
+def drain_outbox_once() -> int:
+    """
+    Send one batch of pending outbox entries to Google Calendar
+
+    Returns:
+        Number of entries processed
+    """
+    service = get_calendar_service()
+    if not service:
+        return 0
+
+    entries = get_pending_calendar_outbox_entries(_batch_size())
+    if not entries:
+        return 0
+
+    for entry in entries:
+        entry.pop("id", None)
+
+    responses = {}
+
+    def on_response(request_id, response, exception):
+        responses[request_id] = (response, exception)
+
+    batch = service.new_batch_http_request(callback=on_response)
+    for entry in entries:
+        body = build_event_body(
+            entry["summary"],
+            datetime.fromisoformat(entry["start"]),
+            entry["duration_minutes"],
+            entry.get("description", ""),
+            entry.get("attendees") or None
+        )
+        body["id"] = calendar_event_id(entry["booking_id"])
+        batch.add(
+            service.events().insert(calendarId='primary', body=body, sendUpdates='all'),
+            request_id=entry["booking_id"]
+        )
+
+    started_ns = time.time_ns()
+    try:
+        batch.execute()
+    except Exception as e:
+        # The whole batch request failed (network, auth); every entry is retried
+        logger.error(f"❌ Calendar batch request failed: {str(e)}")
+        for entry in entries:
+            _record_call(entry, started_ns, str(e), len(entries))
+            _record_failure(entry, str(e))
+        return len(entries)
+
+    _stats["batches"] += 1
+    for entry in entries:
+        response, exception = responses.get(entry["booking_id"], (None, Exception("No response in batch")))
+        _record_call(entry, started_ns, str(exception) if exception is not None else None, len(entries))
+        if exception is None:
+            _record_success(entry, response.get("id"))
+        elif getattr(getattr(exception, "resp", None), "status", None) == 409:
+            # Already created by an earlier attempt whose result was lost
+            _record_success(entry, calendar_event_id(entry["booking_id"]))
+        else:
+            _record_failure(entry, str(exception))
+
+    logger.info(f"📅 Calendar outbox batch processed: {len(entries)} entries")
+    return len(entries)
+
+def _worker_loop(lock_path: Optional[str] = None):
+    """Drain the outbox until stopped; with a lock path, only while holding that lock"""
+    logger.info("📅 Calendar outbox worker started")
+    lock_file = None
+    _stats["leader"] = lock_path is None
+    while not _stop_event.is_set():
+        if lock_path and lock_file is None:
+            # Another worker process is draining; check again next interval
+            lock_file = try_lock(lock_path)
+            if lock_file is None:
+                _stop_event.wait(settings.CALENDAR_OUTBOX_POLL_INTERVAL)
+                continue
+            _stats["leader"] = True
+            logger.info("📅 This process now drains the calendar outbox")
+        try:
+            processed = drain_outbox_once()
+            _stats["last_drain_at"] = datetime.now().isoformat()
+        except Exception as e:
+            logger.error(f"❌ Calendar outbox worker error: {str(e)}")
+            processed = 0
+        # A full batch means there is probably more waiting, so go again right away
+        if processed < _batch_size():
+            _stop_event.wait(settings.CALENDAR_OUTBOX_POLL_INTERVAL)
+    if lock_file is not None:
+        lock_file.close()
+        _stats["leader"] = False
+    logger.info("📅 Calendar outbox worker stopped")
+
+def start_outbox_worker(lock_path: Optional[str] = None):
+    """
+    Start the background outbox worker (no-op if already running)
+
+    Args:
+        lock_path: When several worker processes share the outbox, only the one holding this file lock drains it
+    """
+    global _worker_thread
+    if _worker_thread and _worker_thread.is_alive():
+        return
+    _stop_event.clear()
+    _worker_thread = threading.Thread(target=_worker_loop, args=(lock_path,), name="calendar-outbox", daemon=True)
+    _worker_thread.start()
+
+def stop_outbox_worker(timeout: float = 10.0):
+    """Stop the background outbox worker"""
+    _stop_event.set()
+    if _worker_thread:
+        _worker_thread.join(timeout)
+
+def get_outbox_stats() -> Dict:
+    """Get calendar outbox worker statistics"""
+    return {
+        **_stats,
+        "worker_running": bool(_worker_thread and _worker_thread.is_alive())
+    }
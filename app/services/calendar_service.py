@@ -1,16 +1,28 @@
-from google.oauth2 import service_account
-from googleapiclient.discovery import build
 from datetime import datetime, timedelta
+import threading
+import time
 import pytz
 from app.config import get_settings
+from app.services.firestore_simple import get_all_barbers, get_schedule
+from app.services.tracing import span, traced
 import logging
+from typing import Dict, List, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
 def initialize_calendar_service():
     """Initialize Google Calendar service with credentials"""
+    if settings.GOOGLE_CALENDAR_LOCAL_STUB:
+        from app.services.calendar_stub import LocalCalendarService
+        logger.info("Using the in-memory local calendar instead of Google Calendar")
+        return LocalCalendarService()
+
     try:
+        # Heavy Google client imports are deferred until the service is first needed
+        from google.oauth2 import service_account
+        from googleapiclient.discovery import build
+        
         credentials_dict = settings.get_calendar_credentials()
         if not credentials_dict:
             logger.error("No Google Calendar credentials found")
@@ -24,31 +36,216 @@ def initialize_calendar_service():
             scopes=SCOPES
         )
         
-        service = build('calendar', 'v3', credentials=credentials)
+        # Use the discovery document bundled with the client library instead of fetching it
+        service = build(
+            'calendar', 'v3',
+            credentials=credentials,
+            static_discovery=True,
+            cache_discovery=False
+        )
         logger.info("Google Calendar service initialized successfully")
         return service
     except Exception as e:
         logger.error(f"Error initializing Google Calendar service: {str(e)}")
         return None
 
-calendar_service = initialize_calendar_service()
+# Google Calendar client, created lazily by get_calendar_service()
+calendar_service = None
+_calendar_service_initialized = False
+_calendar_service_lock = threading.Lock()
+
+def get_calendar_service():
+    """Get the Google Calendar client, initializing it on first use"""
+    global calendar_service, _calendar_service_initialized
+    if not _calendar_service_initialized:
+        with _calendar_service_lock:
+            if not _calendar_service_initialized:
+                calendar_service = initialize_calendar_service()
+                _calendar_service_initialized = True
+    return calendar_service
+
+# Free/busy requests accept at most 50 calendars each
+FREEBUSY_MAX_CALENDARS = 50
+
+# Busy interval cache: (calendar_id, YYYY-MM-DD) -> (expires_at, [(start, end), ...])
+_busy_cache: Dict[Tuple[str, str], Tuple[float, List[Tuple[datetime, datetime]]]] = {}
+_busy_cache_lock = threading.Lock()
+
+def set_calendar_service(service):
+    """Replace the Google Calendar client (e.g. with a local stub for testing)"""
+    global calendar_service, _calendar_service_initialized
+    calendar_service = service
+    _calendar_service_initialized = True
+    invalidate_busy_cache()
+
+def invalidate_busy_cache(calendar_id: str = None, date_str: str = None):
+    """Drop cached busy intervals for a calendar/day, a whole calendar, or everything"""
+    with _busy_cache_lock:
+        if calendar_id is None and date_str is None:
+            _busy_cache.clear()
+            return
+        for key in list(_busy_cache):
+            if (calendar_id is None or key[0] == calendar_id) and (date_str is None or key[1] == date_str):
+                del _busy_cache[key]
+
+def get_busy_cache_stats() -> Dict:
+    """Get busy interval cache statistics"""
+    now = time.monotonic()
+    with _busy_cache_lock:
+        live = sum(1 for expires_at, _ in _busy_cache.values() if expires_at > now)
+        return {
+            "entries": len(_busy_cache),
+            "live_entries": live,
+            "ttl_seconds": settings.GOOGLE_CALENDAR_CACHE_TTL
+        }
+
+def _parse_rfc3339(value: str) -> datetime:
+    """Parse an RFC 3339 timestamp as returned by the Calendar API"""
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+def _scheduled_slots(day: datetime, tz, barber_email: str = None) -> List[Tuple[str, datetime]]:
+    """Get (label, start) for each slot the barber with this calendar (or the salon) works on a day"""
+    barber_name = next((b.name for b in get_all_barbers() if barber_email and b.email == barber_email), None)
+    schedule = get_schedule()
+    midnight = datetime.combine(day.date(), datetime.min.time())
+    return [
+        (label, tz.localize(midnight + timedelta(minutes=schedule.minute_of[label])))
+        for label in schedule.slots_for(barber_name, day.strftime("%Y-%m-%d"))
+    ]
+
+@traced("calendar.freebusy")
+def fetch_busy_intervals(calendar_ids: List[str], start_date: datetime, days: int = None) -> Dict[str, Dict[str, list]]:
+    """
+    Fetch busy intervals for many calendars over a multi-day window
+    
+    Issues one free/busy request per 50 calendars and stores the result
+    in the busy cache, one entry per (calendar, day).
+    
+    Args:
+        calendar_ids: Calendars to query (barber emails or 'primary')
+        start_date: First day of the window
+        days: Number of days in the window (defaults to settings)
+    
+    Returns:
+        Dict of calendar_id -> {YYYY-MM-DD: [(start, end), ...]}
+    """
+    calendar_service = get_calendar_service()
+    if not calendar_service:
+        logger.error("Google Calendar service not initialized")
+        return {}
+
+    days = days or settings.GOOGLE_CALENDAR_FREEBUSY_DAYS
+    tz = pytz.timezone(settings.GOOGLE_CALENDAR_TIMEZONE)
+    window_days = [start_date + timedelta(days=i) for i in range(days)]
+    time_min = tz.localize(datetime.combine(window_days[0], datetime.min.time()))
+    time_max = time_min + timedelta(days=days)
+
+    result: Dict[str, Dict[str, list]] = {}
+    calendar_ids = list(dict.fromkeys(calendar_ids))
+    for i in range(0, len(calendar_ids), FREEBUSY_MAX_CALENDARS):
+        chunk = calendar_ids[i:i + FREEBUSY_MAX_CALENDARS]
+        logger.info(f"Querying free/busy for {len(chunk)} calendars over {days} days")
+        response = calendar_service.freebusy().query(body={
+            'timeMin': time_min.isoformat(),
+            'timeMax': time_max.isoformat(),
+            'timeZone': settings.GOOGLE_CALENDAR_TIMEZONE,
+            'items': [{'id': calendar_id} for calendar_id in chunk]
+        }).execute()
+
+        calendars = response.get('calendars', {})
+        for calendar_id in chunk:
+            calendar_data = calendars.get(calendar_id, {})
+            if calendar_data.get('errors'):
+                # Don't cache calendars the API could not answer for
+                logger.warning(f"Free/busy errors for {calendar_id}: {calendar_data['errors']}")
+                continue
+
+            intervals = [
+                (_parse_rfc3339(busy['start']), _parse_rfc3339(busy['end']))
+                for busy in calendar_data.get('busy', [])
+            ]
+
+            # Split the window into per-day buckets so each day is cached independently
+            per_day = {}
+            for day in window_days:
+                day_start = tz.localize(datetime.combine(day, datetime.min.time()))
+                day_end = day_start + timedelta(days=1)
+                per_day[day.strftime("%Y-%m-%d")] = [
+                    (start, end) for start, end in intervals
+                    if start < day_end and end > day_start
+                ]
+            result[calendar_id] = per_day
+
+    expires_at = time.monotonic() + settings.GOOGLE_CALENDAR_CACHE_TTL
+    with _busy_cache_lock:
+        for calendar_id, per_day in result.items():
+            for date_str, intervals in per_day.items():
+                _busy_cache[(calendar_id, date_str)] = (expires_at, intervals)
+
+    return result
+
+def get_busy_intervals(calendar_id: str, date: datetime) -> Optional[List[Tuple[datetime, datetime]]]:
+    """Get busy intervals for a calendar/day, fetching the whole window on a cache miss"""
+    date_str = date.strftime("%Y-%m-%d")
+    with span("cache.busy_intervals", calendar=calendar_id, date=date_str) as lookup:
+        with _busy_cache_lock:
+            cached = _busy_cache.get((calendar_id, date_str))
+        hit = cached is not None and cached[0] > time.monotonic()
+        if lookup:
+            lookup.set_attribute("hit", hit)
+    if hit:
+        return cached[1]
+
+    fetched = prefetch_busy_intervals(date, calendar_ids=[calendar_id])
+    return fetched.get(calendar_id, {}).get(date_str)
+
+def barber_calendar_ids() -> List[str]:
+    """Get the salon's primary calendar and every barber's calendar"""
+    return ['primary'] + [b.email for b in get_all_barbers() if b.email]
+
+def prefetch_busy_intervals(start_date: datetime = None, days: int = None, calendar_ids: List[str] = None) -> Dict[str, Dict[str, list]]:
+    """
+    Fill the busy cache for every barber calendar over a window in one free/busy request
+    
+    A cache miss for one barber fetches all of them, so the lookups for the
+    other barbers that usually follow (e.g. "any stylist") are cache hits.
+    
+    Args:
+        start_date: First day of the window (defaults to today)
+        days: Number of days in the window (defaults to settings)
+        calendar_ids: Calendars to fetch as well as the barbers'
+    """
+    return fetch_busy_intervals(barber_calendar_ids() + list(calendar_ids or []), start_date or datetime.now(), days)
+
+def _free_slots(slots: List[Tuple[str, datetime]], busy: list, duration_minutes: int) -> List[str]:
+    """Get the scheduled slots whose appointment wouldn't overlap any busy interval"""
+    available_slots = []
+    for label, slot_start in slots:
+        slot_end = slot_start + timedelta(minutes=duration_minutes)
+        if all(slot_end <= busy_start or slot_start >= busy_end for busy_start, busy_end in busy):
+            available_slots.append(label)
+    return available_slots
 
 def get_available_slots(
-    barber_email: str = None,  # This parameter is now optional and unused
+    barber_email: str = None,
     date: datetime = None,
     duration_minutes: int = 30
 ) -> list:
     """
     Get available time slots from the primary calendar
     
+    In free/busy mode (GOOGLE_CALENDAR_USE_FREEBUSY) the barber's calendar
+    is read from the busy cache, which is filled a multi-day window at a time.
+    
     Args:
-        barber_email: (Deprecated) Not used anymore as we use primary calendar
+        barber_email: Calendar to check in free/busy mode (defaults to primary)
         date: Date to check (defaults to today)
         duration_minutes: Duration of the appointment
     
     Returns:
         List of available datetime slots
     """
+    calendar_service = get_calendar_service()
     if not calendar_service:
         logger.error("Google Calendar service not initialized")
         return []
@@ -61,9 +258,20 @@ def get_available_slots(
         # Get timezone
         tz = pytz.timezone(settings.GOOGLE_CALENDAR_TIMEZONE)
         
-        # Set up time bounds for the day (9 AM to 5 PM)
-        start_time = tz.localize(datetime.combine(date, datetime.strptime("09:00", "%H:%M").time()))
-        end_time = tz.localize(datetime.combine(date, datetime.strptime("17:00", "%H:%M").time()))
+        # Slots from the compiled schedule (none on days off, closures or outside business hours)
+        slots = _scheduled_slots(date, tz, barber_email)
+        if not slots:
+            return []
+        start_time = slots[0][1]
+        end_time = slots[-1][1] + timedelta(minutes=max(duration_minutes, settings.SLOT_MINUTES))
+        
+        if settings.GOOGLE_CALENDAR_USE_FREEBUSY:
+            busy = get_busy_intervals(barber_email or 'primary', date)
+            if busy is None:
+                return []
+            available_slots = _free_slots(slots, busy, duration_minutes)
+            logger.info(f"Found {len(available_slots)} available slots (free/busy)")
+            return available_slots
         
         logger.info(f"Checking availability between {start_time} and {end_time}")
         
@@ -79,30 +287,16 @@ def get_available_slots(
         events = events_result.get('items', [])
         logger.info(f"Found {len(events)} existing events")
         
-        # Generate all possible 30-minute slots
-        all_slots = []
-        current_slot = start_time
-        while current_slot < end_time:
-            all_slots.append(current_slot)
-            current_slot += timedelta(minutes=30)
+        busy = [
+            (
+                datetime.fromisoformat(event['start'].get('dateTime', event['start'].get('date'))),
+                datetime.fromisoformat(event['end'].get('dateTime', event['end'].get('date')))
+            )
+            for event in events
+        ]
         
         # Remove slots that overlap with events
-        available_slots = []
-        for slot in all_slots:
-            slot_end = slot + timedelta(minutes=duration_minutes)
-            is_available = True
-            
-            for event in events:
-                event_start = datetime.fromisoformat(event['start'].get('dateTime', event['start'].get('date')))
-                event_end = datetime.fromisoformat(event['end'].get('dateTime', event['end'].get('date')))
-                
-                # Check if slot overlaps with event
-                if not (slot_end <= event_start or slot >= event_end):
-                    is_available = False
-                    break
-            
-            if is_available:
-                available_slots.append(slot.strftime("%I:%M %p"))  # Format as "HH:MM AM/PM"
+        available_slots = _free_slots(slots, busy, duration_minutes)
         
         logger.info(f"Found {len(available_slots)} available slots")
         return available_slots
@@ -111,6 +305,60 @@ def get_available_slots(
         logger.error(f"Error getting available slots: {str(e)}")
         return []
 
+def build_event_body(
+    summary: str,
+    start_time: datetime,
+    duration_minutes: int,
+    description: str = "",
+    attendees: list = None,
+    timezone: str = None
+) -> dict:
+    """Build the Calendar API event body for an appointment"""
+    # Use provided timezone or default from settings
+    tz = timezone or settings.GOOGLE_CALENDAR_TIMEZONE
+    timezone = pytz.timezone(tz)
+    
+    # Convert start_time to timezone if it's naive
+    if start_time.tzinfo is None:
+        start_time = timezone.localize(start_time)
+    
+    # Calculate end time
+    end_time = start_time + timedelta(minutes=duration_minutes)
+    
+    # Prepare attendees list
+    event_attendees = []
+    if attendees:
+        event_attendees = [{'email': email} for email in attendees]
+    
+    return {
+        'summary': summary,
+        'description': description,
+        'start': {
+            'dateTime': start_time.isoformat(),
+            'timeZone': tz,
+        },
+        'end': {
+            'dateTime': end_time.isoformat(),
+            'timeZone': tz,
+        },
+        'attendees': event_attendees,
+        'reminders': {
+            'useDefault': False,
+            'overrides': [
+                {'method': 'email', 'minutes': 24 * 60},
+                {'method': 'popup', 'minutes': 30},
+            ],
+        },
+    }
+
+def invalidate_event_days(start_time: datetime, attendees: list = None):
+    """Drop cached busy intervals for the day of a newly created event"""
+    # Attendee calendars (barbers) see the event too, so drop their cached day as well
+    event_date = start_time.strftime("%Y-%m-%d")
+    for calendar_id in ['primary'] + (attendees or []):
+        invalidate_busy_cache(calendar_id, event_date)
+
+@traced("calendar.create_event")
 def create_calendar_event(
     summary: str,
     start_time: datetime,
@@ -133,6 +381,7 @@ def create_calendar_event(
     Returns:
         Dict with status and event details
     """
+    calendar_service = get_calendar_service()
     if not calendar_service:
         logger.error("Google Calendar service not initialized. Please check credentials.")
         return {
@@ -141,42 +390,7 @@ def create_calendar_event(
         }
 
     try:
-        # Use provided timezone or default from settings
-        tz = timezone or settings.GOOGLE_CALENDAR_TIMEZONE
-        timezone = pytz.timezone(tz)
-        
-        # Convert start_time to timezone if it's naive
-        if start_time.tzinfo is None:
-            start_time = timezone.localize(start_time)
-        
-        # Calculate end time
-        end_time = start_time + timedelta(minutes=duration_minutes)
-        
-        # Prepare attendees list
-        event_attendees = []
-        if attendees:
-            event_attendees = [{'email': email} for email in attendees]
-        
-        event = {
-            'summary': summary,
-            'description': description,
-            'start': {
-                'dateTime': start_time.isoformat(),
-                'timeZone': tz,
-            },
-            'end': {
-                'dateTime': end_time.isoformat(),
-                'timeZone': tz,
-            },
-            'attendees': event_attendees,
-            'reminders': {
-                'useDefault': False,
-                'overrides': [
-                    {'method': 'email', 'minutes': 24 * 60},
-                    {'method': 'popup', 'minutes': 30},
-                ],
-            },
-        }
+        event = build_event_body(summary, start_time, duration_minutes, description, attendees, timezone)
         
         # Create the event in primary calendar
         event = calendar_service.events().insert(
@@ -186,6 +400,7 @@ def create_calendar_event(
         ).execute()
         
         logger.info(f"Calendar event created: {event.get('htmlLink')}")
+        invalidate_event_days(start_time, attendees)
         return {
             'status': 'success',
             'event_id': event.get('id'),
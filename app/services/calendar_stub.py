@@ -0,0 +1,124 @@
+import threading
+from collections import Counter
+from datetime import datetime
+from types import SimpleNamespace
+from typing import Callable, Dict, List, Optional
+
+class StubHttpError(Exception):
+    """Error raised like googleapiclient's HttpError (the status is on `resp.status`)"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.resp = SimpleNamespace(status=status)
+
+class _Request:
+    """A prepared call; runs on execute() like a googleapiclient HttpRequest"""
+
+    def __init__(self, run: Callable[[], Dict]):
+        self._run = run
+
+    def execute(self) -> Dict:
+        return self._run()
+
+class _Batch:
+    """Batch of prepared calls, reported to the callback one by one"""
+
+    def __init__(self, callback):
+        self._callback = callback
+        self._requests: List[tuple] = []
+
+    def add(self, request: _Request, request_id: str = None):
+        self._requests.append((request_id or str(len(self._requests)), request))
+
+    def execute(self):
+        for request_id, request in self._requests:
+            try:
+                response, exception = request.execute(), None
+            except Exception as e:
+                response, exception = None, e
+            if self._callback:
+                self._callback(request_id, response, exception)
+
+def _parse(value: str) -> datetime:
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+class LocalCalendarService:
+    """
+    In-memory stand-in for the Google Calendar v3 client
+
+    Supports the calls this app makes: freebusy().query(), events().insert()
+    and events().list(), and new_batch_http_request(). An inserted event
+    shows up on the primary calendar and on each attendee's calendar, as it
+    does on Google. `calls` counts requests by kind, so tests can check how
+    many round trips a code path made.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._events: Dict[str, Dict[str, Dict]] = {}  # calendar id -> event id -> event body
+        self.calls: Counter = Counter()
+
+    def add_busy(self, calendar_id: str, start: datetime, end: datetime, summary: str = "Busy") -> Dict:
+        """Put an event directly on one calendar"""
+        with self._lock:
+            events = self._events.setdefault(calendar_id, {})
+            event = {
+                "id": f"local{len(events)}",
+                "summary": summary,
+                "start": {"dateTime": start.isoformat()},
+                "end": {"dateTime": end.isoformat()}
+            }
+            events[event["id"]] = event
+        return event
+
+    def freebusy(self):
+        return SimpleNamespace(query=self._freebusy_query)
+
+    def events(self):
+        return SimpleNamespace(insert=self._insert, list=self._list)
+
+    def new_batch_http_request(self, callback=None) -> _Batch:
+        return _Batch(callback)
+
+    def _busy(self, calendar_id: str, time_min: datetime, time_max: datetime) -> List[Dict]:
+        with self._lock:
+            events = list(self._events.get(calendar_id, {}).values())
+        busy = [
+            {"start": e["start"]["dateTime"], "end": e["end"]["dateTime"]} for e in events
+            if _parse(e["start"]["dateTime"]) < time_max and _parse(e["end"]["dateTime"]) > time_min
+        ]
+        return sorted(busy, key=lambda b: _parse(b["start"]))
+
+    def _freebusy_query(self, body: Dict) -> _Request:
+        def run():
+            self.calls["freebusy"] += 1
+            time_min, time_max = _parse(body["timeMin"]), _parse(body["timeMax"])
+            return {"calendars": {item["id"]: {"busy": self._busy(item["id"], time_min, time_max)} for item in body["items"]}}
+        return _Request(run)
+
+    def _insert(self, calendarId: str, body: Dict, sendUpdates: Optional[str] = None) -> _Request:
+        def run():
+            self.calls["insert"] += 1
+            event = dict(body)
+            with self._lock:
+                event.setdefault("id", f"local{sum(len(e) for e in self._events.values())}")
+                if event["id"] in self._events.get(calendarId, {}):
+                    raise StubHttpError(409, f"Event {event['id']} already exists")
+                event["htmlLink"] = f"local://calendar/{calendarId}/{event['id']}"
+                for calendar_id in [calendarId] + [a["email"] for a in event.get("attendees", [])]:
+                    self._events.setdefault(calendar_id, {})[event["id"]] = event
+            return event
+        return _Request(run)
+
+    def _list(self, calendarId: str, timeMin: str, timeMax: str, **kwargs) -> _Request:
+        def run():
+            self.calls["list"] += 1
+            time_min, time_max = _parse(timeMin), _parse(timeMax)
+            with self._lock:
+                events = list(self._events.get(calendarId, {}).values())
+            items = [
+                e for e in events
+                if _parse(e["start"]["dateTime"]) < time_max and _parse(e["end"]["dateTime"]) > time_min
+            ]
+            return {"items": sorted(items, key=lambda e: _parse(e["start"]["dateTime"]))}
+        return _Request(run)
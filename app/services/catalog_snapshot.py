@@ -0,0 +1,66 @@
+import os
+import json
+import hashlib
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Bump when the snapshot layout changes; snapshots with another version are ignored
+SNAPSHOT_FORMAT_VERSION = 1
+
+def catalog_checksum(catalog: Dict[str, List[Dict]]) -> str:
+    """SHA-256 of the canonical JSON encoding of a catalog"""
+    canonical = json.dumps(catalog, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+def write_snapshot(path: str, services: List[Dict], barbers: List[Dict]) -> Optional[str]:
+    """
+    Atomically write the catalog snapshot
+
+    Returns:
+        The catalog checksum
+    """
+    catalog = {"services": services, "barbers": barbers}
+    checksum = catalog_checksum(catalog)
+    snapshot = {
+        "version": SNAPSHOT_FORMAT_VERSION,
+        "written_at": datetime.now().isoformat(),
+        "checksum": checksum,
+        "catalog": catalog
+    }
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(snapshot, f, separators=(",", ":"))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return checksum
+
+def read_snapshot(path: str) -> Optional[Dict]:
+    """
+    Read and verify the catalog snapshot
+
+    Returns:
+        The snapshot dict, or None if it is missing, from another format version or corrupt
+    """
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, encoding="utf-8") as f:
+            snapshot = json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"⚠️ Catalog snapshot {path} is unreadable: {str(e)}")
+        return None
+
+    if snapshot.get("version") != SNAPSHOT_FORMAT_VERSION:
+        logger.warning(f"⚠️ Catalog snapshot {path} has format version {snapshot.get('version')}, expected {SNAPSHOT_FORMAT_VERSION} - ignoring")
+        return None
+    catalog = snapshot.get("catalog")
+    if not isinstance(catalog, dict) or catalog_checksum(catalog) != snapshot.get("checksum"):
+        logger.warning(f"⚠️ Catalog snapshot {path} failed its checksum - ignoring")
+        return None
+    return snapshot
@@ -0,0 +1,190 @@
+import time
+import logging
+import threading
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+class CircuitOpenError(Exception):
+    """Raised when a call is rejected because its dependency's breaker is open"""
+
+class CircuitBreaker:
+    """
+    Closed/open/half-open circuit breaker for one dependency
+
+    Closed: calls run and their outcomes fill a rolling window. Once the
+    window holds `min_calls` outcomes, the breaker opens if the failure
+    rate or the slow-call rate reaches its threshold.
+    Open: calls are rejected immediately with CircuitOpenError for
+    `open_seconds`.
+    Half-open: up to `half_open_calls` probe calls run. If they all succeed
+    quickly, the breaker closes. Any failure or slow probe re-opens it.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        window: int = 20,
+        min_calls: int = 5,
+        failure_rate: float = 0.5,
+        slow_call_seconds: float = 2.0,
+        slow_call_rate: float = 0.8,
+        open_seconds: float = 30.0,
+        half_open_calls: int = 2,
+        enabled: bool = True
+    ):
+        self.name = name
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_rate = slow_call_rate
+        self.open_seconds = open_seconds
+        self.half_open_calls = half_open_calls
+        self.enabled = enabled
+
+        self._lock = threading.Lock()
+        self._outcomes: deque = deque(maxlen=window)  # (failed, slow) per call
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+        self._stats = {"calls": 0, "failures": 0, "slow_calls": 0, "rejected": 0, "opened": 0}
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        """Move an open breaker to half-open once its cool-down has passed (lock held)"""
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+            self._state = HALF_OPEN
+            self._probes_in_flight = 0
+            self._probe_successes = 0
+            logger.info(f"🟡 Circuit '{self.name}' half-open - probing")
+        return self._state
+
+    def is_open(self) -> bool:
+        """Check if calls are currently being rejected, without using up a half-open probe"""
+        return self.enabled and self.state == OPEN
+
+    def allow(self) -> bool:
+        """Check if a call may run now; in half-open this reserves a probe slot"""
+        if not self.enabled:
+            return True
+        with self._lock:
+            state = self._current_state()
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and self._probes_in_flight < self.half_open_calls:
+                self._probes_in_flight += 1
+                return True
+            self._stats["rejected"] += 1
+            return False
+
+    def record(self, duration: float, failed: bool):
+        """Record the outcome of a call that `allow` let through"""
+        if not self.enabled:
+            return
+        slow = duration >= self.slow_call_seconds
+        with self._lock:
+            self._stats["calls"] += 1
+            self._stats["failures"] += int(failed)
+            self._stats["slow_calls"] += int(slow)
+
+            if self._state == HALF_OPEN:
+                self._probes_in_flight = max(0, self._probes_in_flight - 1)
+                if failed or slow:
+                    self._trip("probe failed" if failed else f"probe took {duration:.2f}s")
+                else:
+                    self._probe_successes += 1
+                    if self._probe_successes >= self.half_open_calls:
+                        self._state = CLOSED
+                        self._outcomes.clear()
+                        logger.info(f"🟢 Circuit '{self.name}' closed")
+                return
+
+            self._outcomes.append((failed, slow))
+            if self._state == CLOSED and len(self._outcomes) >= self.min_calls:
+                total = len(self._outcomes)
+                failure_rate = sum(f for f, _ in self._outcomes) / total
+                slow_rate = sum(s for _, s in self._outcomes) / total
+                if failure_rate >= self.failure_rate:
+                    self._trip(f"failure rate {failure_rate:.0%}")
+                elif slow_rate >= self.slow_call_rate:
+                    self._trip(f"slow-call rate {slow_rate:.0%}")
+
+    def _trip(self, reason: str):
+        """Open the breaker (lock held)"""
+        self._state = OPEN
+        self._opened_at = time.monotonic()
+        self._outcomes.clear()
+        self._stats["opened"] += 1
+        logger.warning(f"🔴 Circuit '{self.name}' opened ({reason}); failing fast for {self.open_seconds:.0f}s")
+
+    @contextmanager
+    def guard(self):
+        """
+        Run a block as one call through the breaker
+
+        Raises:
+            CircuitOpenError: If the breaker is rejecting calls
+        """
+        if not self.allow():
+            raise CircuitOpenError(f"Circuit '{self.name}' is open")
+        started = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.record(time.perf_counter() - started, failed=True)
+            raise
+        self.record(time.perf_counter() - started, failed=False)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            state = self._current_state()
+            retry_in = max(0.0, self.open_seconds - (time.monotonic() - self._opened_at)) if state == OPEN else 0.0
+            return {
+                **self._stats,
+                "state": state if self.enabled else "disabled",
+                "window_calls": len(self._outcomes),
+                "retry_in_seconds": round(retry_in, 1)
+            }
+
+# One breaker per dependency name, configured from settings
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+def get_breaker(name: str) -> CircuitBreaker:
+    """Get (creating on first use) the breaker for a dependency"""
+    with _breakers_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = CircuitBreaker(
+                name,
+                window=settings.CIRCUIT_BREAKER_WINDOW,
+                min_calls=settings.CIRCUIT_BREAKER_MIN_CALLS,
+                failure_rate=settings.CIRCUIT_BREAKER_FAILURE_RATE,
+                slow_call_seconds=settings.CIRCUIT_BREAKER_SLOW_CALL_SECONDS,
+                slow_call_rate=settings.CIRCUIT_BREAKER_SLOW_CALL_RATE,
+                open_seconds=settings.CIRCUIT_BREAKER_OPEN_SECONDS,
+                half_open_calls=settings.CIRCUIT_BREAKER_HALF_OPEN_CALLS,
+                enabled=settings.CIRCUIT_BREAKER_ENABLED
+            )
+            _breakers[name] = breaker
+        return breaker
+
+def get_breaker_stats() -> Dict[str, Dict]:
+    """Get state and counters for every breaker"""
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return {breaker.name: breaker.stats() for breaker in breakers}
@@ -0,0 +1,77 @@
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from app.config import get_settings
+from app.services.firestore_simple import add_booking_listener, get_customer_profile
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# phone -> (expires_at, profile); an empty profile records "no previous booking"
+_profiles: "OrderedDict[str, tuple]" = OrderedDict()
+_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+def _put(phone: str, profile: Dict):
+    """Cache a profile, evicting the least recently used beyond CUSTOMER_PROFILE_CACHE_SIZE"""
+    with _lock:
+        _profiles[phone] = (time.monotonic() + settings.CUSTOMER_PROFILE_CACHE_TTL, profile)
+        _profiles.move_to_end(phone)
+        while len(_profiles) > settings.CUSTOMER_PROFILE_CACHE_SIZE:
+            _profiles.popitem(last=False)
+            _stats["evictions"] += 1
+
+def _on_booking_event(event: str, booking_data: Dict):
+    """Remember the latest booking's service and barber for rebooking"""
+    if event != 'booked' or not booking_data.get('phone'):
+        return
+    with _lock:
+        cached = _profiles.get(booking_data['phone'])
+    profile = dict(cached[1]) if cached else {}
+    profile.update({
+        'last_service_id': booking_data.get('service_id'),
+        'last_service_name': booking_data.get('service_name'),
+        'last_barber_name': booking_data.get('barber_name'),
+        'contact_name': booking_data.get('contact_name'),
+        'last_booked_at': booking_data.get('created_at')
+    })
+    _put(booking_data['phone'], profile)
+
+def get_profile(phone: str) -> Optional[Dict]:
+    """
+    Get a returning customer's profile (last service and barber)
+
+    Served from memory for CUSTOMER_PROFILE_CACHE_TTL seconds, so greeting
+    a customer or rebooking costs no store read after the first message.
+
+    Returns:
+        Profile dict, or None for a customer without previous bookings (or if the store can't be read)
+    """
+    with _lock:
+        cached = _profiles.get(phone)
+        if cached and cached[0] > time.monotonic():
+            _profiles.move_to_end(phone)
+            _stats["hits"] += 1
+            return dict(cached[1]) or None
+    _stats["misses"] += 1
+
+    try:
+        profile = get_customer_profile(phone) or {}
+    except Exception as e:
+        logger.error(f"❌ Error loading customer profile for {phone}: {str(e)}")
+        return None
+    _put(phone, profile)
+    return dict(profile) or None
+
+def start_profile_tracking():
+    """Keep cached profiles current as this process books"""
+    add_booking_listener(_on_booking_event)
+
+def get_profile_cache_stats() -> Dict:
+    """Get customer profile cache statistics"""
+    with _lock:
+        size = len(_profiles)
+    return {**_stats, "size": size}
@@ -0,0 +1,23 @@
+import os
+import fcntl
+from typing import IO, Optional
+
+def try_lock(path: str) -> Optional[IO]:
+    """
+    Take an exclusive advisory lock on a file without blocking
+
+    The lock lasts until the returned file is closed or the process exits,
+    so a crashed holder never leaves a stale lock behind.
+
+    Returns:
+        The open lock file, or None if another process holds the lock
+    """
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    lock_file = open(path, "a")
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        lock_file.close()
+        return None
+    return lock_file
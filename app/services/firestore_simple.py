@@ -1,12 +1,25 @@
 import os
 import json
+import time
 import logging
+import random
+import secrets
+import threading
 import requests
-from datetime import datetime, timedelta
-from typing import Dict, Optional, List, Any
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
 from pydantic import BaseModel
 
 from app.config import get_settings
+from app.services.booking_journal import BookingJournal
+from app.services.catalog_snapshot import catalog_checksum, read_snapshot, write_snapshot
+from app.services.circuit_breaker import get_breaker
+from app.services.single_flight import SingleFlight
+from app.services.slot_reservations import SlotReservations
+from app.services.schedule import Schedule, compiled_schedule
+from app.services.tracing import span, traced
 
 # Define models inline since we removed the separate models file
 class Service(BaseModel):
@@ -23,6 +36,9 @@ class Barber(BaseModel):
     email: str = ""
     services: List[str] = []  # List of service IDs
     working_days: List[str] = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday"]
+    hours: str = ""  # Own weekly hours within the salon's, e.g. "mon-thu 10:00-16:00" (empty = salon hours)
+    breaks: List[str] = []  # e.g. "13:00-13:30" (every day) or "fri 12:00-13:00"
+    days_off: List[str] = []  # Dates or ranges, e.g. "2026-08-03..2026-08-14"
     specialties: List[str] = []
     experience_years: int = 0
 
@@ -39,6 +55,8 @@ class Booking(BaseModel):
     status: str = "confirmed"
     created_at: str
     source: str = "whatsapp"
+    price: Optional[float] = None  # Service price when booked
+    duration: Optional[int] = None  # Service minutes when booked
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
@@ -61,21 +79,189 @@ BASE_URL = f"https://firestore.googleapis.com/v1/projects/{PROJECT_ID}/databases
 # Global Firebase client
 _firebase_client = None
 _firebase_connected = False
+_firebase_init_attempted = False
+_firebase_init_lock = threading.Lock()
+
+# Fails store calls fast while Firestore is erroring or slow; callers fall back to cached data
+_firestore_breaker = get_breaker("firestore")
 
 # In-memory storage as fallback
 _in_memory_storage = {
     'services': {},
     'barbers': {},
-    'bookings': {}
+    'bookings': {},
+    'calendar_outbox': {},
+    'booking_stats': {},
+    'phone_bookings': {},
+    'customers': {}
 }
 
+# Catalog cache: key -> (loaded_at, value) for 'services', 'barbers' and 'service_index'
+_catalog_cache: Dict[str, tuple] = {}
+
+# Last known-good catalog from the store or the snapshot file, served when Firestore is unavailable
+_snapshot_catalog: Dict[str, Optional[list]] = {'services': None, 'barbers': None}
+_snapshot_info = {"source": None, "checksum": None, "written_at": None}
+
+# Booked slots cache: (barber_name, YYYY-MM-DD) -> (expires_at, set of time slots)
+_booked_slots_cache: Dict[tuple, tuple] = {}
+_cache_lock = threading.Lock()
+
+# Phone index cache: phone -> (expires_at, set of upcoming booking ids)
+_phone_index_cache: Dict[str, tuple] = {}
+
+# Serializes cancellations that only this process can see (journaled, or in the in-memory store)
+_cancel_lock = threading.Lock()
+
+# Conditional cancel writes retried when the booking changed between read and commit (REST API)
+CANCEL_ATTEMPTS = 3
+
+# Collection document counts: collection -> (expires_at, count)
+_count_cache: Dict[str, tuple] = {}
+
+# Concurrent identical store reads (cache-miss stampedes) share one in-flight fetch
+_single_flight = SingleFlight()
+
+# Local write-ahead journal for bookings (opened at startup when BOOKING_JOURNAL_ENABLED)
+_booking_journal: Optional[BookingJournal] = None
+
+# Slots claimed by journaled bookings, shared by every worker's journal (opened with the journal)
+_slot_reservations: Optional[SlotReservations] = None
+RESERVATIONS_FILE = "reservations.db"
+
+# Last known copy of recently read or made bookings: booking_id -> booking data.
+# Lets a cancellation be journaled while the store is failing fast.
+_known_bookings: "OrderedDict[str, Dict]" = OrderedDict()
+KNOWN_BOOKINGS_MAX = 1024
+
+# Store reads on the journaled booking path run here so they can be bounded by a timeout
+_booking_check_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="booking-check")
+
+# Callbacks notified after bookings change: callback(event, booking_data)
+_booking_listeners: List = []
+
+def add_booking_listener(callback):
+    """Register a callback run after a booking is created ('booked') or cancelled ('cancelled')"""
+    if callback not in _booking_listeners:
+        _booking_listeners.append(callback)
+
+def _notify_booking_listeners(event: str, booking_data: Dict):
+    """Run booking listeners; a failing listener never fails the booking"""
+    for callback in _booking_listeners:
+        try:
+            callback(event, booking_data)
+        except Exception as e:
+            logger.error(f"❌ Booking listener {getattr(callback, '__name__', callback)} failed: {str(e)}")
+
+def _get_cached_catalog(key: str):
+    """Get a catalog entry if it is still fresh"""
+    with span("cache.catalog", key=key) as lookup:
+        with _cache_lock:
+            entry = _catalog_cache.get(key)
+        fresh = entry is not None and time.monotonic() - entry[0] < settings.CATALOG_CACHE_TTL
+        if lookup:
+            lookup.set_attribute("hit", fresh)
+        return entry[1] if fresh else None
+
+def _set_cached_catalog(key: str, value):
+    """Store a catalog entry"""
+    with _cache_lock:
+        _catalog_cache[key] = (time.monotonic(), value)
+
+def invalidate_catalog_cache():
+    """Drop the cached catalog so the next read goes to the store"""
+    with _cache_lock:
+        _catalog_cache.clear()
+
+def load_catalog_snapshot() -> bool:
+    """
+    Seed the catalog cache from the local snapshot file, without touching Firestore
+
+    Returns:
+        True if a valid snapshot was loaded
+    """
+    if not settings.CATALOG_SNAPSHOT_ENABLED:
+        return False
+    if _snapshot_info["source"] is not None:
+        # Already loaded, e.g. by the pre-fork master; reloading would unshare the copy-on-write pages
+        return _snapshot_info["source"] == "file"
+    snapshot = read_snapshot(settings.CATALOG_SNAPSHOT_PATH)
+    if snapshot is None:
+        logger.info("📸 No usable catalog snapshot - catalog will load from the store")
+        return False
+
+    services = [Service(**s) for s in snapshot["catalog"].get("services", [])]
+    barbers = [Barber(**b) for b in snapshot["catalog"].get("barbers", [])]
+    _snapshot_catalog['services'] = services
+    _snapshot_catalog['barbers'] = barbers
+    _snapshot_info.update(source="file", checksum=snapshot["checksum"], written_at=snapshot["written_at"])
+    _set_cached_catalog('services', services)
+    _set_cached_catalog('barbers', barbers)
+    _set_cached_catalog('service_index', _build_service_index(barbers))
+    logger.info(f"📸 Catalog snapshot loaded: {len(services)} services, {len(barbers)} barbers (written {snapshot['written_at']})")
+    return True
+
+def _save_catalog_snapshot(key: str, items: list):
+    """Remember a catalog list loaded from the store and rewrite the snapshot file when the catalog changed"""
+    _snapshot_catalog[key] = items
+    services, barbers = _snapshot_catalog['services'], _snapshot_catalog['barbers']
+    _snapshot_info["source"] = "store"
+    # Never replace a good snapshot with an empty catalog
+    if not settings.CATALOG_SNAPSHOT_ENABLED or not services or not barbers:
+        return
+    service_dicts = [s.model_dump() for s in services]
+    barber_dicts = [b.model_dump() for b in barbers]
+    if catalog_checksum({"services": service_dicts, "barbers": barber_dicts}) == _snapshot_info["checksum"]:
+        return
+    try:
+        _snapshot_info["checksum"] = write_snapshot(settings.CATALOG_SNAPSHOT_PATH, service_dicts, barber_dicts)
+        _snapshot_info["written_at"] = datetime.now().isoformat()
+        logger.info(f"📸 Catalog snapshot written to {settings.CATALOG_SNAPSHOT_PATH}")
+    except OSError as e:
+        logger.error(f"❌ Error writing catalog snapshot: {str(e)}")
+
+def get_catalog_snapshot_info() -> Dict[str, Any]:
+    """Get where the current catalog came from and the snapshot checksum"""
+    return {
+        **_snapshot_info,
+        "enabled": settings.CATALOG_SNAPSHOT_ENABLED,
+        "services": len(_snapshot_catalog['services'] or []),
+        "barbers": len(_snapshot_catalog['barbers'] or [])
+    }
+
+def invalidate_availability_cache(barber_name: str = None, date_str: str = None):
+    """Drop cached booked slots for a barber/day, a whole barber, or everything"""
+    with _cache_lock:
+        if barber_name is None and date_str is None:
+            _booked_slots_cache.clear()
+            return
+        for key in list(_booked_slots_cache):
+            if (barber_name is None or key[0] == barber_name) and (date_str is None or key[1] == date_str):
+                del _booked_slots_cache[key]
+
+def refresh_catalog() -> Dict[str, int]:
+    """Reload services and barbers (and the service→barber index) into the catalog cache"""
+    # Load straight from the store so the current (e.g. snapshot) catalog keeps serving until the new one arrives
+    services = _load_services()
+    barbers = _load_barbers()
+    return {"services": len(services), "barbers": len(barbers)}
+
+def _build_service_index(barbers: List[Barber]) -> Dict[str, List[Barber]]:
+    """Build the service_id -> barbers index, preserving barber order"""
+    index: Dict[str, List[Barber]] = {}
+    for barber in barbers:
+        for service_id in barber.services:
+            index.setdefault(service_id, []).append(barber)
+    return index
+
 def initialize_firebase():
     """Initialize Firebase connection using multiple methods"""
-    global _firebase_client, _firebase_connected
+    global _firebase_client, _firebase_connected, _firebase_init_attempted
     
     if _firebase_connected:
         return _firebase_client
     
+    _firebase_init_attempted = True
     logger.info("🔥 Attempting to connect to Firebase...")
     
     # Method 1: Try Firebase Admin SDK with service account
@@ -207,7 +393,11 @@ def initialize_firebase():
     return None
 
 def is_firebase_connected():
-    """Check if Firebase is connected"""
+    """Check if Firebase is connected, connecting on first use"""
+    if not _firebase_init_attempted:
+        with _firebase_init_lock:
+            if not _firebase_init_attempted:
+                initialize_firebase()
     return _firebase_connected
 
 def get_firebase_client():
@@ -218,42 +408,55 @@ def get_firebase_client():
     return _firebase_client
 
 def get_all_services():
+    """Get all services, served from the catalog cache while it is fresh"""
+    cached = _get_cached_catalog('services')
+    if cached is not None:
+        return list(cached)
+    return list(_single_flight.do('services', _load_services))
+
+@traced("store.load_services")
+def _load_services():
     """Get all services from Firebase or fallback storage"""
     try:
         if is_firebase_connected():
-            logger.info("📋 Getting services from Firebase...")
-            client = get_firebase_client()
+            with _firestore_breaker.guard():
+                logger.info("📋 Getting services from Firebase...")
+                client = get_firebase_client()
             
-            if client == "REST_API":
-                # Use REST API
-                response = requests.get(f"{BASE_URL}/services?key={API_KEY}")
-                if response.status_code == 200:
-                    data = response.json()
+                if client == "REST_API":
+                    # Use REST API
+                    response = requests.get(f"{BASE_URL}/services?key={API_KEY}", timeout=settings.FIRESTORE_REQUEST_TIMEOUT)
+                    if response.status_code == 200:
+                        data = response.json()
+                        services = []
+                        if 'documents' in data:
+                            for doc in data['documents']:
+                                service_data = {}
+                                for field, value in doc['fields'].items():
+                                    if 'stringValue' in value:
+                                        service_data[field] = value['stringValue']
+                                    elif 'doubleValue' in value:
+                                        service_data[field] = float(value['doubleValue'])
+                                    elif 'integerValue' in value:
+                                        service_data[field] = int(value['integerValue'])
+                                if service_data:
+                                    services.append(Service(**service_data))
+                        logger.info(f"✅ Retrieved {len(services)} services from Firebase REST API")
+                        _set_cached_catalog('services', services)
+                        _save_catalog_snapshot('services', services)
+                        return list(services)
+                else:
+                    # Use Firebase Admin SDK
+                    services_ref = client.collection('services')
+                    docs = services_ref.stream()
                     services = []
-                    if 'documents' in data:
-                        for doc in data['documents']:
-                            service_data = {}
-                            for field, value in doc['fields'].items():
-                                if 'stringValue' in value:
-                                    service_data[field] = value['stringValue']
-                                elif 'doubleValue' in value:
-                                    service_data[field] = float(value['doubleValue'])
-                                elif 'integerValue' in value:
-                                    service_data[field] = int(value['integerValue'])
-                            if service_data:
-                                services.append(Service(**service_data))
-                    logger.info(f"✅ Retrieved {len(services)} services from Firebase REST API")
-                    return services
-            else:
-                # Use Firebase Admin SDK
-                services_ref = client.collection('services')
-                docs = services_ref.stream()
-                services = []
-                for doc in docs:
-                    service_data = doc.to_dict()
-                    services.append(Service(**service_data))
-                logger.info(f"✅ Retrieved {len(services)} services from Firebase")
-                return services
+                    for doc in docs:
+                        service_data = doc.to_dict()
+                        services.append(Service(**service_data))
+                    logger.info(f"✅ Retrieved {len(services)} services from Firebase")
+                    _set_cached_catalog('services', services)
+                    _save_catalog_snapshot('services', services)
+                    return list(services)
         
         # Fallback to hardcoded data only if Firebase is not connected
         logger.info("📋 Getting services from fallback storage (Firebase not connected)...")
@@ -264,36 +467,44 @@ def get_all_services():
         logger.info("🔄 Falling back to default services")
         return _get_default_services()
 
+@traced("store.get_service")
 def get_service(service_id: str):
     """Get a specific service by ID"""
+    cached = _get_cached_catalog('services')
+    if cached is not None:
+        for service in cached:
+            if service.id == service_id:
+                return service
+    
     try:
         if is_firebase_connected():
-            logger.info(f"🔍 Getting service {service_id} from Firebase...")
-            client = get_firebase_client()
+            with _firestore_breaker.guard():
+                logger.info(f"🔍 Getting service {service_id} from Firebase...")
+                client = get_firebase_client()
             
-            if client == "REST_API":
-                # Use REST API
-                response = requests.get(f"{BASE_URL}/services/{service_id}?key={API_KEY}")
-                if response.status_code == 200:
-                    data = response.json()
-                    service_data = {}
-                    for field, value in data['fields'].items():
-                        if 'stringValue' in value:
-                            service_data[field] = value['stringValue']
-                        elif 'doubleValue' in value:
-                            service_data[field] = float(value['doubleValue'])
-                        elif 'integerValue' in value:
-                            service_data[field] = int(value['integerValue'])
-                    logger.info(f"✅ Found service: {service_data.get('name', 'Unknown')}")
-                    return Service(**service_data)
-            else:
-                # Use Firebase Admin SDK
-                service_ref = client.collection('services').document(service_id)
-                doc = service_ref.get()
-                if doc.exists:
-                    service_data = doc.to_dict()
-                    logger.info(f"✅ Found service: {service_data['name']}")
-                    return Service(**service_data)
+                if client == "REST_API":
+                    # Use REST API
+                    response = requests.get(f"{BASE_URL}/services/{service_id}?key={API_KEY}", timeout=settings.FIRESTORE_REQUEST_TIMEOUT)
+                    if response.status_code == 200:
+                        data = response.json()
+                        service_data = {}
+                        for field, value in data['fields'].items():
+                            if 'stringValue' in value:
+                                service_data[field] = value['stringValue']
+                            elif 'doubleValue' in value:
+                                service_data[field] = float(value['doubleValue'])
+                            elif 'integerValue' in value:
+                                service_data[field] = int(value['integerValue'])
+                        logger.info(f"✅ Found service: {service_data.get('name', 'Unknown')}")
+                        return Service(**service_data)
+                else:
+                    # Use Firebase Admin SDK
+                    service_ref = client.collection('services').document(service_id)
+                    doc = service_ref.get()
+                    if doc.exists:
+                        service_data = doc.to_dict()
+                        logger.info(f"✅ Found service: {service_data['name']}")
+                        return Service(**service_data)
                     
         # Fallback to hardcoded data only if Firebase is not connected
         logger.info(f"🔍 Getting service {service_id} from fallback storage...")
@@ -307,45 +518,60 @@ def get_service(service_id: str):
         
     except Exception as e:
         logger.error(f"❌ Error getting service {service_id}: {str(e)}")
-        return None
+        return next((s for s in _get_default_services() if s.id == service_id), None)
 
 def get_all_barbers():
+    """Get all barbers, served from the catalog cache while it is fresh"""
+    cached = _get_cached_catalog('barbers')
+    if cached is not None:
+        return list(cached)
+    return list(_single_flight.do('barbers', _load_barbers))
+
+@traced("store.load_barbers")
+def _load_barbers():
     """Get all barbers from Firebase or fallback storage"""
     try:
         if is_firebase_connected():
-            logger.info("👥 Getting barbers from Firebase...")
-            client = get_firebase_client()
+            with _firestore_breaker.guard():
+                logger.info("👥 Getting barbers from Firebase...")
+                client = get_firebase_client()
             
-            if client == "REST_API":
-                # Use REST API
-                response = requests.get(f"{BASE_URL}/barbers?key={API_KEY}")
-                if response.status_code == 200:
-                    data = response.json()
+                if client == "REST_API":
+                    # Use REST API
+                    response = requests.get(f"{BASE_URL}/barbers?key={API_KEY}", timeout=settings.FIRESTORE_REQUEST_TIMEOUT)
+                    if response.status_code == 200:
+                        data = response.json()
+                        barbers = []
+                        if 'documents' in data:
+                            for doc in data['documents']:
+                                barber_data = {}
+                                for field, value in doc['fields'].items():
+                                    if 'stringValue' in value:
+                                        barber_data[field] = value['stringValue']
+                                    elif 'arrayValue' in value:
+                                        barber_data[field] = [item['stringValue'] for item in value['arrayValue'].get('values', [])]
+                                    elif 'integerValue' in value:
+                                        barber_data[field] = int(value['integerValue'])
+                                if barber_data:
+                                    barbers.append(Barber(**barber_data))
+                        logger.info(f"✅ Retrieved {len(barbers)} barbers from Firebase REST API")
+                        _set_cached_catalog('barbers', barbers)
+                        _save_catalog_snapshot('barbers', barbers)
+                        _set_cached_catalog('service_index', _build_service_index(barbers))
+                        return list(barbers)
+                else:
+                    # Use Firebase Admin SDK
+                    barbers_ref = client.collection('barbers')
+                    docs = barbers_ref.stream()
                     barbers = []
-                    if 'documents' in data:
-                        for doc in data['documents']:
-                            barber_data = {}
-                            for field, value in doc['fields'].items():
-                                if 'stringValue' in value:
-                                    barber_data[field] = value['stringValue']
-                                elif 'arrayValue' in value:
-                                    barber_data[field] = [item['stringValue'] for item in value['arrayValue'].get('values', [])]
-                                elif 'integerValue' in value:
-                                    barber_data[field] = int(value['integerValue'])
-                            if barber_data:
-                                barbers.append(Barber(**barber_data))
-                    logger.info(f"✅ Retrieved {len(barbers)} barbers from Firebase REST API")
-                    return barbers
-            else:
-                # Use Firebase Admin SDK
-                barbers_ref = client.collection('barbers')
-                docs = barbers_ref.stream()
-                barbers = []
-                for doc in docs:
-                    barber_data = doc.to_dict()
-                    barbers.append(Barber(**barber_data))
-                logger.info(f"✅ Retrieved {len(barbers)} barbers from Firebase")
-                return barbers
+                    for doc in docs:
+                        barber_data = doc.to_dict()
+                        barbers.append(Barber(**barber_data))
+                    logger.info(f"✅ Retrieved {len(barbers)} barbers from Firebase")
+                    _set_cached_catalog('barbers', barbers)
+                    _save_catalog_snapshot('barbers', barbers)
+                    _set_cached_catalog('service_index', _build_service_index(barbers))
+                    return list(barbers)
         
         # Fallback to hardcoded data only if Firebase is not connected
         logger.info("👥 Getting barbers from fallback storage (Firebase not connected)...")
@@ -356,29 +582,35 @@ def get_all_barbers():
         logger.info("🔄 Falling back to default barbers")
         return _get_default_barbers()
 
+@traced("store.get_barbers_for_service")
 def get_barbers_for_service(service_id: str):
     """Get all barbers that provide a specific service"""
+    index = _get_cached_catalog('service_index')
+    if index is not None:
+        return list(index.get(service_id, []))
+    
     try:
         if is_firebase_connected():
-            logger.info(f"🔍 Getting barbers for service {service_id} from Firebase...")
-            client = get_firebase_client()
+            with _firestore_breaker.guard():
+                logger.info(f"🔍 Getting barbers for service {service_id} from Firebase...")
+                client = get_firebase_client()
             
-            if client == "REST_API":
-                # Use REST API - get all barbers and filter
-                all_barbers = get_all_barbers()
-                barbers = [b for b in all_barbers if service_id in b.services]
-            else:
-                # Use Firebase Admin SDK with query
-                barbers_ref = client.collection('barbers')
-                query = barbers_ref.where('services', 'array_contains', service_id)
-                docs = query.stream()
-                barbers = []
-                for doc in docs:
-                    barber_data = doc.to_dict()
-                    barbers.append(Barber(**barber_data))
+                if client == "REST_API":
+                    # Use REST API - get all barbers and filter
+                    all_barbers = get_all_barbers()
+                    barbers = [b for b in all_barbers if service_id in b.services]
+                else:
+                    # Use Firebase Admin SDK with query
+                    barbers_ref = client.collection('barbers')
+                    query = barbers_ref.where('services', 'array_contains', service_id)
+                    docs = query.stream()
+                    barbers = []
+                    for doc in docs:
+                        barber_data = doc.to_dict()
+                        barbers.append(Barber(**barber_data))
             
-            logger.info(f"✅ Found {len(barbers)} barbers for service {service_id}")
-            return barbers
+                logger.info(f"✅ Found {len(barbers)} barbers for service {service_id}")
+                return barbers
         
         # Fallback to hardcoded data only if Firebase is not connected
         logger.info(f"🔍 Getting barbers for service {service_id} from fallback storage...")
@@ -389,27 +621,40 @@ def get_barbers_for_service(service_id: str):
         
     except Exception as e:
         logger.error(f"❌ Error getting barbers for service {service_id}: {str(e)}")
-        return []
+        return [b for b in _get_default_barbers() if service_id in b.services]
 
-def get_available_slots(barber_name: str, date: datetime = None) -> List[str]:
-    """Get available slots for a barber on a specific date"""
-    if not date:
-        date = datetime.now()
-    
-    date_str = date.strftime("%Y-%m-%d")
+# Optional in-process source of booked slots (the realtime booking replica); returns None when it can't answer
+_local_booked_slots: Optional[Callable[[str, str], Optional[List[str]]]] = None
+
+def set_local_booked_slots(source: Optional[Callable[[str, str], Optional[List[str]]]]):
+    """Serve cached availability reads from source(barber_name, date_str) whenever it returns a list"""
+    global _local_booked_slots
+    _local_booked_slots = source
+
+def get_schedule() -> Schedule:
+    """Get business hours and barber schedules compiled for the current barber catalog"""
+    return compiled_schedule(get_all_barbers())
+
+def get_slot_grid() -> List[str]:
+    """Get every slot label any barber can work, in time order"""
+    return list(get_schedule().grid)
+
+def get_barber_slots(barber_name: str, date_str: str) -> List[str]:
+    """Get the slots a barber works on a date (none on their days off or when the salon is closed)"""
+    return list(get_schedule().slots_for(barber_name, date_str))
+
+@traced("store.get_booked_slots")
+def _get_booked_slots(barber_name: str, date_str: str) -> List[str]:
+    """Get booked time slots for a barber on a date from the store"""
+    booked_slots = []
     
-    try:
-        logger.info(f"📅 Getting available slots for {barber_name} on {date_str}...")
-        
-        # Get bookings for this barber on this date
-        booked_slots = []
-        
-        if is_firebase_connected():
+    if is_firebase_connected():
+        with _firestore_breaker.guard():
             client = get_firebase_client()
-            
+        
             if client == "REST_API":
                 # Use REST API to get bookings
-                response = requests.get(f"{BASE_URL}/bookings?key={API_KEY}")
+                response = requests.get(f"{BASE_URL}/bookings?key={API_KEY}", timeout=settings.FIRESTORE_REQUEST_TIMEOUT)
                 if response.status_code == 200:
                     data = response.json()
                     if 'documents' in data:
@@ -418,9 +663,10 @@ def get_available_slots(barber_name: str, date: datetime = None) -> List[str]:
                             for field, value in doc['fields'].items():
                                 if 'stringValue' in value:
                                     booking_data[field] = value['stringValue']
-                            
+                        
                             if (booking_data.get('barber_name') == barber_name and 
-                                booking_data.get('date') == date_str):
+                                booking_data.get('date') == date_str and
+                                booking_data.get('status') != 'cancelled'):
                                 booked_slots.append(booking_data.get('time_slot'))
             else:
                 # Use Firebase Admin SDK
@@ -429,46 +675,274 @@ def get_available_slots(barber_name: str, date: datetime = None) -> List[str]:
                 docs = query.stream()
                 for doc in docs:
                     booking_data = doc.to_dict()
-                    booked_slots.append(booking_data.get('time_slot'))
+                    if booking_data.get('status') != 'cancelled':
+                        booked_slots.append(booking_data.get('time_slot'))
+    else:
+        # Use in-memory storage
+        for booking_data in _in_memory_storage['bookings'].values():
+            if (booking_data.get('barber_name') == barber_name and 
+                booking_data.get('date') == date_str and
+                booking_data.get('status') != 'cancelled'):
+                booked_slots.append(booking_data.get('time_slot'))
+    
+    # Journaled bookings not yet replicated to the store are taken too
+    booked_slots.extend(_journaled_slots(barber_name, date_str))
+    
+    return booked_slots
+
+def _journaled_slots(barber_name: str, date_str: str) -> List[str]:
+    """Slots of journaled bookings: this worker's not yet replicated, and those claimed by any worker"""
+    slots = []
+    if _booking_journal is not None:
+        slots.extend(_booking_journal.pending_slots(barber_name, date_str))
+    if _slot_reservations is not None:
+        slots.extend(_slot_reservations.reserved_slots(barber_name, date_str))
+    return slots
+
+def get_available_slots(barber_name: str, date: datetime = None, use_cache: bool = True) -> List[str]:
+    """Get available slots for a barber on a specific date
+    
+    Booked slots come from the realtime booking replica when it covers the
+    date, otherwise they are cached per (barber, date) for
+    AVAILABILITY_CACHE_TTL seconds; pass use_cache=False to force a store
+    read. On a store error every scheduled slot is returned, so this is
+    for display only; book_slot checks with _booked_slots_for_booking.
+    """
+    if not date:
+        date = datetime.now()
+    
+    date_str = date.strftime("%Y-%m-%d")
+    
+    try:
+        logger.info(f"📅 Getting available slots for {barber_name} on {date_str}...")
+        
+        scheduled = get_barber_slots(barber_name, date_str)
+        if not scheduled:
+            # Day off or salon closed: no need to read bookings
+            logger.info(f"🚫 {barber_name} is not working on {date_str}")
+            return []
+        
+        # Get bookings for this barber on this date: from the realtime replica, the cache or the store
+        key = (barber_name, date_str)
+        local = _local_booked_slots(barber_name, date_str) if use_cache and _local_booked_slots else None
+        hit = False
+        if local is None:
+            with span("cache.booked_slots", barber=barber_name, date=date_str) as lookup:
+                with _cache_lock:
+                    cached = _booked_slots_cache.get(key)
+                hit = use_cache and cached is not None and (cached[0] > time.monotonic() or _firestore_breaker.is_open())
+                if lookup:
+                    lookup.set_attribute("hit", hit)
+        if local is not None:
+            # Journaled bookings not yet replicated to the store are taken too
+            booked_slots = set(local)
+            booked_slots.update(_journaled_slots(barber_name, date_str))
+        elif hit:
+            # Fresh, or stale while the store is failing fast - stale booked slots beat showing every slot as free
+            booked_slots = cached[1]
         else:
-            # Use in-memory storage
-            for booking_data in _in_memory_storage['bookings'].values():
-                if (booking_data.get('barber_name') == barber_name and 
-                    booking_data.get('date') == date_str):
-                    booked_slots.append(booking_data.get('time_slot'))
+            if use_cache:
+                booked_slots = set(_single_flight.do(('booked_slots', barber_name, date_str), _get_booked_slots, barber_name, date_str))
+            else:
+                # A fresh read must start after the caller's request, so it never joins an earlier flight
+                booked_slots = set(_get_booked_slots(barber_name, date_str))
+            with _cache_lock:
+                _booked_slots_cache[key] = (time.monotonic() + settings.AVAILABILITY_CACHE_TTL, booked_slots)
         
         logger.info(f"📋 Found {len(booked_slots)} existing bookings for {barber_name} on {date_str}")
         
-        # Generate all possible slots (9 AM to 5 PM, 30-min intervals)
-        all_slots = []
-        current_time = datetime.strptime("09:00", "%H:%M")
-        end_time = datetime.strptime("17:00", "%H:%M")
-        
-        while current_time < end_time:
-            slot = current_time.strftime("%I:%M %p")
-            if slot not in booked_slots:
-                all_slots.append(slot)
-            current_time += timedelta(minutes=30)
+        all_slots = [slot for slot in scheduled if slot not in booked_slots]
         
         logger.info(f"✅ {len(all_slots)} available slots for {barber_name} on {date_str}")
         return all_slots
         
     except Exception as e:
         logger.error(f"❌ Error getting available slots: {str(e)}")
-        # Return default slots if error
-        all_slots = []
-        current_time = datetime.strptime("09:00", "%H:%M")
-        end_time = datetime.strptime("17:00", "%H:%M")
-        
-        while current_time < end_time:
-            slot = current_time.strftime("%I:%M %p")
-            all_slots.append(slot)
-            current_time += timedelta(minutes=30)
+        # Return the barber's scheduled slots if error
+        return get_barber_slots(barber_name, date_str)
+
+def _booked_slots_for_booking(barber_name: str, date_str: str) -> set:
+    """
+    Get the booked slots a new booking is checked against; raises when they can't be read
+
+    Without the journal this is a fresh store read. With the journal,
+    bookings confirm from local state: the realtime replica or the cached
+    view, plus journaled bookings of every worker. Slot reservations only
+    cover this host, so a cached view is trusted only until its
+    AVAILABILITY_CACHE_TTL runs out; after that the store is re-read
+    (bounded by FIRESTORE_REQUEST_TIMEOUT), and an expired view is used
+    only while the store's breaker is open. With no view at all, the read
+    gives up after BOOKING_CHECK_TIMEOUT seconds.
+    """
+    if _booking_journal is None:
+        return set(_get_booked_slots(barber_name, date_str))
+    
+    booked_slots = _local_booked_slots(barber_name, date_str) if _local_booked_slots else None
+    if booked_slots is None:
+        key = (barber_name, date_str)
+        with _cache_lock:
+            cached = _booked_slots_cache.get(key)
+        if cached is not None and (cached[0] > time.monotonic() or _firestore_breaker.is_open()):
+            booked_slots = cached[1]
+        else:
+            timeout = settings.FIRESTORE_REQUEST_TIMEOUT if cached is not None else settings.BOOKING_CHECK_TIMEOUT
+            future = _booking_check_pool.submit(_single_flight.do, ('booked_slots', barber_name, date_str), _get_booked_slots, barber_name, date_str)
+            booked_slots = set(future.result(timeout=timeout))
+            with _cache_lock:
+                _booked_slots_cache[key] = (time.monotonic() + settings.AVAILABILITY_CACHE_TTL, booked_slots)
+    return set(booked_slots) | set(_journaled_slots(barber_name, date_str))
+
+def _document_name(collection: str, document_id: str) -> str:
+    """Full REST resource name of a document, as used in commit writes"""
+    return f"projects/{PROJECT_ID}/databases/(default)/documents/{collection}/{document_id}"
+
+def _booking_profile_fields(booking_data: Dict) -> Dict:
+    """Customer profile fields recorded by a booking (last service and barber, for rebooking)"""
+    return {
+        'last_service_id': booking_data.get('service_id'),
+        'last_service_name': booking_data.get('service_name'),
+        'last_barber_name': booking_data.get('barber_name'),
+        'contact_name': booking_data.get('contact_name'),
+        'last_booked_at': booking_data.get('created_at')
+    }
+
+def _commit_rest_writes(writes: List[Dict]):
+    """Apply REST API writes atomically in one commit request"""
+    response = requests.post(
+        f"{BASE_URL}:commit?key={API_KEY}",
+        json={"writes": writes},
+        timeout=settings.FIRESTORE_REQUEST_TIMEOUT
+    )
+    if response.status_code != 200:
+        raise Exception(f"REST API failed with status {response.status_code}")
+
+# Key of the calendar outbox entry travelling with a journaled booking (never written to the booking document)
+CALENDAR_OUTBOX_KEY = '_calendar_outbox'
+
+@traced("store.write_booking")
+def _write_booking(booking_id: str, booking_data: Dict, outbox_entry: Dict = None):
+    """
+    Write a booking, its phone index entry, the customer profile update and
+    its calendar outbox entry as one batched commit
+
+    One store round trip on the booking path; idempotent, so journal
+    replays can repeat it safely. Fields are merged into the stored
+    document, so a journaled cancellation keeps fields added since (e.g.
+    calendar_event_id), and a cancelled booking leaves the phone index. A
+    journaled booking carries its outbox entry under CALENDAR_OUTBOX_KEY.
+    """
+    if CALENDAR_OUTBOX_KEY in booking_data:
+        booking_data = dict(booking_data)
+        outbox_entry = outbox_entry or booking_data.pop(CALENDAR_OUTBOX_KEY)
+    phone = booking_data.get('phone')
+    indexed = bool(phone) and booking_data.get('status') != 'cancelled'
+    unindexed = bool(phone) and not indexed
+    profile = _booking_profile_fields(booking_data) if indexed else None
+    if is_firebase_connected():
+        with _firestore_breaker.guard():
+            client = get_firebase_client()
         
-        return all_slots
+            if client == "REST_API":
+                writes = [{
+                    "update": {
+                        "name": _document_name('bookings', booking_id),
+                        "fields": {key: {"stringValue": str(value)} for key, value in booking_data.items()}
+                    },
+                    "updateMask": {"fieldPaths": list(booking_data)}
+                }]
+                if unindexed:
+                    writes.append(_phone_index_write(phone, remove=[booking_id]))
+                if indexed:
+                    writes.append(_phone_index_write(phone, add=[booking_id]))
+                    writes.append({
+                        "update": {"name": _document_name('customers', phone), "fields": _to_firestore_fields(profile)},
+                        "updateMask": {"fieldPaths": list(profile)}
+                    })
+                if outbox_entry:
+                    writes.append({"update": {"name": _document_name('calendar_outbox', booking_id), "fields": _to_firestore_fields(outbox_entry)}})
+                _commit_rest_writes(writes)
+                logger.info(f"✅ Booking saved to Firebase via REST API with ID: {booking_id}")
+            else:
+                # Use Firebase Admin SDK
+                from firebase_admin import firestore
+                batch = client.batch()
+                batch.set(client.collection('bookings').document(booking_id), booking_data, merge=True)
+                if unindexed:
+                    batch.set(client.collection('phone_bookings').document(phone), {'booking_ids': firestore.ArrayRemove([booking_id])}, merge=True)
+                if indexed:
+                    batch.set(client.collection('phone_bookings').document(phone), {'booking_ids': firestore.ArrayUnion([booking_id])}, merge=True)
+                    batch.set(client.collection('customers').document(phone), profile, merge=True)
+                if outbox_entry:
+                    batch.set(client.collection('calendar_outbox').document(booking_id), outbox_entry)
+                batch.commit()
+                logger.info(f"✅ Booking saved to Firebase with ID: {booking_id}")
+    else:
+        # Save to in-memory storage
+        _in_memory_storage['bookings'][booking_id] = {**_in_memory_storage['bookings'].get(booking_id, {}), **booking_data}
+        if unindexed:
+            _update_phone_index(phone, remove=[booking_id])
+        if indexed:
+            _update_phone_index(phone, add=[booking_id])
+            save_customer_profile(phone, profile)
+        if outbox_entry:
+            _in_memory_storage['calendar_outbox'][booking_id] = outbox_entry.copy()
+        logger.info(f"✅ Booking saved to in-memory storage with ID: {booking_id}")
+
+def open_booking_journal(directory: str = None, reservations_path: str = None):
+    """
+    Recover the local booking journal and start replaying it to the store
+
+    Args:
+        directory: Journal directory (default BOOKING_JOURNAL_DIR)
+        reservations_path: Slot reservations file; workers with their own
+            journals must all pass the same one (default: in `directory`)
+    """
+    global _booking_journal, _slot_reservations
+    if _booking_journal is not None:
+        return _booking_journal
+    directory = directory or settings.BOOKING_JOURNAL_DIR
+    journal = BookingJournal(
+        directory,
+        replicate=_write_booking,
+        segment_size=settings.BOOKING_JOURNAL_SEGMENT_SIZE,
+        flush_interval_ms=settings.BOOKING_JOURNAL_FLUSH_INTERVAL_MS
+    )
+    journal.open()
+    _slot_reservations = SlotReservations(reservations_path or os.path.join(directory, RESERVATIONS_FILE))
+    _booking_journal = journal
+    logger.info(f"📒 Booking journal open at {directory}")
+    return journal
+
+def close_booking_journal(timeout: float = 10.0):
+    """Drain in-flight journaled bookings to the store and close the journal"""
+    global _booking_journal, _slot_reservations
+    if _booking_journal is not None:
+        _booking_journal.drain(timeout)
+        _booking_journal = None
+        _slot_reservations = None
+
+def get_single_flight_stats() -> Dict:
+    """Get store read coalescing counts"""
+    return _single_flight.stats()
+
+def get_booking_journal_stats() -> Dict:
+    """Get booking journal statistics"""
+    if _booking_journal is None:
+        return {"enabled": False}
+    return {"enabled": True, **_booking_journal.stats(), "reservations": _slot_reservations.count()}
+
+# book_slot's message when the slot is taken or not worked (as opposed to a failed write)
+SLOT_TAKEN_MESSAGE = 'This time slot is not available'
 
-def book_slot(booking_data: Dict) -> Dict[str, str]:
-    """Book a slot for a barber"""
+@traced("store.book_slot")
+def book_slot(booking_data: Dict, calendar_entry: Callable[[str, Dict], Dict] = None) -> Dict[str, str]:
+    """Book a slot for a barber
+    
+    Args:
+        booking_data: Booking fields (service, barber, date, time slot, phone, contact name)
+        calendar_entry: Builds the calendar outbox entry from (booking_id, booking_data);
+            it is saved atomically with the booking
+    """
     try:
         logger.info(f"📝 Creating booking...")
         
@@ -476,17 +950,30 @@ def book_slot(booking_data: Dict) -> Dict[str, str]:
         if 'date' not in booking_data:
             booking_data['date'] = datetime.now().strftime("%Y-%m-%d")
             
-        # Check if slot is available
-        available_slots = get_available_slots(
-            booking_data['barber_name'], 
-            datetime.strptime(booking_data['date'], "%Y-%m-%d")
-        )
+        if _booking_journal is None and is_firebase_connected() and _firestore_breaker.is_open():
+            # Availability can't be verified against the store right now (with the journal, local state answers)
+            logger.warning("⏳ Firestore circuit open - asking the customer to retry the booking")
+            return {
+                'status': 'unavailable',
+                'message': settings.STORE_UNAVAILABLE_MESSAGE
+            }
+        
+        # Check if slot is available; a booking is never confirmed against unverified availability
+        scheduled = get_barber_slots(booking_data['barber_name'], booking_data['date'])
+        try:
+            booked_slots = _booked_slots_for_booking(booking_data['barber_name'], booking_data['date'])
+        except Exception as e:
+            logger.warning(f"⏳ Couldn't verify slot availability - asking the customer to retry the booking: {str(e) or type(e).__name__}")
+            return {
+                'status': 'unavailable',
+                'message': settings.STORE_UNAVAILABLE_MESSAGE
+            }
         
-        if booking_data['time_slot'] not in available_slots:
+        if booking_data['time_slot'] not in scheduled or booking_data['time_slot'] in booked_slots:
             logger.warning(f"❌ Time slot {booking_data['time_slot']} not available")
             return {
                 'status': 'error',
-                'message': 'This time slot is not available'
+                'message': SLOT_TAKEN_MESSAGE
             }
             
         # Add booking metadata
@@ -494,40 +981,40 @@ def book_slot(booking_data: Dict) -> Dict[str, str]:
         booking_data['source'] = 'whatsapp'
         booking_data['created_at'] = datetime.now().isoformat()
         
-        # Generate unique booking ID
-        import time
-        booking_id = f"booking_{int(time.time())}"
+        # Generate unique booking ID (random suffix so bookings in the same second don't collide)
+        booking_id = f"booking_{int(time.time())}_{secrets.token_hex(3)}"
         booking_data['booking_id'] = booking_id
         
-        if is_firebase_connected():
-            client = get_firebase_client()
-            
-            if client == "REST_API":
-                # Use REST API to save booking
-                firestore_data = {
-                    "fields": {}
+        outbox_entry = calendar_entry(booking_id, booking_data) if calendar_entry else None
+        if _booking_journal is not None:
+            # Claim the slot for every worker, then make the booking durable locally;
+            # the journal replayer writes it (and its outbox entry) to the store
+            if not _slot_reservations.reserve(booking_data['barber_name'], booking_data['date'], booking_data['time_slot'], booking_id):
+                logger.warning(f"❌ Time slot {booking_data['time_slot']} was just taken by another booking")
+                return {
+                    'status': 'error',
+                    'message': SLOT_TAKEN_MESSAGE
                 }
-                for key, value in booking_data.items():
-                    firestore_data["fields"][key] = {"stringValue": str(value)}
-                
-                response = requests.post(
-                    f"{BASE_URL}/bookings/{booking_id}?key={API_KEY}",
-                    json=firestore_data
-                )
-                
-                if response.status_code in [200, 201]:
-                    logger.info(f"✅ Booking saved to Firebase via REST API with ID: {booking_id}")
-                else:
-                    raise Exception(f"REST API failed with status {response.status_code}")
-            else:
-                # Use Firebase Admin SDK
-                booking_ref = client.collection('bookings').document(booking_id)
-                booking_ref.set(booking_data)
-                logger.info(f"✅ Booking saved to Firebase with ID: {booking_id}")
+            try:
+                _booking_journal.append(booking_id, {**booking_data, CALENDAR_OUTBOX_KEY: outbox_entry} if outbox_entry else booking_data.copy())
+            except Exception:
+                _slot_reservations.release(booking_id)
+                raise
+            logger.info(f"✅ Booking journaled with ID: {booking_id}")
         else:
-            # Save to in-memory storage
-            _in_memory_storage['bookings'][booking_id] = booking_data.copy()
-            logger.info(f"✅ Booking saved to in-memory storage with ID: {booking_id}")
+            _write_booking(booking_id, booking_data, outbox_entry)
+        _remember_booking(booking_data)
+        
+        # Mark the slot as taken in the availability cache right away
+        with _cache_lock:
+            cached = _booked_slots_cache.get((booking_data['barber_name'], booking_data['date']))
+            if cached:
+                cached[1].add(booking_data['time_slot'])
+            indexed = _phone_index_cache.get(booking_data.get('phone'))
+            if indexed:
+                indexed[1].add(booking_id)
+        
+        _notify_booking_listeners('booked', booking_data)
         
         logger.info(f"📋 Booking details: {booking_data['contact_name']} - {booking_data['service_name']} with {booking_data['barber_name']} at {booking_data['time_slot']}")
         
@@ -544,6 +1031,7 @@ def book_slot(booking_data: Dict) -> Dict[str, str]:
             'message': f'Failed to save booking: {str(e)}'
         }
 
+@traced("store.get_all_bookings")
 def get_all_bookings():
     """Get all bookings (for debugging)"""
     try:
@@ -551,27 +1039,28 @@ def get_all_bookings():
         bookings = []
         
         if is_firebase_connected():
-            client = get_firebase_client()
+            with _firestore_breaker.guard():
+                client = get_firebase_client()
             
-            if client == "REST_API":
-                response = requests.get(f"{BASE_URL}/bookings?key={API_KEY}")
-                if response.status_code == 200:
-                    data = response.json()
-                    if 'documents' in data:
-                        for doc in data['documents']:
-                            booking_data = {}
-                            for field, value in doc['fields'].items():
-                                if 'stringValue' in value:
-                                    booking_data[field] = value['stringValue']
-                            if booking_data:
-                                bookings.append(booking_data)
-            else:
-                bookings_ref = client.collection('bookings')
-                docs = bookings_ref.stream()
-                for doc in docs:
-                    booking_data = doc.to_dict()
-                    booking_data['id'] = doc.id
-                    bookings.append(booking_data)
+                if client == "REST_API":
+                    response = requests.get(f"{BASE_URL}/bookings?key={API_KEY}", timeout=settings.FIRESTORE_REQUEST_TIMEOUT)
+                    if response.status_code == 200:
+                        data = response.json()
+                        if 'documents' in data:
+                            for doc in data['documents']:
+                                booking_data = {}
+                                for field, value in doc['fields'].items():
+                                    if 'stringValue' in value:
+                                        booking_data[field] = value['stringValue']
+                                if booking_data:
+                                    bookings.append(booking_data)
+                else:
+                    bookings_ref = client.collection('bookings')
+                    docs = bookings_ref.stream()
+                    for doc in docs:
+                        booking_data = doc.to_dict()
+                        booking_data['id'] = doc.id
+                        bookings.append(booking_data)
         else:
             # Use in-memory storage
             for booking_id, booking_data in _in_memory_storage['bookings'].items():
@@ -586,13 +1075,723 @@ def get_all_bookings():
         logger.error(f"❌ Error getting bookings: {str(e)}")
         return []
 
+def count_documents(collection: str) -> Optional[int]:
+    """
+    Count the documents in a collection without reading them
+
+    Counts come from a server-side count() aggregation and are cached for
+    DATA_COUNTS_CACHE_TTL seconds, so status checks cost a few index reads
+    rather than a scan of the collection.
+
+    Returns:
+        Document count, or None if the store could not be queried
+    """
+    cached = _count_cache.get(collection)
+    if cached and cached[0] > time.monotonic():
+        return cached[1]
+    count = _single_flight.do(('count', collection), _count_documents, collection)
+    if count is not None:
+        _count_cache[collection] = (time.monotonic() + settings.DATA_COUNTS_CACHE_TTL, count)
+    return count
+
+@traced("store.count_documents")
+def _count_documents(collection: str) -> Optional[int]:
+    """Run the count aggregation query"""
+    try:
+        if is_firebase_connected():
+            with _firestore_breaker.guard():
+                client = get_firebase_client()
+            
+                if client == "REST_API":
+                    response = requests.post(
+                        f"{BASE_URL}:runAggregationQuery?key={API_KEY}",
+                        json={
+                            "structuredAggregationQuery": {
+                                "structuredQuery": {"from": [{"collectionId": collection}]},
+                                "aggregations": [{"alias": "count", "count": {}}]
+                            }
+                        },
+                        timeout=settings.FIRESTORE_REQUEST_TIMEOUT
+                    )
+                    if response.status_code != 200:
+                        raise Exception(f"REST API failed with status {response.status_code}")
+                    for item in response.json():
+                        if 'result' in item:
+                            return int(item['result']['aggregateFields']['count']['integerValue'])
+                    return 0
+                
+                results = client.collection(collection).count(alias="count").get()
+                return int(results[0][0].value)
+        
+        return len(_in_memory_storage[collection])
+        
+    except Exception as e:
+        logger.error(f"❌ Error counting {collection}: {str(e)}")
+        return None
+
+def get_bookings_in_range(start_date: str, end_date: str) -> List[Dict]:
+    """Get bookings with start_date <= date <= end_date (YYYY-MM-DD) in one query"""
+    return list(_single_flight.do(('bookings_in_range', start_date, end_date), _load_bookings_in_range, start_date, end_date))
+
+@traced("store.get_bookings_in_range")
+def _load_bookings_in_range(start_date: str, end_date: str) -> List[Dict]:
+    """Run the bookings range query"""
+    try:
+        logger.info(f"📋 Getting bookings from {start_date} to {end_date}...")
+        bookings = []
+        
+        if is_firebase_connected():
+            with _firestore_breaker.guard():
+                client = get_firebase_client()
+            
+                if client == "REST_API":
+                    for booking_data in get_all_bookings():
+                        if start_date <= booking_data.get('date', '') <= end_date:
+                            bookings.append(booking_data)
+                else:
+                    query = client.collection('bookings').where('date', '>=', start_date).where('date', '<=', end_date)
+                    for doc in query.stream():
+                        booking_data = doc.to_dict()
+                        booking_data['id'] = doc.id
+                        bookings.append(booking_data)
+        else:
+            for booking_id, booking_data in _in_memory_storage['bookings'].items():
+                if start_date <= booking_data.get('date', '') <= end_date:
+                    bookings.append({**booking_data, 'id': booking_id})
+        
+        logger.info(f"✅ Retrieved {len(bookings)} bookings from {start_date} to {end_date}")
+        return bookings
+        
+    except Exception as e:
+        logger.error(f"❌ Error getting bookings in range: {str(e)}")
+        return []
+
+def _to_firestore_fields(data: Dict) -> Dict:
+    """Convert a dict to Firestore REST API typed fields"""
+    fields = {}
+    for key, value in data.items():
+        if isinstance(value, bool):
+            fields[key] = {"booleanValue": value}
+        elif isinstance(value, int):
+            fields[key] = {"integerValue": str(value)}
+        elif isinstance(value, float):
+            fields[key] = {"doubleValue": value}
+        elif value is None:
+            fields[key] = {"nullValue": None}
+        elif isinstance(value, list):
+            fields[key] = {"arrayValue": {"values": [{"stringValue": str(item)} for item in value]}}
+        else:
+            fields[key] = {"stringValue": str(value)}
+    return fields
+
+def _from_firestore_fields(fields: Dict) -> Dict:
+    """Convert Firestore REST API typed fields to a dict"""
+    data = {}
+    for field, value in fields.items():
+        if 'stringValue' in value:
+            data[field] = value['stringValue']
+        elif 'integerValue' in value:
+            data[field] = int(value['integerValue'])
+        elif 'doubleValue' in value:
+            data[field] = float(value['doubleValue'])
+        elif 'booleanValue' in value:
+            data[field] = value['booleanValue']
+        elif 'nullValue' in value:
+            data[field] = None
+        elif 'arrayValue' in value:
+            data[field] = [item.get('stringValue') for item in value['arrayValue'].get('values', [])]
+    return data
+
+# Booking stats counters are split over shards so concurrent increments don't contend on one document
+BOOKING_STATS_SHARDS = 10
+BOOKING_STATS_FIELDS = ("bookings", "minutes", "revenue")
+
+# Firestore allows at most 500 writes per batched write or commit
+MAX_BATCH_WRITES = 500
+
+@traced("store.increment_booking_stats")
+def increment_booking_stats(deltas: Dict[str, Dict]) -> int:
+    """
+    Add deltas to booking stats counters
+
+    Args:
+        deltas: counter key -> {"date", "barber_name", "service_id", "bookings", "minutes", "revenue"};
+            each delta is added to one random shard of the counter
+
+    Returns:
+        Number of counters written. Deltas are written in order, MAX_BATCH_WRITES
+        to a batch, and a failed batch stops the rest: the first n deltas are in
+        the store and the others are not.
+    """
+    items = list(deltas.items())
+    written = 0
+    try:
+        if is_firebase_connected():
+            for start in range(0, len(items), MAX_BATCH_WRITES):
+                chunk = items[start:start + MAX_BATCH_WRITES]
+                with _firestore_breaker.guard():
+                    client = get_firebase_client()
+                    
+                    if client == "REST_API":
+                        writes = []
+                        for key, delta in chunk:
+                            name = f"projects/{PROJECT_ID}/databases/(default)/documents/booking_stats/{key}/booking_stats_shards/{random.randrange(BOOKING_STATS_SHARDS)}"
+                            writes.append({
+                                "update": {"name": name, "fields": _to_firestore_fields({k: delta[k] for k in ("date", "barber_name", "service_id")})},
+                                "updateMask": {"fieldPaths": ["date", "barber_name", "service_id"]},
+                                "updateTransforms": [
+                                    {"fieldPath": field, "increment": _to_firestore_fields({field: delta[field]})[field]}
+                                    for field in BOOKING_STATS_FIELDS
+                                ]
+                            })
+                        response = requests.post(
+                            f"{BASE_URL}:commit?key={API_KEY}",
+                            json={"writes": writes},
+                            timeout=settings.FIRESTORE_REQUEST_TIMEOUT
+                        )
+                        if response.status_code != 200:
+                            raise Exception(f"REST API failed with status {response.status_code}")
+                    else:
+                        from firebase_admin import firestore
+                        batch = client.batch()
+                        for key, delta in chunk:
+                            shard_ref = (
+                                client.collection('booking_stats').document(key)
+                                .collection('booking_stats_shards').document(str(random.randrange(BOOKING_STATS_SHARDS)))
+                            )
+                            batch.set(shard_ref, {
+                                'date': delta['date'],
+                                'barber_name': delta['barber_name'],
+                                'service_id': delta['service_id'],
+                                **{field: firestore.Increment(delta[field]) for field in BOOKING_STATS_FIELDS}
+                            }, merge=True)
+                        batch.commit()
+                written += len(chunk)
+        else:
+            for key, delta in items:
+                counter = _in_memory_storage['booking_stats'].setdefault(
+                    key, {'date': delta['date'], 'barber_name': delta['barber_name'], 'service_id': delta['service_id'], 'bookings': 0, 'minutes': 0, 'revenue': 0.0}
+                )
+                for field in BOOKING_STATS_FIELDS:
+                    counter[field] += delta[field]
+                written += 1
+        return written
+        
+    except Exception as e:
+        logger.error(f"❌ Error incrementing booking stats ({written} of {len(items)} counters written): {str(e)}")
+        return written
+
+@traced("store.get_booking_stats_shards")
+def get_booking_stats_shards() -> Optional[List[Dict]]:
+    """
+    Get every booking stats shard (sum shards with the same date/barber/service for the totals)
+
+    Returns:
+        List of shard dicts, or None if the store could not be read
+    """
+    try:
+        if is_firebase_connected():
+            with _firestore_breaker.guard():
+                client = get_firebase_client()
+                
+                if client == "REST_API":
+                    response = requests.post(
+                        f"{BASE_URL}:runQuery?key={API_KEY}",
+                        json={"structuredQuery": {"from": [{"collectionId": "booking_stats_shards", "allDescendants": True}]}},
+                        timeout=settings.FIRESTORE_REQUEST_TIMEOUT
+                    )
+                    if response.status_code != 200:
+                        raise Exception(f"REST API failed with status {response.status_code}")
+                    return [_from_firestore_fields(item['document'].get('fields', {})) for item in response.json() if 'document' in item]
+                
+                return [doc.to_dict() for doc in client.collection_group('booking_stats_shards').stream()]
+        
+        return [dict(counter) for counter in _in_memory_storage['booking_stats'].values()]
+        
+    except Exception as e:
+        logger.error(f"❌ Error getting booking stats: {str(e)}")
+        return None
+
+@traced("store.update_booking")
+def update_booking(booking_id: str, fields: Dict) -> bool:
+    """Update fields on an existing booking"""
+    try:
+        if is_firebase_connected():
+            with _firestore_breaker.guard():
+                client = get_firebase_client()
+            
+                if client == "REST_API":
+                    mask = "&".join(f"updateMask.fieldPaths={key}" for key in fields)
+                    response = requests.patch(
+                        f"{BASE_URL}/bookings/{booking_id}?key={API_KEY}&{mask}",
+                        json={"fields": _to_firestore_fields(fields)},
+                        timeout=settings.FIRESTORE_REQUEST_TIMEOUT
+                    )
+                    if response.status_code not in [200, 201]:
+                        raise Exception(f"REST API failed with status {response.status_code}")
+                else:
+                    client.collection('bookings').document(booking_id).update(fields)
+        else:
+            if booking_id not in _in_memory_storage['bookings']:
+                logger.warning(f"❌ Booking {booking_id} not found")
+                return False
+            _in_memory_storage['bookings'][booking_id].update(fields)
+        
+        logger.info(f"✅ Booking {booking_id} updated: {', '.join(fields)}")
+        return True
+        
+    except Exception as e:
+        logger.error(f"❌ Error updating booking {booking_id}: {str(e)}")
+        return False
+
+def _remember_booking(booking_data: Dict):
+    """Keep the last known copy of a booking (bounded, least recently seen evicted first)"""
+    with _cache_lock:
+        _known_bookings[booking_data['booking_id']] = dict(booking_data)
+        _known_bookings.move_to_end(booking_data['booking_id'])
+        while len(_known_bookings) > KNOWN_BOOKINGS_MAX:
+            _known_bookings.popitem(last=False)
+
+def _local_booking(booking_id: str) -> Optional[Dict]:
+    """A booking from this process's journal or its last known copy, without a store read"""
+    if _booking_journal is not None:
+        pending = _booking_journal.pending_booking(booking_id)
+        if pending:
+            pending.pop(CALENDAR_OUTBOX_KEY, None)
+            return {**pending, 'booking_id': booking_id}
+    with _cache_lock:
+        known = _known_bookings.get(booking_id)
+    return dict(known) if known else None
+
+@traced("store.cancel_stored_booking")
+def _cancel_stored_booking(booking_id: str, fields: Dict) -> Tuple[Optional[Dict], bool]:
+    """
+    Flip a stored booking to cancelled unless it already is, as one conditional write
+
+    Workers cancelling the same booking race in the store rather than on a
+    process lock: the Admin SDK runs a transaction, and the REST API commits
+    with the read's updateTime as a precondition, reading again if the
+    booking changed in between.
+
+    Returns:
+        (booking as read, whether this call cancelled it); the booking is None if it doesn't exist
+    """
+    if is_firebase_connected():
+        with _firestore_breaker.guard():
+            client = get_firebase_client()
+        
+            if client == "REST_API":
+                for _ in range(CANCEL_ATTEMPTS):
+                    response = requests.get(f"{BASE_URL}/bookings/{booking_id}?key={API_KEY}", timeout=settings.FIRESTORE_REQUEST_TIMEOUT)
+                    if response.status_code == 404:
+                        return None, False
+                    if response.status_code != 200:
+                        raise Exception(f"REST API failed with status {response.status_code}")
+                    document = response.json()
+                    booking = {**_from_firestore_fields(document.get('fields', {})), 'booking_id': booking_id}
+                    if booking.get('status') == 'cancelled':
+                        return booking, False
+                    commit = requests.post(
+                        f"{BASE_URL}:commit?key={API_KEY}",
+                        json={"writes": [{
+                            "update": {"name": _document_name('bookings', booking_id), "fields": _to_firestore_fields(fields)},
+                            "updateMask": {"fieldPaths": list(fields)},
+                            "currentDocument": {"updateTime": document['updateTime']}
+                        }]},
+                        timeout=settings.FIRESTORE_REQUEST_TIMEOUT
+                    )
+                    if commit.status_code == 200:
+                        return booking, True
+                    if commit.status_code not in [400, 409]:
+                        raise Exception(f"REST API failed with status {commit.status_code}")
+                    # FAILED_PRECONDITION/ABORTED: written since our read, so check its status again
+                raise Exception(f"Booking {booking_id} kept changing during {CANCEL_ATTEMPTS} cancel attempts")
+            else:
+                from firebase_admin import firestore
+                ref = client.collection('bookings').document(booking_id)
+                
+                @firestore.transactional
+                def flip(transaction):
+                    snapshot = ref.get(transaction=transaction)
+                    if not snapshot.exists:
+                        return None, False
+                    booking = {**snapshot.to_dict(), 'booking_id': booking_id}
+                    if booking.get('status') == 'cancelled':
+                        return booking, False
+                    transaction.update(ref, fields)
+                    return booking, True
+                
+                return flip(client.transaction())
+    
+    with _cancel_lock:
+        stored = _in_memory_storage['bookings'].get(booking_id)
+        if stored is None:
+            return None, False
+        booking = {**stored, 'booking_id': booking_id}
+        if booking.get('status') == 'cancelled':
+            return booking, False
+        stored.update(fields)
+        return booking, True
+
+@traced("store.get_booking")
+def get_booking(booking_id: str) -> Optional[Dict]:
+    """Get one booking by id (journaled bookings not yet in the store included)"""
+    if _booking_journal is not None:
+        pending = _booking_journal.pending_booking(booking_id)
+        if pending:
+            pending.pop(CALENDAR_OUTBOX_KEY, None)
+            return {**pending, 'booking_id': booking_id}
+    
+    if is_firebase_connected():
+        with _firestore_breaker.guard():
+            client = get_firebase_client()
+        
+            if client == "REST_API":
+                response = requests.get(f"{BASE_URL}/bookings/{booking_id}?key={API_KEY}", timeout=settings.FIRESTORE_REQUEST_TIMEOUT)
+                if response.status_code == 404:
+                    return None
+                if response.status_code != 200:
+                    raise Exception(f"REST API failed with status {response.status_code}")
+                booking_data = _from_firestore_fields(response.json().get('fields', {}))
+            else:
+                doc = client.collection('bookings').document(booking_id).get()
+                if not doc.exists:
+                    return None
+                booking_data = doc.to_dict()
+    else:
+        booking_data = _in_memory_storage['bookings'].get(booking_id)
+        if booking_data is None:
+            return None
+        booking_data = dict(booking_data)
+    
+    booking_data['booking_id'] = booking_id
+    _remember_booking(booking_data)
+    return booking_data
+
+def _phone_index_write(phone: str, add: List[str] = None, remove: List[str] = None, complete: bool = False) -> Dict:
+    """REST commit write adding/removing booking ids in a phone's index document"""
+    transforms = []
+    if add:
+        transforms.append({"fieldPath": "booking_ids", "appendMissingElements": {"values": [{"stringValue": b} for b in add]}})
+    if remove:
+        transforms.append({"fieldPath": "booking_ids", "removeAllFromArray": {"values": [{"stringValue": b} for b in remove]}})
+    name = _document_name('phone_bookings', phone)
+    if complete:
+        return {
+            "update": {"name": name, "fields": {"complete": {"booleanValue": True}}},
+            "updateMask": {"fieldPaths": ["complete"]},
+            "updateTransforms": transforms
+        }
+    return {"transform": {"document": name, "fieldTransforms": transforms}}
+
+@traced("store.update_phone_index")
+def _update_phone_index(phone: str, add: List[str] = None, remove: List[str] = None, complete: bool = False):
+    """
+    Add/remove booking ids in a phone's index document (phone_bookings/{phone})
+
+    Array union/removal are idempotent, so journal replays can repeat them.
+    `complete` marks the index as covering bookings made before it existed.
+    """
+    if is_firebase_connected():
+        with _firestore_breaker.guard():
+            client = get_firebase_client()
+        
+            if client == "REST_API":
+                _commit_rest_writes([_phone_index_write(phone, add, remove, complete)])
+            else:
+                from firebase_admin import firestore
+                doc_ref = client.collection('phone_bookings').document(phone)
+                if add or complete:
+                    doc_ref.set({'booking_ids': firestore.ArrayUnion(add or []), **({'complete': True} if complete else {})}, merge=True)
+                if remove:
+                    doc_ref.set({'booking_ids': firestore.ArrayRemove(remove)}, merge=True)
+    else:
+        index = _in_memory_storage['phone_bookings'].setdefault(phone, {'booking_ids': set(), 'complete': False})
+        index['booking_ids'].update(add or [])
+        index['booking_ids'].difference_update(remove or [])
+        index['complete'] = index['complete'] or complete
+
+@traced("store.load_phone_index")
+def _load_phone_index(phone: str) -> Optional[set]:
+    """Read a phone's index document; None until it has been built by _build_phone_index"""
+    if is_firebase_connected():
+        with _firestore_breaker.guard():
+            client = get_firebase_client()
+        
+            if client == "REST_API":
+                response = requests.get(f"{BASE_URL}/phone_bookings/{phone}?key={API_KEY}", timeout=settings.FIRESTORE_REQUEST_TIMEOUT)
+                if response.status_code == 404:
+                    return None
+                if response.status_code != 200:
+                    raise Exception(f"REST API failed with status {response.status_code}")
+                index = _from_firestore_fields(response.json().get('fields', {}))
+            else:
+                doc = client.collection('phone_bookings').document(phone).get()
+                index = doc.to_dict() if doc.exists else {}
+    else:
+        index = _in_memory_storage['phone_bookings'].get(phone) or {}
+    
+    return set(index.get('booking_ids') or []) if index.get('complete') else None
+
+@traced("store.build_phone_index")
+def _build_phone_index(phone: str) -> set:
+    """Index a phone's upcoming bookings made before the index existed (once per phone)"""
+    today = datetime.now().strftime("%Y-%m-%d")
+    if is_firebase_connected() and get_firebase_client() != "REST_API":
+        with _firestore_breaker.guard():
+            docs = get_firebase_client().collection('bookings').where('phone', '==', phone).stream()
+            bookings = [{**doc.to_dict(), 'id': doc.id} for doc in docs]
+    else:
+        bookings = [b for b in get_all_bookings() if b.get('phone') == phone]
+    booking_ids = {
+        b.get('booking_id') or b['id'] for b in bookings
+        if b.get('date', '') >= today and b.get('status') != 'cancelled'
+    }
+    _update_phone_index(phone, add=sorted(booking_ids), complete=True)
+    return booking_ids
+
+@traced("store.save_customer_profile")
+def save_customer_profile(phone: str, fields: Dict):
+    """Merge fields into a customer's profile document (customers/{phone})"""
+    if is_firebase_connected():
+        with _firestore_breaker.guard():
+            client = get_firebase_client()
+        
+            if client == "REST_API":
+                mask = "&".join(f"updateMask.fieldPaths={key}" for key in fields)
+                response = requests.patch(
+                    f"{BASE_URL}/customers/{phone}?key={API_KEY}&{mask}",
+                    json={"fields": _to_firestore_fields(fields)},
+                    timeout=settings.FIRESTORE_REQUEST_TIMEOUT
+                )
+                if response.status_code not in [200, 201]:
+                    raise Exception(f"REST API failed with status {response.status_code}")
+            else:
+                client.collection('customers').document(phone).set(fields, merge=True)
+    else:
+        _in_memory_storage['customers'].setdefault(phone, {}).update(fields)
+
+@traced("store.get_customer_profile")
+def get_customer_profile(phone: str) -> Optional[Dict]:
+    """
+    Get a customer's profile document
+
+    Raises:
+        Exception: If the store could not be read (a missing profile returns None)
+    """
+    if is_firebase_connected():
+        with _firestore_breaker.guard():
+            client = get_firebase_client()
+        
+            if client == "REST_API":
+                response = requests.get(f"{BASE_URL}/customers/{phone}?key={API_KEY}", timeout=settings.FIRESTORE_REQUEST_TIMEOUT)
+                if response.status_code == 404:
+                    return None
+                if response.status_code != 200:
+                    raise Exception(f"REST API failed with status {response.status_code}")
+                return _from_firestore_fields(response.json().get('fields', {}))
+            
+            doc = client.collection('customers').document(phone).get()
+            return doc.to_dict() if doc.exists else None
+    
+    profile = _in_memory_storage['customers'].get(phone)
+    return dict(profile) if profile is not None else None
+
+@traced("store.get_upcoming_bookings")
+def get_upcoming_bookings(phone: str) -> Optional[List[Dict]]:
+    """
+    Get a phone's upcoming confirmed bookings, soonest first
+
+    Backed by the phone → booking ids index, so the cost depends on the
+    customer's own upcoming bookings, not on the size of the bookings
+    collection. Past and cancelled ids are pruned from the index as they
+    are found.
+
+    Returns:
+        List of bookings, or None if the store could not be read
+    """
+    try:
+        with _cache_lock:
+            cached = _phone_index_cache.get(phone)
+        if cached and cached[0] > time.monotonic():
+            booking_ids = set(cached[1])
+        else:
+            booking_ids = _load_phone_index(phone)
+            if booking_ids is None:
+                booking_ids = _build_phone_index(phone)
+            if _booking_journal is not None:
+                # Indexed in the store only once the journal replicates them
+                booking_ids.update(_booking_journal.pending_bookings_for_phone(phone))
+        
+        today = datetime.now().strftime("%Y-%m-%d")
+        upcoming, stale = [], []
+        for booking_id in booking_ids:
+            booking = get_booking(booking_id)
+            if booking and booking.get('status') != 'cancelled' and booking.get('date', '') >= today:
+                upcoming.append(booking)
+            else:
+                stale.append(booking_id)
+        if stale:
+            _update_phone_index(phone, remove=stale)
+        
+        with _cache_lock:
+            _phone_index_cache[phone] = (
+                time.monotonic() + settings.AVAILABILITY_CACHE_TTL,
+                {b['booking_id'] for b in upcoming}
+            )
+        
+        return sorted(upcoming, key=lambda b: (b['date'], datetime.strptime(b['time_slot'], "%I:%M %p")))
+        
+    except Exception as e:
+        logger.error(f"❌ Error getting upcoming bookings for {phone}: {str(e)}")
+        return None
+
+@traced("store.cancel_booking")
+def cancel_booking(booking_id: str) -> Dict[str, Any]:
+    """
+    Cancel a booking and free its slot
+
+    Idempotent across workers: the status flip is a conditional store
+    write, so when several calls race exactly one reports 'success' (and
+    notifies listeners); the others report 'already_cancelled'. While the
+    store is failing fast, a booking this process knows about is cancelled
+    through the journal when it is enabled.
+    """
+    try:
+        store_down = is_firebase_connected() and _firestore_breaker.is_open()
+        if store_down and _booking_journal is None:
+            return {'status': 'unavailable', 'message': settings.STORE_UNAVAILABLE_MESSAGE}
+        
+        fields = {'status': 'cancelled', 'cancelled_at': datetime.now().isoformat()}
+        journaled = False
+        with _cancel_lock:
+            pending = _booking_journal.pending_booking(booking_id) if _booking_journal is not None else None
+            if pending or store_down:
+                # Not in the store yet, or the store is down: journal the cancelled version so replay writes
+                # that instead (a booking never replicated gets no calendar event) and unindexes it
+                booking = _local_booking(booking_id)
+                if not booking:
+                    return {'status': 'unavailable', 'message': settings.STORE_UNAVAILABLE_MESSAGE}
+                if booking.get('status') == 'cancelled':
+                    return {'status': 'already_cancelled', 'booking': booking}
+                _booking_journal.append(booking_id, {**booking, **fields})
+                journaled = True
+        if not journaled:
+            booking, changed = _cancel_stored_booking(booking_id, fields)
+            if not booking:
+                return {'status': 'error', 'message': 'Booking not found'}
+            if not changed:
+                _remember_booking(booking)
+                return {'status': 'already_cancelled', 'booking': booking}
+        booking.update(fields)
+        _remember_booking(booking)
+        
+        # Free the slot in the availability cache right away
+        with _cache_lock:
+            cached = _booked_slots_cache.get((booking.get('barber_name'), booking.get('date')))
+            if cached:
+                cached[1].discard(booking.get('time_slot'))
+            indexed = _phone_index_cache.get(booking.get('phone'))
+            if indexed:
+                indexed[1].discard(booking_id)
+        if _slot_reservations is not None:
+            try:
+                _slot_reservations.release(booking_id)
+            except Exception as e:
+                # The slot stays blocked for new bookings until its date has passed
+                logger.warning(f"⚠️ Could not release the slot reservation of {booking_id}: {str(e)}")
+        if booking.get('phone') and not journaled:
+            try:
+                _update_phone_index(booking['phone'], remove=[booking_id])
+            except Exception as e:
+                # A stale index entry is pruned on the next lookup
+                logger.warning(f"⚠️ Could not remove {booking_id} from the phone index: {str(e)}")
+        
+        _notify_booking_listeners('cancelled', booking)
+        logger.info(f"🗑️ Booking {booking_id} cancelled")
+        return {'status': 'success', 'booking': booking}
+        
+    except Exception as e:
+        logger.error(f"❌ Error cancelling booking {booking_id}: {str(e)}")
+        return {'status': 'error', 'message': f'Failed to cancel booking: {str(e)}'}
+
+@traced("store.save_calendar_outbox_entry")
+def save_calendar_outbox_entry(entry_id: str, entry: Dict) -> bool:
+    """Create or overwrite a calendar outbox entry"""
+    try:
+        if is_firebase_connected():
+            with _firestore_breaker.guard():
+                client = get_firebase_client()
+            
+                if client == "REST_API":
+                    response = requests.patch(
+                        f"{BASE_URL}/calendar_outbox/{entry_id}?key={API_KEY}",
+                        json={"fields": _to_firestore_fields(entry)},
+                        timeout=settings.FIRESTORE_REQUEST_TIMEOUT
+                    )
+                    if response.status_code not in [200, 201]:
+                        raise Exception(f"REST API failed with status {response.status_code}")
+                else:
+                    client.collection('calendar_outbox').document(entry_id).set(entry)
+        else:
+            _in_memory_storage['calendar_outbox'][entry_id] = entry.copy()
+        return True
+        
+    except Exception as e:
+        logger.error(f"❌ Error saving calendar outbox entry {entry_id}: {str(e)}")
+        return False
+
+@traced("store.get_pending_calendar_outbox_entries")
+def get_pending_calendar_outbox_entries(limit: int) -> List[Dict]:
+    """Get outbox entries that are pending and due for an attempt, oldest first"""
+    now = time.time()
+    entries = []
+    try:
+        if is_firebase_connected():
+            with _firestore_breaker.guard():
+                client = get_firebase_client()
+            
+                if client == "REST_API":
+                    response = requests.get(f"{BASE_URL}/calendar_outbox?key={API_KEY}", timeout=settings.FIRESTORE_REQUEST_TIMEOUT)
+                    if response.status_code == 200:
+                        for doc in response.json().get('documents', []):
+                            entry = _from_firestore_fields(doc.get('fields', {}))
+                            entry['id'] = doc['name'].rsplit('/', 1)[-1]
+                            entries.append(entry)
+                else:
+                    query = client.collection('calendar_outbox').where('status', '==', 'pending')
+                    for doc in query.stream():
+                        entry = doc.to_dict()
+                        entry['id'] = doc.id
+                        entries.append(entry)
+        else:
+            for entry_id, entry in _in_memory_storage['calendar_outbox'].items():
+                entries.append({**entry, 'id': entry_id})
+        
+        due = [
+            e for e in entries
+            if e.get('status') == 'pending' and e.get('next_attempt_at', 0) <= now
+        ]
+        due.sort(key=lambda e: e.get('created_at', ''))
+        return due[:limit]
+        
+    except Exception as e:
+        logger.error(f"❌ Error getting calendar outbox entries: {str(e)}")
+        return []
+
 def _get_default_services():
-    """Get default services (empty when Firebase is not connected)"""
+    """Get default services (the last known catalog, or empty when there is none)"""
+    if _snapshot_catalog['services']:
+        logger.warning(f"⚠️ Store unavailable - serving {len(_snapshot_catalog['services'])} services from the catalog snapshot")
+        return list(_snapshot_catalog['services'])
     logger.warning("⚠️ No Firebase connection - no services available")
     return []
 
 def _get_default_barbers():
-    """Get default barbers (empty when Firebase is not connected)"""
+    """Get default barbers (the last known catalog, or empty when there is none)"""
+    if _snapshot_catalog['barbers']:
+        logger.warning(f"⚠️ Store unavailable - serving {len(_snapshot_catalog['barbers'])} barbers from the catalog snapshot")
+        return list(_snapshot_catalog['barbers'])
     logger.warning("⚠️ No Firebase connection - no barbers available")
     return []
 
@@ -606,7 +1805,7 @@ def init_default_data():
         barbers = get_all_barbers()
         
         if not services or not barbers:
-            logger.info("📝 No data found in Firebase - please add data through Firebase console or admin interface")
+            logger.info("📝 No data found in Firebase - please add data through Firebase console or `python -m app.data_cli import`")
             logger.info("💡 The system requires Firebase connection to function properly")
         else:
             logger.info(f"✅ Data already exists in Firebase: {len(services)} services, {len(barbers)} barbers")
@@ -616,6 +1815,3 @@ def init_default_data():
         logger.info("   1. A valid Firebase service account key file (firebase-key.json), OR")
         logger.info("   2. Google Cloud SDK configured with proper credentials")
         logger.info("   3. Data populated in your Firebase database")
-
-# Initialize Firebase connection on import
-initialize_firebase() 
\ No newline at end of file
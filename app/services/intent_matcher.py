@@ -0,0 +1,229 @@
+import re
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from app.services.firestore_simple import get_all_services, get_all_barbers
+
+logger = logging.getLogger(__name__)
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+REPEATS_RE = re.compile(r"(.)\1+")
+
+# Intent -> phrases; matched longest first, so "cancel my booking" beats "my booking"
+COMMAND_PHRASES = {
+    "greet": ["hi", "hello", "hey", "hiya", "hola", "good morning", "good afternoon", "good evening"],
+    "restart": ["restart", "start", "start over", "reset"],
+    "my_bookings": ["my bookings", "my booking", "bookings", "my appointments", "my appointment", "appointments"],
+    "rebook": ["rebook", "book again", "same again", "the usual"],
+    "cancel": ["cancel", "cancel booking", "cancel appointment", "cancel my booking", "cancel my appointment"]
+}
+
+# Date phrase -> days from today
+RELATIVE_DATES = {"today": 0, "tonight": 0, "tomorrow": 1, "tmrw": 1, "tmr": 1, "day after tomorrow": 2}
+
+WEEKDAYS = {
+    "monday": 0, "mon": 0,
+    "tuesday": 1, "tue": 1, "tues": 1,
+    "wednesday": 2, "wed": 2,
+    "thursday": 3, "thu": 3, "thur": 3, "thurs": 3,
+    "friday": 4, "fri": 4,
+    "saturday": 5, "sat": 5,
+    "sunday": 6, "sun": 6
+}
+
+# Common words that are never typo-corrected into a vocabulary word ("the" is not "tue")
+STOPWORDS = {
+    "the", "and", "for", "with", "can", "you", "get", "got", "want", "like", "please", "need",
+    "have", "what", "when", "next", "time", "this", "that", "some", "book", "appt", "would",
+    "could", "there", "they", "them", "then", "than", "thanks", "thank", "okay", "yes"
+}
+
+# Trie key holding the value of a complete phrase (never a token)
+TERMINAL = "$"
+
+# Words shorter than this are only matched exactly
+MIN_TYPO_LENGTH = 4
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """
+    Optimal string alignment distance (a transposition counts as one edit)
+
+    Returns limit + 1 as soon as the distance is known to exceed `limit`.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2, previous = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return previous[-1]
+
+def _max_edits(word: str) -> int:
+    return 1 if len(word) <= 5 else 2
+
+def _deletes(word: str, edits: int) -> Set[str]:
+    """Every string reachable from `word` by deleting up to `edits` characters"""
+    variants, frontier = {word}, {word}
+    for _ in range(edits):
+        frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))}
+        variants |= frontier
+    return variants
+
+class IntentMatcher:
+    """
+    Free-text matcher compiled from the catalog
+
+    Phrases (commands, service and barber names, date words) are compiled
+    into a word-level trie. A message is scanned left to right, taking the
+    longest phrase at each position, so matching is linear in the number
+    of words. A word that isn't in the vocabulary is corrected to the
+    nearest one within a bounded edit distance, looked up through a
+    precomputed deletion index rather than compared against every word.
+    """
+
+    def __init__(self, services: Iterable, barbers: Iterable):
+        self._trie: Dict = {}
+        self._vocabulary: Set[str] = set()
+        self._delete_index: Dict[str, Set[str]] = {}
+
+        for intent, phrases in COMMAND_PHRASES.items():
+            for phrase in phrases:
+                self._add(phrase, ("command", intent))
+        for phrase, days in RELATIVE_DATES.items():
+            self._add(phrase, ("days", days))
+        for phrase, weekday in WEEKDAYS.items():
+            self._add(phrase, ("weekday", weekday))
+        for barber in barbers:
+            self._add(barber.name.lower(), ("barber", barber.name))
+        services = list(services)
+        for service in services:
+            name = service.name.lower()
+            for phrase in {name, name.replace(" ", ""), service.id.lower().replace("_", " ")}:
+                self._add(phrase, ("service", service.id))
+        # A word found in only one service name ("trim", "beard") names that service on its own
+        owners: Dict[str, Set[str]] = {}
+        for service in services:
+            for word in TOKEN_RE.findall(service.name.lower()):
+                owners.setdefault(word, set()).add(service.id)
+        for word, service_ids in owners.items():
+            if len(service_ids) == 1 and word not in STOPWORDS:
+                self._add(word, ("service", next(iter(service_ids))))
+
+        for word in self._vocabulary:
+            if len(word) >= MIN_TYPO_LENGTH:
+                for variant in _deletes(word, _max_edits(word)):
+                    self._delete_index.setdefault(variant, set()).add(word)
+
+    def _add(self, phrase: str, value: Tuple[str, object]):
+        words = TOKEN_RE.findall(phrase)
+        if not words:
+            return
+        node = self._trie
+        for word in words:
+            node = node.setdefault(word, {})
+            self._vocabulary.add(word)
+        node.setdefault(TERMINAL, value)  # first registration of a phrase wins
+
+    def correct(self, token: str) -> Optional[str]:
+        """Map a token to a vocabulary word: exact, with repeated letters squeezed ("hiii"), or within the edit bound"""
+        if token in self._vocabulary:
+            return token
+        squeezed = REPEATS_RE.sub(r"\1", token)
+        if squeezed in self._vocabulary:
+            return squeezed
+        if len(token) < MIN_TYPO_LENGTH or token in STOPWORDS or token.isdigit():
+            return None
+
+        limit = _max_edits(token)
+        candidates = set()
+        for variant in _deletes(token, limit):
+            candidates |= self._delete_index.get(variant, set())
+        best, best_distance = None, limit + 1
+        for word in sorted(candidates):
+            distance = edit_distance(token, word, min(limit, _max_edits(word)))
+            if distance < best_distance:
+                best, best_distance = word, distance
+        return best
+
+    def match(self, text: str, today: datetime = None) -> Dict:
+        """
+        Extract intents from a message
+
+        Returns:
+            Dict with "command", "service_id", "barber_name" and "date" (YYYY-MM-DD),
+            each None when absent (the first mention of each wins), plus "corrections"
+            listing (typed, corrected) words
+        """
+        result = {"command": None, "service_id": None, "barber_name": None, "date": None, "corrections": []}
+        tokens = []
+        for token in TOKEN_RE.findall(text.lower()):
+            corrected = self.correct(token)
+            if corrected and corrected != token:
+                result["corrections"].append((token, corrected))
+            tokens.append(corrected)
+
+        i = 0
+        while i < len(tokens):
+            node, value, end = self._trie, None, i
+            for j in range(i, len(tokens)):
+                node = node.get(tokens[j])
+                if node is None:
+                    break
+                if TERMINAL in node:
+                    value, end = node[TERMINAL], j + 1
+            if value is None:
+                i += 1
+                continue
+            self._apply(result, value, today or datetime.now())
+            i = end
+        return result
+
+    @staticmethod
+    def _apply(result: Dict, value: Tuple[str, object], today: datetime):
+        kind, target = value
+        if kind == "command":
+            result["command"] = result["command"] or target
+        elif kind == "service":
+            result["service_id"] = result["service_id"] or target
+        elif kind == "barber":
+            result["barber_name"] = result["barber_name"] or target
+        elif result["date"] is None:
+            days = target if kind == "days" else (target - today.weekday()) % 7
+            result["date"] = (today + timedelta(days=days)).strftime("%Y-%m-%d")
+
+# Compiled matcher, rebuilt when the catalog changes
+_matcher: Optional[IntentMatcher] = None
+_matcher_version = None
+_compile_lock = threading.Lock()
+
+def _catalog_version(services: List, barbers: List) -> int:
+    return hash((
+        tuple((s.id, s.name) for s in services),
+        tuple(b.name for b in barbers)
+    ))
+
+def get_matcher() -> IntentMatcher:
+    """Get the matcher for the current catalog, compiling it on first use and after catalog changes"""
+    global _matcher, _matcher_version
+    services, barbers = get_all_services(), get_all_barbers()
+    version = _catalog_version(services, barbers)
+    if _matcher is None or version != _matcher_version:
+        with _compile_lock:
+            if _matcher is None or version != _matcher_version:
+                _matcher = IntentMatcher(services, barbers)
+                _matcher_version = version
+                logger.info(f"🧠 Intent matcher compiled: {len(_matcher._vocabulary)} words")
+    return _matcher
+
+def match_intent(text: str, today: datetime = None) -> Dict:
+    """Match free text against the current catalog (see IntentMatcher.match)"""
+    return get_matcher().match(text, today)
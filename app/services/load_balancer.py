@@ -0,0 +1,155 @@
+import heapq
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from app.config import get_settings
+from app.services.firestore_simple import (
+    get_all_barbers,
+    get_barbers_for_service,
+    get_bookings_in_range,
+    get_service,
+    add_booking_listener
+)
+from app.services.availability import is_slot_open
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Minutes assumed for a booking whose service is no longer in the catalog
+DEFAULT_BOOKING_MINUTES = 30
+
+class DailyLoadHeap:
+    """
+    Booked minutes per barber for one day, as a min-heap with lazy deletion
+
+    Updating a barber pushes a fresh (minutes, name) entry; entries whose
+    minutes no longer match `loads` are stale and skipped when popped.
+    """
+
+    def __init__(self, barbers: List[str]):
+        self.loads: Dict[str, int] = {name: 0 for name in barbers}
+        self.heap: List[Tuple[int, str]] = [(0, name) for name in barbers]
+        heapq.heapify(self.heap)
+
+    def add(self, barber_name: str, minutes: int):
+        """Add (or with negative minutes, remove) booked minutes for a barber"""
+        self.loads[barber_name] = max(0, self.loads.get(barber_name, 0) + minutes)
+        heapq.heappush(self.heap, (self.loads[barber_name], barber_name))
+        # Compact once stale entries dominate so the heap stays O(barbers)
+        if len(self.heap) > 4 * len(self.loads):
+            self.heap = [(load, name) for name, load in self.loads.items()]
+            heapq.heapify(self.heap)
+
+    def least_loaded(self, eligible) -> Optional[str]:
+        """
+        The least-loaded barber accepted by `eligible`, leaving the heap intact
+
+        Looks at the top and pops only stale entries (dropped) and
+        ineligible ones (pushed back afterwards), so a pick costs
+        O(k log n) for k entries skipped, not a pass over the whole heap.
+        """
+        skipped = []
+        chosen = None
+        while self.heap:
+            load, name = self.heap[0]
+            if self.loads.get(name) != load:
+                heapq.heappop(self.heap)  # stale entry
+            elif eligible(name):
+                chosen = name
+                break
+            else:
+                skipped.append(heapq.heappop(self.heap))
+        for entry in skipped:
+            heapq.heappush(self.heap, entry)
+        return chosen
+
+# date (YYYY-MM-DD) -> DailyLoadHeap
+_heaps: Dict[str, DailyLoadHeap] = {}
+_lock = threading.Lock()
+_loaded = False
+
+def _booking_minutes(booking_data: Dict) -> int:
+    """Get the duration recorded on a booking, or else from its service"""
+    if booking_data.get('duration') is not None:
+        return int(float(booking_data['duration']))
+    service = get_service(booking_data.get('service_id', ''))
+    return service.duration if service else DEFAULT_BOOKING_MINUTES
+
+def _prune_past_days():
+    """Drop the heaps of days before today; nobody books them any more"""
+    today = datetime.now().strftime("%Y-%m-%d")
+    for date_str in [d for d in _heaps if d < today]:
+        del _heaps[date_str]
+
+def _heap_for(date_str: str) -> DailyLoadHeap:
+    """Get the load heap for a day, seeding every barber at zero minutes"""
+    heap = _heaps.get(date_str)
+    if heap is None:
+        _prune_past_days()
+        heap = DailyLoadHeap([b.name for b in get_all_barbers()])
+        _heaps[date_str] = heap
+    return heap
+
+def _on_booking_event(event: str, booking_data: Dict):
+    """Keep barber loads current as bookings are created or cancelled"""
+    if booking_data['date'] < datetime.now().strftime("%Y-%m-%d"):
+        return
+    minutes = _booking_minutes(booking_data)
+    with _lock:
+        _heap_for(booking_data['date']).add(
+            booking_data['barber_name'],
+            minutes if event == 'booked' else -minutes
+        )
+
+def load_barber_loads(start: datetime = None):
+    """Seed barber loads from one bookings range query over the availability horizon"""
+    global _heaps, _loaded
+    start = start or datetime.now()
+    start_str = start.strftime("%Y-%m-%d")
+    end_str = (start + timedelta(days=settings.AVAILABILITY_HORIZON_DAYS - 1)).strftime("%Y-%m-%d")
+
+    bookings = get_bookings_in_range(start_str, end_str)
+    with _lock:
+        _heaps = {}
+        for booking in bookings:
+            if booking.get('status', 'confirmed') != 'cancelled':
+                _heap_for(booking['date']).add(booking['barber_name'], _booking_minutes(booking))
+        _loaded = True
+
+    add_booking_listener(_on_booking_event)
+    logger.info(f"⚖️ Barber loads loaded from {len(bookings)} bookings")
+
+def pick_least_loaded_barber(service_id: str, date_str: str, time_slot: str, exclude=()) -> Optional[str]:
+    """
+    Pick the least-loaded barber qualified for a service and free at a slot
+
+    The free-slot check uses this worker's availability matrix, which can
+    be up to AVAILABILITY_MATRIX_TTL seconds old, so it is only a hint:
+    book_slot has the final say, and when it finds the slot taken the
+    caller picks again with that barber in `exclude`.
+
+    Returns:
+        Barber name, or None if no qualified barber is free
+    """
+    if not _loaded:
+        load_barber_loads()
+
+    qualified = {b.name for b in get_barbers_for_service(service_id)}
+    passed = set(exclude)
+    while True:
+        with _lock:
+            candidate = _heap_for(date_str).least_loaded(lambda name: name in qualified and name not in passed)
+        if candidate is None:
+            return None
+        # Slot checks can hit the store, so they run without holding the lock
+        if is_slot_open(candidate, date_str, time_slot):
+            logger.info(f"⚖️ Assigned {candidate} for {service_id} on {date_str} at {time_slot}")
+            return candidate
+        passed.add(candidate)
+
+def get_load_stats() -> Dict:
+    """Get booked minutes per barber for each tracked day"""
+    with _lock:
+        return {date_str: dict(heap.loads) for date_str, heap in sorted(_heaps.items())}
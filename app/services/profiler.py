@@ -0,0 +1,193 @@
+import os
+import sys
+import time
+import itertools
+import logging
+import threading
+from collections import Counter
+from typing import Dict, List, Tuple
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Samples taken while the request's coroutine was suspended (awaiting I/O, or another task ran)
+AWAITING_FRAME = ("[awaiting]", "", 0)
+
+Frame = Tuple[str, str, int]  # (function, file, first line)
+
+_stacks: Counter = Counter()  # tuple of frames, root first -> samples
+_lock = threading.Lock()
+_request_counter = itertools.count(1)
+_stats = {"profiled_requests": 0, "samples": 0, "dropped_samples": 0, "started_at": time.time()}
+_frame_labels: Dict[object, Frame] = {}
+_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def _label(code) -> Frame:
+    """Frame label for a code object (cached: relpath is not free)"""
+    label = _frame_labels.get(code)
+    if label is None:
+        filename = code.co_filename
+        if filename.startswith(_root):
+            filename = os.path.relpath(filename, _root)
+        elif "site-packages" + os.sep in filename:
+            filename = filename.split("site-packages" + os.sep, 1)[1]
+        label = (code.co_name, filename, code.co_firstlineno)
+        _frame_labels[code] = label
+    return label
+
+class StackSampler:
+    """
+    Samples one thread's Python stack at a fixed interval from a helper thread
+
+    Only frames above `root_code` (the profiling middleware) are kept, so
+    samples show the request's own work. While the request is suspended on
+    an await the thread runs other code; those samples count as
+    "[awaiting]".
+    """
+
+    def __init__(self, thread_id: int, root_code, interval: float):
+        self.thread_id = thread_id
+        self.root_code = root_code
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profiler-sampler", daemon=True)
+
+    def _stack(self, frame) -> Tuple[Frame, ...]:
+        stack = []
+        while frame is not None:
+            if frame.f_code is self.root_code:
+                return tuple(reversed(stack))
+            stack.append(_label(frame.f_code))
+            frame = frame.f_back
+        return (AWAITING_FRAME,)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.samples[self._stack(frame)] += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self) -> Counter:
+        self._stop.set()
+        self._thread.join()
+        return self.samples
+
+def _record(samples: Counter):
+    """Merge one request's samples into the aggregate, bounded by PROFILER_MAX_STACKS distinct stacks"""
+    with _lock:
+        _stats["profiled_requests"] += 1
+        for stack, count in samples.items():
+            if stack in _stacks or len(_stacks) < settings.PROFILER_MAX_STACKS:
+                _stacks[stack] += count
+                _stats["samples"] += count
+            else:
+                _stats["dropped_samples"] += count
+
+class ProfilerMiddleware:
+    """
+    ASGI middleware profiling a sample of requests
+
+    When PROFILER_ENABLED is off (the default) a request costs one settings
+    lookup. When on, one in PROFILER_SAMPLE_EVERY requests to
+    PROFILER_PATHS, and any such request carrying an `X-Profile: 1` header
+    together with the admin token (`X-Admin-Token`), is sampled every
+    PROFILER_INTERVAL_MS.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if not settings.PROFILER_ENABLED or scope["type"] != "http" or not self._selected(scope):
+            await self.app(scope, receive, send)
+            return
+        await self._profiled(scope, receive, send)
+
+    @staticmethod
+    def _selected(scope) -> bool:
+        paths = [p.strip() for p in settings.PROFILER_PATHS.split(",") if p.strip()]
+        if not any(scope["path"].startswith(p) for p in paths):
+            return False
+        headers = scope.get("headers", [])
+        if (b"x-profile", b"1") in headers:
+            # Forcing a profile costs the worker; only admins may ask for it
+            token = next((value for name, value in headers if name == b"x-admin-token"), b"")
+            if settings.is_admin_token(token.decode("latin-1")):
+                return True
+        return next(_request_counter) % max(1, settings.PROFILER_SAMPLE_EVERY) == 0
+
+    async def _profiled(self, scope, receive, send):
+        sampler = StackSampler(threading.get_ident(), ProfilerMiddleware._profiled.__code__, settings.PROFILER_INTERVAL_MS / 1000)
+        sampler.start()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _record(sampler.stop())
+
+def _format_frame(frame: Frame) -> str:
+    name, filename, line = frame
+    return f"{name} ({filename}:{line})" if filename else name
+
+def collapsed_stacks() -> str:
+    """Aggregated samples in collapsed-stack format ("root;...;leaf count"), for flamegraph.pl and speedscope"""
+    with _lock:
+        items = sorted(_stacks.items(), key=lambda item: -item[1])
+    return "\n".join(f"{';'.join(_format_frame(f) for f in stack)} {count}" for stack, count in items) + "\n"
+
+def speedscope_profile() -> Dict:
+    """Aggregated samples as a speedscope file (https://www.speedscope.app/file-format-schema.json)"""
+    with _lock:
+        items = list(_stacks.items())
+    frame_index: Dict[Frame, int] = {}
+    frames: List[Dict] = []
+    samples, weights = [], []
+    for stack, count in items:
+        indices = []
+        for frame in stack:
+            if frame not in frame_index:
+                frame_index[frame] = len(frames)
+                name, filename, line = frame
+                frames.append({"name": name, "file": filename, "line": line} if filename else {"name": name})
+            indices.append(frame_index[frame])
+        samples.append(indices)
+        weights.append(count * settings.PROFILER_INTERVAL_MS)
+    return {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "shared": {"frames": frames},
+        "profiles": [{
+            "type": "sampled",
+            "name": f"Webhook profile (pid {os.getpid()}, {_stats['profiled_requests']} requests)",
+            "unit": "milliseconds",
+            "startValue": 0,
+            "endValue": sum(weights),
+            "samples": samples,
+            "weights": weights
+        }],
+        "exporter": "salon-booking-bot profiler",
+        "name": "webhook"
+    }
+
+def reset_profile():
+    """Discard aggregated samples"""
+    with _lock:
+        _stacks.clear()
+        _stats.update({"profiled_requests": 0, "samples": 0, "dropped_samples": 0, "started_at": time.time()})
+
+def get_profiler_stats() -> Dict:
+    """Get profiler settings and counters"""
+    with _lock:
+        stacks = len(_stacks)
+    return {
+        "enabled": settings.PROFILER_ENABLED,
+        "sample_every": settings.PROFILER_SAMPLE_EVERY,
+        "interval_ms": settings.PROFILER_INTERVAL_MS,
+        "paths": settings.PROFILER_PATHS,
+        "stacks": stacks,
+        **_stats
+    }
@@ -0,0 +1,220 @@
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from app.config import get_settings
+from app.services.circuit_breaker import get_breaker
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# check() result: (allowed, scope that throttled the message, whether to send the throttled reply)
+RateLimitResult = Tuple[bool, Optional[str], bool]
+
+class TokenBucket:
+    """Tokens refilled continuously at `rate` per second, capped at `burst`"""
+
+    __slots__ = ("tokens", "updated", "notified")
+
+    def __init__(self, burst: float, now: float):
+        self.tokens = burst
+        self.updated = now
+        self.notified = False
+
+    def refill(self, rate: float, burst: float, now: float):
+        self.tokens = min(burst, self.tokens + (now - self.updated) * rate)
+        self.updated = now
+
+class MemoryRateLimiter:
+    """
+    Per-phone and global token buckets held in process memory
+
+    Phone buckets are kept in least-recently-used order. Each check
+    evicts buckets idle longer than `idle_seconds` from the front, so
+    state and work per message stay O(1) amortized. A bucket idle that
+    long has refilled anyway, so eviction never forgives a sender early.
+    """
+
+    def __init__(self, phone_rate: float, phone_burst: int, global_rate: float, global_burst: int, idle_seconds: float):
+        self.phone_rate = phone_rate
+        self.phone_burst = phone_burst
+        self.global_rate = global_rate
+        self.global_burst = global_burst
+        self.idle_seconds = max(idle_seconds, phone_burst / phone_rate if phone_rate > 0 else idle_seconds)
+        self._buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        self._global = TokenBucket(global_burst, time.monotonic())
+        self._lock = threading.Lock()
+
+    def check(self, phone: str) -> RateLimitResult:
+        now = time.monotonic()
+        with self._lock:
+            while self._buckets:
+                oldest = next(iter(self._buckets.values()))
+                if now - oldest.updated <= self.idle_seconds:
+                    break
+                self._buckets.popitem(last=False)
+
+            bucket = self._buckets.get(phone)
+            if bucket is None:
+                bucket = TokenBucket(self.phone_burst, now)
+                self._buckets[phone] = bucket
+            else:
+                self._buckets.move_to_end(phone)
+            bucket.refill(self.phone_rate, self.phone_burst, now)
+            self._global.refill(self.global_rate, self.global_burst, now)
+
+            # Tokens are only taken when both buckets allow, so throttled spam doesn't drain the global bucket
+            if bucket.tokens < 1:
+                notify = not bucket.notified
+                bucket.notified = True
+                return False, "phone", notify
+            if self._global.tokens < 1:
+                return False, "global", False
+            bucket.tokens -= 1
+            bucket.notified = False
+            self._global.tokens -= 1
+            return True, None, False
+
+    def tracked(self) -> int:
+        return len(self._buckets)
+
+# Both buckets are refilled and charged atomically; returns 0 allowed, 1 phone-throttled
+# (first time), 2 phone-throttled (already told), 3 globally throttled
+_REDIS_SCRIPT = """
+local function refill(key, rate, burst, now)
+    local b = redis.call('HMGET', key, 'tokens', 'ts')
+    local tokens = tonumber(b[1]) or burst
+    local ts = tonumber(b[2]) or now
+    return math.min(burst, tokens + math.max(0, now - ts) * rate)
+end
+local now = tonumber(ARGV[1])
+local p = refill(KEYS[1], tonumber(ARGV[2]), tonumber(ARGV[3]), now)
+local g = refill(KEYS[2], tonumber(ARGV[4]), tonumber(ARGV[5]), now)
+local result = 0
+if p < 1 then
+    result = redis.call('HGET', KEYS[1], 'notified') and 2 or 1
+    redis.call('HSET', KEYS[1], 'notified', 1)
+elseif g < 1 then
+    result = 3
+else
+    p = p - 1
+    g = g - 1
+    redis.call('HDEL', KEYS[1], 'notified')
+end
+redis.call('HSET', KEYS[1], 'tokens', p, 'ts', now)
+redis.call('EXPIRE', KEYS[1], ARGV[6])
+redis.call('HSET', KEYS[2], 'tokens', g, 'ts', now)
+redis.call('EXPIRE', KEYS[2], ARGV[6])
+return result
+"""
+
+class RedisRateLimiter:
+    """Token buckets shared by every worker through Redis; idle buckets expire via key TTLs"""
+
+    def __init__(
+        self,
+        url: str,
+        phone_rate: float,
+        phone_burst: int,
+        global_rate: float,
+        global_burst: int,
+        idle_seconds: float,
+        timeout: float = 0.2
+    ):
+        import redis  # optional dependency, only needed for the shared backend
+
+        # Short timeouts so a slow Redis fails over to the local buckets instead of stalling the webhook
+        self.client = redis.Redis.from_url(url, socket_timeout=timeout, socket_connect_timeout=timeout)
+        self.script = self.client.register_script(_REDIS_SCRIPT)
+        self.args = [phone_rate, phone_burst, global_rate, global_burst, int(idle_seconds)]
+
+    def check(self, phone: str) -> RateLimitResult:
+        result = int(self.script(keys=[f"ratelimit:phone:{phone}", "ratelimit:global"], args=[time.time(), *self.args]))
+        if result == 0:
+            return True, None, False
+        if result == 3:
+            return False, "global", False
+        return False, "phone", result == 1
+
+    def tracked(self) -> Optional[int]:
+        return None
+
+_memory_limiter: Optional[MemoryRateLimiter] = None
+_shared_limiter: Optional[RedisRateLimiter] = None
+_shared_breaker = get_breaker("rate_limit_store")
+_init_lock = threading.Lock()
+_stats = {"allowed": 0, "throttled_phone": 0, "throttled_global": 0, "shared_backend_errors": 0}
+
+def _get_limiters() -> Tuple[MemoryRateLimiter, Optional[RedisRateLimiter]]:
+    """Create the limiters from settings on first use"""
+    global _memory_limiter, _shared_limiter
+    if _memory_limiter is None:
+        with _init_lock:
+            if _memory_limiter is None:
+                args = (
+                    settings.RATE_LIMIT_PHONE_RATE,
+                    settings.RATE_LIMIT_PHONE_BURST,
+                    settings.RATE_LIMIT_GLOBAL_RATE,
+                    settings.RATE_LIMIT_GLOBAL_BURST,
+                    settings.RATE_LIMIT_IDLE_SECONDS
+                )
+                if settings.RATE_LIMIT_BACKEND == "redis":
+                    try:
+                        _shared_limiter = RedisRateLimiter(
+                            settings.RATE_LIMIT_REDIS_URL, *args, timeout=settings.RATE_LIMIT_REDIS_TIMEOUT
+                        )
+                        logger.info("🚦 Rate limiting with the shared Redis backend")
+                    except Exception as e:
+                        logger.error(f"❌ Shared rate limit backend unavailable, limiting per worker: {str(e)}")
+                _memory_limiter = MemoryRateLimiter(*args)
+    return _memory_limiter, _shared_limiter
+
+def check_rate_limit(phone: str) -> RateLimitResult:
+    """
+    Charge one message against the phone's bucket and the global bucket
+
+    Uses the shared backend when configured, falling back to this worker's
+    in-memory buckets while the shared backend is failing. The shared check
+    is a blocking network call, so async callers should run it in a thread
+    when `uses_shared_backend()` is true.
+
+    Returns:
+        (allowed, throttling scope or None, whether to send the throttled reply)
+    """
+    if not settings.RATE_LIMIT_ENABLED:
+        return True, None, False
+
+    memory, shared = _get_limiters()
+    result = None
+    if shared is not None:
+        try:
+            with _shared_breaker.guard():
+                result = shared.check(phone)
+        except Exception as e:
+            _stats["shared_backend_errors"] += 1
+            logger.warning(f"⚠️ Shared rate limit check failed, using local buckets: {str(e)}")
+    if result is None:
+        result = memory.check(phone)
+
+    allowed, scope, _ = result
+    if allowed:
+        _stats["allowed"] += 1
+    else:
+        _stats[f"throttled_{scope}"] += 1
+    return result
+
+def uses_shared_backend() -> bool:
+    """Check if rate limit checks go over the network to the shared backend"""
+    return settings.RATE_LIMIT_ENABLED and _get_limiters()[1] is not None
+
+def get_rate_limit_stats() -> Dict:
+    """Get rate limiter counters"""
+    memory, shared = _get_limiters()
+    return {
+        **_stats,
+        "enabled": settings.RATE_LIMIT_ENABLED,
+        "backend": "redis" if shared is not None else "memory",
+        "tracked_phones": memory.tracked()
+    }
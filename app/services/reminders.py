@@ -0,0 +1,304 @@
+import time
+import heapq
+import logging
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from app.config import get_settings
+from app.services.file_lock import try_lock
+from app.services.whatsapp import send_reminder
+from app.services.firestore_simple import add_booking_listener, get_booking, get_bookings_in_range, update_booking
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# How often a non-leader worker checks whether it can take over sending reminders
+LEADER_POLL_SECONDS = 30
+
+# Reminders scheduled this long before a reload survive it (bookings still on their way to the store)
+LOAD_OVERLAP_SECONDS = 60
+
+class ReminderScheduler:
+    """
+    Reminders ordered by fire time in a min-heap
+
+    Scheduling and firing are O(log n). Cancelling only drops the entry
+    from a dict; its heap node is skipped when it surfaces, and the heap is
+    rebuilt once stale nodes outnumber live ones. The sending thread sleeps
+    until the earliest reminder is due, so an idle scheduler costs nothing.
+    """
+
+    def __init__(self):
+        self._heap: List[Tuple[float, int, str]] = []  # (fire_at, seq, key)
+        self._entries: Dict[str, Tuple[float, Dict, float]] = {}  # key -> (fire_at, reminder, scheduled_at)
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+
+    def schedule(self, key: str, fire_at: float, reminder: Dict):
+        """Add or reschedule a reminder (epoch seconds)"""
+        with self._cond:
+            self._entries[key] = (fire_at, reminder, time.monotonic())
+            heapq.heappush(self._heap, (fire_at, next(self._seq), key))
+            if self._heap[0][2] == key:
+                self._cond.notify()  # new earliest reminder: shorten the sleep
+
+    def cancel(self, key: str) -> bool:
+        with self._cond:
+            removed = self._entries.pop(key, None) is not None
+            if len(self._heap) > 1024 and len(self._heap) > 2 * len(self._entries):
+                self._rebuild()
+            return removed
+
+    def replace_all(self, reminders: Dict[str, Tuple[float, Dict]], keep_since: float = None):
+        """
+        Swap in a complete set of reminders (O(n) heapify)
+
+        Reminders scheduled at or after `keep_since` (monotonic) are kept even
+        if missing from `reminders`, so a booking that had not reached the
+        store when it was read isn't dropped.
+        """
+        now = time.monotonic()
+        with self._cond:
+            entries = {key: (fire_at, reminder, now) for key, (fire_at, reminder) in reminders.items()}
+            if keep_since is not None:
+                for key, entry in self._entries.items():
+                    if entry[2] >= keep_since and key not in entries:
+                        entries[key] = entry
+            self._entries = entries
+            self._rebuild()
+            self._cond.notify()
+
+    def _rebuild(self):
+        self._heap = [(entry[0], next(self._seq), key) for key, entry in self._entries.items()]
+        heapq.heapify(self._heap)
+
+    def pop_due(self, now: float, limit: int) -> List[Tuple[str, float, Dict]]:
+        """Remove and return up to `limit` reminders due at `now`"""
+        due = []
+        with self._cond:
+            while self._heap and self._heap[0][0] <= now and len(due) < limit:
+                fire_at, _, key = heapq.heappop(self._heap)
+                entry = self._entries.get(key)
+                if entry is None or entry[0] != fire_at:
+                    continue  # cancelled or rescheduled
+                del self._entries[key]
+                due.append((key, fire_at, entry[1]))
+        return due
+
+    def wait(self, timeout: float):
+        """Sleep until the earliest reminder is due, something is scheduled earlier, or `timeout`"""
+        with self._cond:
+            if self._heap:
+                timeout = min(timeout, max(0.0, self._heap[0][0] - time.time()))
+            if timeout > 0:
+                self._cond.wait(timeout)
+
+    def wake(self):
+        with self._cond:
+            self._cond.notify_all()
+
+    def next_fire_at(self) -> Optional[float]:
+        with self._cond:
+            while self._heap and self._entries.get(self._heap[0][2], (None,))[0] != self._heap[0][0]:
+                heapq.heappop(self._heap)
+            return self._heap[0][0] if self._heap else None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+_scheduler = ReminderScheduler()
+_worker_thread: Optional[threading.Thread] = None
+_stop_event = threading.Event()
+_leader = threading.Event()
+
+_stats = {
+    "scheduled": 0,
+    "sent": 0,
+    "failed": 0,
+    "retried": 0,
+    "expired": 0,
+    "cancelled": 0,
+    "skipped": 0,  # bookings found cancelled or gone when their reminder came due
+    "last_load_at": None
+}
+
+def get_reminder_offsets() -> List[float]:
+    """Hours before an appointment that reminders go out, from REMINDER_OFFSETS_HOURS"""
+    return sorted({float(h) for h in settings.REMINDER_OFFSETS_HOURS.split(",") if h.strip()}, reverse=True)
+
+def _label(hours: float) -> str:
+    return f"{hours:g}h"
+
+def _sent_field(label: str) -> str:
+    """Booking field recording when a reminder went out, e.g. reminder_24h_sent_at"""
+    return f"reminder_{label.replace('.', '_')}_sent_at"
+
+def _reminders_for(booking: Dict, earliest: float) -> Dict[str, Tuple[float, Dict]]:
+    """Reminders still to send for a booking, keyed '<booking_id>:<label>'"""
+    booking_id = booking.get('booking_id') or booking.get('id')
+    if not booking_id or booking.get('status', 'confirmed') == 'cancelled':
+        return {}
+    try:
+        starts_at = datetime.strptime(f"{booking['date']} {booking['time_slot']}", "%Y-%m-%d %I:%M %p")
+    except (KeyError, ValueError):
+        return {}
+
+    reminders = {}
+    for hours in get_reminder_offsets():
+        label = _label(hours)
+        fire_at = starts_at.timestamp() - hours * 3600
+        if booking.get(_sent_field(label)) or fire_at < earliest:
+            continue
+        reminders[f"{booking_id}:{label}"] = (fire_at, {
+            "booking_id": booking_id,
+            "label": label,
+            "hours": hours,
+            "phone": booking.get('phone', ''),
+            "barber_name": booking.get('barber_name', ''),
+            "service_name": booking.get('service_name', ''),
+            "starts_at": starts_at.isoformat()
+        })
+    return reminders
+
+def _on_booking_event(event: str, booking_data: Dict):
+    """Schedule reminders for new bookings and drop them for cancelled ones"""
+    if not _leader.is_set():
+        return
+    if event == 'booked':
+        # A reminder whose time has already passed (booked at short notice) is not sent
+        for key, (fire_at, reminder) in _reminders_for(booking_data, time.time()).items():
+            _scheduler.schedule(key, fire_at, reminder)
+            _stats["scheduled"] += 1
+    elif event == 'cancelled':
+        booking_id = booking_data.get('booking_id') or booking_data.get('id')
+        for hours in get_reminder_offsets():
+            if _scheduler.cancel(f"{booking_id}:{_label(hours)}"):
+                _stats["cancelled"] += 1
+
+def load_reminders() -> int:
+    """
+    Rebuild the schedule from upcoming bookings
+
+    Reminders that came due while no process was sending (a restart, a
+    worker hand-over) still go out if they are less than
+    REMINDER_GRACE_SECONDS late.
+    """
+    loading_since = time.monotonic() - LOAD_OVERLAP_SECONDS
+    now = datetime.now()
+    earliest = now.timestamp() - settings.REMINDER_GRACE_SECONDS
+    reminders = {}
+    for booking in get_bookings_in_range(now.strftime("%Y-%m-%d"), "9999-12-31"):
+        reminders.update(_reminders_for(booking, earliest))
+    _scheduler.replace_all(reminders, keep_since=loading_since)
+    _stats["last_load_at"] = now.isoformat()
+    logger.info(f"⏰ {len(reminders)} reminders scheduled")
+    return len(reminders)
+
+def _retry_later(key: str, reminder: Dict):
+    """Reschedule a reminder that could not go out, unless the appointment starts first"""
+    retry_at = time.time() + settings.REMINDER_RETRY_SECONDS
+    if retry_at < datetime.fromisoformat(reminder["starts_at"]).timestamp():
+        _scheduler.schedule(key, retry_at, reminder)
+        _stats["retried"] += 1
+    else:
+        _stats["failed"] += 1
+
+def _fire(key: str, fire_at: float, reminder: Dict, slots: threading.BoundedSemaphore):
+    """Send one reminder and record it on the booking; retry later if the send fails"""
+    try:
+        if time.time() - fire_at > settings.REMINDER_GRACE_SECONDS:
+            _stats["expired"] += 1
+            return
+        # Cancellations made on other workers only reach this schedule on the next reload
+        try:
+            booking = get_booking(reminder["booking_id"])
+        except Exception as e:
+            logger.warning(f"⚠️ Could not check booking {reminder['booking_id']} before its reminder: {str(e)}")
+            _retry_later(key, reminder)
+            return
+        if not booking or booking.get('status') == 'cancelled':
+            _stats["skipped"] += 1
+            return
+        if send_reminder(reminder["phone"], reminder["barber_name"], reminder["starts_at"], reminder["service_name"]):
+            _stats["sent"] += 1
+            update_booking(reminder["booking_id"], {_sent_field(reminder["label"]): datetime.now().isoformat()})
+            return
+        _retry_later(key, reminder)
+    except Exception as e:
+        _stats["failed"] += 1
+        logger.error(f"❌ Reminder {key} failed: {str(e)}")
+    finally:
+        slots.release()
+
+def _worker_loop(lock_path: Optional[str] = None):
+    """Send reminders as they come due; with a lock path, only while holding that lock"""
+    logger.info("⏰ Reminder worker started")
+    lock_file = None
+    slots = threading.BoundedSemaphore(settings.REMINDER_MAX_CONCURRENCY)
+    executor = ThreadPoolExecutor(max_workers=settings.REMINDER_MAX_CONCURRENCY, thread_name_prefix="reminder")
+    next_load = 0.0
+    while not _stop_event.is_set():
+        if lock_path and lock_file is None:
+            # Another worker process sends reminders; check again later
+            lock_file = try_lock(lock_path)
+            if lock_file is None:
+                _stop_event.wait(LEADER_POLL_SECONDS)
+                continue
+            logger.info("⏰ This process now sends reminders")
+        if not _leader.is_set():
+            _leader.set()
+            next_load = 0.0
+        # Bookings made on other workers only reach this process through a reload
+        if time.monotonic() >= next_load:
+            try:
+                load_reminders()
+            except Exception as e:
+                logger.error(f"❌ Error loading reminders: {str(e)}")
+            next_load = time.monotonic() + (settings.REMINDER_RESYNC_INTERVAL if lock_path else float("inf"))
+
+        for key, fire_at, reminder in _scheduler.pop_due(time.time(), settings.REMINDER_MAX_CONCURRENCY):
+            slots.acquire()  # bounded concurrency: wait for a free sender
+            executor.submit(_fire, key, fire_at, reminder, slots)
+        _scheduler.wait(min(next_load - time.monotonic(), 3600.0))
+
+    executor.shutdown(wait=True)
+    _leader.clear()
+    if lock_file is not None:
+        lock_file.close()
+    logger.info("⏰ Reminder worker stopped")
+
+def start_reminder_worker(lock_path: Optional[str] = None):
+    """
+    Start the reminder worker (no-op if already running)
+
+    Args:
+        lock_path: When several worker processes run, only the one holding this file lock sends reminders
+    """
+    global _worker_thread
+    if _worker_thread and _worker_thread.is_alive():
+        return
+    add_booking_listener(_on_booking_event)
+    _stop_event.clear()
+    _worker_thread = threading.Thread(target=_worker_loop, args=(lock_path,), name="reminders", daemon=True)
+    _worker_thread.start()
+
+def stop_reminder_worker(timeout: float = 10.0):
+    """Stop the reminder worker"""
+    _stop_event.set()
+    _scheduler.wake()
+    if _worker_thread:
+        _worker_thread.join(timeout)
+
+def get_reminder_stats() -> Dict:
+    """Get reminder scheduler statistics"""
+    next_fire_at = _scheduler.next_fire_at()
+    return {
+        **_stats,
+        "pending": len(_scheduler),
+        "next_fire_at": datetime.fromtimestamp(next_fire_at).isoformat() if next_fire_at else None,
+        "leader": _leader.is_set(),
+        "worker_running": bool(_worker_thread and _worker_thread.is_alive())
+    }
@@ -0,0 +1,227 @@
+import re
+import logging
+import threading
+from datetime import date, timedelta
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+WEEKDAY_NAMES = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+DAY_ABBREVIATIONS = {name[:3]: index for index, name in enumerate(WEEKDAY_NAMES)}
+
+DEFAULT_HOURS = "mon-sun 09:00-17:00"
+
+# Blackout entry meaning the whole salon is closed that day
+SALON_CLOSED = "*"
+
+# Longest date range accepted in a closure or day-off entry
+MAX_RANGE_DAYS = 366
+
+INTERVAL_RE = re.compile(r"^(\d{1,2}):(\d{2})-(\d{1,2}):(\d{2})$")
+
+Interval = Tuple[int, int]  # minutes since midnight, end exclusive
+
+def _interval(text: str) -> Interval:
+    match = INTERVAL_RE.match(text)
+    if not match:
+        raise ValueError(f"Bad time range '{text}' (expected HH:MM-HH:MM)")
+    h1, m1, h2, m2 = (int(g) for g in match.groups())
+    start, end = h1 * 60 + m1, h2 * 60 + m2
+    if m1 > 59 or m2 > 59 or not 0 <= start < end <= 24 * 60:
+        raise ValueError(f"Bad time range '{text}'")
+    return start, end
+
+def _weekdays(text: str) -> List[int]:
+    """'mon', 'mon-fri' or 'mon,wed,fri' -> weekday numbers"""
+    days = []
+    for part in text.split(","):
+        first, _, last = part.strip().partition("-")
+        try:
+            start, end = DAY_ABBREVIATIONS[first[:3]], DAY_ABBREVIATIONS[(last or first)[:3]]
+        except KeyError:
+            raise ValueError(f"Bad weekday '{part.strip()}'")
+        days.extend((start + i) % 7 for i in range((end - start) % 7 + 1))
+    return days
+
+def parse_hours(spec: str) -> Dict[int, List[Interval]]:
+    """
+    Parse a weekly schedule such as "mon-fri 09:00-17:00; sat 10:00-13:00 14:00-18:00; sun closed"
+
+    Returns:
+        Dict of weekday (0 = Monday) -> sorted intervals; weekdays not named are absent
+    """
+    hours: Dict[int, List[Interval]] = {}
+    for entry in filter(None, (e.strip().lower() for e in spec.split(";"))):
+        days, _, ranges = entry.partition(" ")
+        if not ranges.strip():
+            raise ValueError(f"No hours in '{entry}'")
+        intervals = [] if ranges.strip() == "closed" else [_interval(r) for r in ranges.split()]
+        for day in _weekdays(days):
+            hours[day] = sorted(intervals)
+    return hours
+
+def parse_breaks(entries: Iterable[str]) -> Dict[int, List[Interval]]:
+    """Parse breaks: "12:00-13:00" (every day) or "fri 12:00-13:00" -> weekday -> intervals"""
+    breaks: Dict[int, List[Interval]] = {}
+    for entry in filter(None, (e.strip().lower() for e in entries)):
+        days, _, ranges = entry.rpartition(" ")
+        interval = _interval(ranges)
+        for day in (_weekdays(days) if days else range(7)):
+            breaks.setdefault(day, []).append(interval)
+    return breaks
+
+def parse_dates(entries: Iterable[str]) -> Set[str]:
+    """Parse dates: "2026-12-25" or a range "2026-12-24..2026-12-26" -> YYYY-MM-DD strings"""
+    dates = set()
+    for entry in filter(None, (e.strip() for e in entries)):
+        first, _, last = entry.partition("..")
+        start, end = date.fromisoformat(first.strip()), date.fromisoformat((last or first).strip())
+        if not 0 <= (end - start).days < MAX_RANGE_DAYS:
+            raise ValueError(f"Bad date range '{entry}'")
+        dates.update((start + timedelta(days=i)).isoformat() for i in range((end - start).days + 1))
+    return dates
+
+def _intersect(a: List[Interval], b: List[Interval]) -> List[Interval]:
+    return [(max(s1, s2), min(e1, e2)) for s1, e1 in a for s2, e2 in b if max(s1, s2) < min(e1, e2)]
+
+def _slot_starts(intervals: List[Interval], breaks: List[Interval], slot_minutes: int) -> List[int]:
+    """Slot start minutes fitting inside the intervals without overlapping a break"""
+    starts = []
+    for start, end in intervals:
+        for minute in range(start, end - slot_minutes + 1, slot_minutes):
+            if all(minute + slot_minutes <= b_start or minute >= b_end for b_start, b_end in breaks):
+                starts.append(minute)
+    return starts
+
+def format_slot(minute: int) -> str:
+    """Minutes since midnight -> slot label ("09:30 AM")"""
+    hour, minute = divmod(minute, 60)
+    return f"{hour % 12 or 12:02d}:{minute:02d} {'AM' if hour < 12 else 'PM'}"
+
+class Schedule:
+    """
+    Compiled salon and barber schedules
+
+    Business hours, each barber's working days, hours and breaks are
+    compiled into one immutable slot template per (barber, weekday), and
+    salon closures and barber days off into a blackout index by date. The
+    slots a barber offers on a date are then two dict lookups.
+    """
+
+    def __init__(self, salon_hours: Dict[int, List[Interval]], closed_dates: Set[str], barbers: Iterable, slot_minutes: int):
+        self.slot_minutes = slot_minutes
+        self._salon: Dict[int, Tuple[str, ...]] = {}
+        self._windows: Dict[Tuple[Optional[str], int], Interval] = {}
+        self._templates: Dict[Tuple[str, int], Tuple[str, ...]] = {}
+        self._blackouts: Dict[str, FrozenSet[str]] = {}
+        minutes_by_label: Dict[str, int] = {}
+
+        for weekday in range(7):
+            starts = _slot_starts(salon_hours.get(weekday, []), [], slot_minutes)
+            self._add(None, weekday, starts, minutes_by_label)
+
+        days_off: Dict[str, Set[str]] = {day: {SALON_CLOSED} for day in closed_dates}
+        for barber in barbers:
+            try:
+                own_hours = parse_hours(barber.hours) if barber.hours else {}
+                breaks = parse_breaks(barber.breaks)
+                for day in parse_dates(barber.days_off):
+                    days_off.setdefault(day, set()).add(barber.name)
+            except ValueError as e:
+                logger.warning(f"⚠️ Ignoring invalid schedule for {barber.name}: {str(e)}")
+                own_hours, breaks = {}, {}
+            working = {WEEKDAY_NAMES.index(d.lower()) for d in barber.working_days if d.lower() in WEEKDAY_NAMES}
+            for weekday in range(7):
+                intervals = salon_hours.get(weekday, []) if weekday in working else []
+                if weekday in own_hours:
+                    # A barber's own hours never extend past the salon's
+                    intervals = _intersect(own_hours[weekday], intervals)
+                starts = _slot_starts(intervals, breaks.get(weekday, []), slot_minutes)
+                self._add(barber.name, weekday, starts, minutes_by_label)
+
+        self._blackouts = {day: frozenset(names) for day, names in days_off.items()}
+        # Every slot any template uses, in time order (the availability matrix's slot axis)
+        self.grid: Tuple[str, ...] = tuple(sorted(minutes_by_label, key=minutes_by_label.get))
+        self.minute_of: Dict[str, int] = minutes_by_label
+
+    def _add(self, barber_name: Optional[str], weekday: int, starts: List[int], minutes_by_label: Dict[str, int]):
+        labels = tuple(format_slot(m) for m in starts)
+        for label, minute in zip(labels, starts):
+            minutes_by_label[label] = minute
+        if barber_name is None:
+            self._salon[weekday] = labels
+        else:
+            self._templates[(barber_name, weekday)] = labels
+        if starts:
+            self._windows[(barber_name, weekday)] = (starts[0], starts[-1] + self.slot_minutes)
+
+    def _weekday(self, barber_name: Optional[str], date_str: str) -> Optional[int]:
+        """Weekday of a date, or None when the salon or the barber is blacked out"""
+        off = self._blackouts.get(date_str)
+        if off and (SALON_CLOSED in off or barber_name in off):
+            return None
+        return date.fromisoformat(date_str).weekday()
+
+    def slots_for(self, barber_name: Optional[str], date_str: str) -> Tuple[str, ...]:
+        """
+        Slots a barber works on a date (the salon's slots when barber_name is None)
+
+        A barber missing from the compiled catalog gets the salon's slots.
+        """
+        weekday = self._weekday(barber_name, date_str)
+        if weekday is None:
+            return ()
+        if barber_name is not None and (barber_name, weekday) in self._templates:
+            return self._templates[(barber_name, weekday)]
+        return self._salon[weekday]
+
+    def window(self, barber_name: Optional[str], date_str: str) -> Optional[Interval]:
+        """(first slot start, last slot end) in minutes, or None on a day off"""
+        weekday = self._weekday(barber_name, date_str)
+        if weekday is None:
+            return None
+        key = (barber_name, weekday) if (barber_name, weekday) in self._templates else (None, weekday)
+        return self._windows.get(key)
+
+    def capacity_minutes(self, barber_name: Optional[str], date_str: str) -> int:
+        """Bookable minutes on a date"""
+        return len(self.slots_for(barber_name, date_str)) * self.slot_minutes
+
+    def closed_dates(self) -> List[str]:
+        """Dates the whole salon is closed"""
+        return sorted(day for day, names in self._blackouts.items() if SALON_CLOSED in names)
+
+def compile_schedule(barbers: Iterable) -> Schedule:
+    """Compile the configured business hours, closures and barber schedules"""
+    try:
+        salon_hours = parse_hours(settings.BUSINESS_HOURS)
+    except ValueError as e:
+        logger.error(f"❌ Invalid BUSINESS_HOURS ({str(e)}) - using {DEFAULT_HOURS}")
+        salon_hours = parse_hours(DEFAULT_HOURS)
+    try:
+        closed = parse_dates(settings.CLOSED_DATES.split(","))
+    except ValueError as e:
+        logger.error(f"❌ Invalid CLOSED_DATES ({str(e)}) - ignoring closures")
+        closed = set()
+    return Schedule(salon_hours, closed, barbers, settings.SLOT_MINUTES)
+
+# Compiled schedule, rebuilt when the barber catalog or the schedule settings change
+_schedule: Optional[Schedule] = None
+_schedule_key: Tuple = ()
+_compile_lock = threading.Lock()
+
+def compiled_schedule(barbers: List) -> Schedule:
+    """Get the schedule compiled for these barbers, compiling it on first use and after changes"""
+    global _schedule, _schedule_key
+    # Catalog reloads create new Barber objects; the compiled key holds the old ones, so ids can't be reused
+    key = (tuple(barbers), tuple(map(id, barbers)), settings.BUSINESS_HOURS, settings.CLOSED_DATES, settings.SLOT_MINUTES)
+    if _schedule is None or key[1:] != _schedule_key[1:]:
+        with _compile_lock:
+            if _schedule is None or key[1:] != _schedule_key[1:]:
+                _schedule = compile_schedule(barbers)
+                _schedule_key = key
+                logger.info(f"🗓️ Schedule compiled: {len(barbers)} barbers, {len(_schedule.grid)} slots in the grid")
+    return _schedule
@@ -0,0 +1,98 @@
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from typing import Dict, Optional
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+class MemorySessionStore:
+    """Conversation sessions held in this process (single worker)"""
+
+    def __init__(self):
+        self._sessions: Dict[str, Dict] = {}
+
+    def load(self, phone: str) -> Optional[Dict]:
+        return self._sessions.get(phone)
+
+    def save(self, phone: str, session: Dict):
+        self._sessions[phone] = session
+
+    def delete(self, phone: str):
+        self._sessions.pop(phone, None)
+
+    def count(self) -> int:
+        return len(self._sessions)
+
+class SQLiteSessionStore:
+    """
+    Conversation sessions in a local SQLite file shared by every worker process
+
+    Webhook requests from the same customer can land on any worker, so
+    session state has to live outside the process. WAL mode lets workers
+    read while another writes. Sessions idle longer than `ttl` seconds are
+    purged.
+    """
+
+    def __init__(self, path: str, ttl: int):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._last_purge = 0.0
+        self._conn = None
+        self._pid = None
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """Connection for this process; opened lazily so a pre-forked worker never reuses the master's"""
+        if self._conn is None or self._pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS sessions (phone TEXT PRIMARY KEY, data TEXT NOT NULL, updated_at REAL NOT NULL)"
+            )
+            self._conn, self._pid = conn, os.getpid()
+        return self._conn
+
+    def load(self, phone: str) -> Optional[Dict]:
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT data FROM sessions WHERE phone = ? AND updated_at > ?", (phone, time.time() - self.ttl)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save(self, phone: str, session: Dict):
+        now = time.time()
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO sessions (phone, data, updated_at) VALUES (?, ?, ?)",
+                (phone, json.dumps(session), now)
+            )
+            if now - self._last_purge > 60:
+                self.conn.execute("DELETE FROM sessions WHERE updated_at <= ?", (now - self.ttl,))
+                self._last_purge = now
+
+    def delete(self, phone: str):
+        with self._lock:
+            self.conn.execute("DELETE FROM sessions WHERE phone = ?", (phone,))
+
+    def count(self) -> int:
+        with self._lock:
+            return self.conn.execute(
+                "SELECT COUNT(*) FROM sessions WHERE updated_at > ?", (time.time() - self.ttl,)
+            ).fetchone()[0]
+
+def create_session_store():
+    """Create the session store selected by SESSION_STORE"""
+    if settings.SESSION_STORE == "sqlite":
+        logger.info(f"💬 Sessions shared across workers in {settings.SESSION_DB_PATH}")
+        return SQLiteSessionStore(settings.SESSION_DB_PATH, settings.SESSION_TTL)
+    return MemorySessionStore()
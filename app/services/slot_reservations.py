@@ -0,0 +1,87 @@
+import os
+import time
+import sqlite3
+import logging
+import threading
+from datetime import datetime
+from typing import List
+
+logger = logging.getLogger(__name__)
+
+class SlotReservations:
+    """
+    Slots claimed by journaled bookings, in a SQLite file shared by every worker process
+
+    Each worker journals its own bookings, and a booking waiting to be
+    replicated is invisible to the other workers' journals. Before
+    journaling a booking, a worker claims its slot here: the INSERT on the
+    (barber, date, slot) primary key lets exactly one booking hold a slot,
+    and every worker sees it as taken until the booking is cancelled or
+    its date has passed.
+    """
+
+    def __init__(self, path: str):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._last_purge = 0.0
+        self._conn = None
+        self._pid = None
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """Connection for this process; opened lazily so a pre-forked worker never reuses the master's"""
+        if self._conn is None or self._pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS reservations ("
+                "barber_name TEXT NOT NULL, date TEXT NOT NULL, time_slot TEXT NOT NULL, booking_id TEXT NOT NULL, "
+                "PRIMARY KEY (barber_name, date, time_slot))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS reservations_booking ON reservations (booking_id)")
+            self._conn, self._pid = conn, os.getpid()
+        return self._conn
+
+    def reserve(self, barber_name: str, date_str: str, time_slot: str, booking_id: str) -> bool:
+        """
+        Claim a slot for a booking
+
+        Returns:
+            True if the booking holds the slot (also when it already did), False if another booking does
+        """
+        now = time.time()
+        with self._lock:
+            if now - self._last_purge > 60:
+                self.conn.execute("DELETE FROM reservations WHERE date < ?", (datetime.now().strftime("%Y-%m-%d"),))
+                self._last_purge = now
+            inserted = self.conn.execute(
+                "INSERT OR IGNORE INTO reservations (barber_name, date, time_slot, booking_id) VALUES (?, ?, ?, ?)",
+                (barber_name, date_str, time_slot, booking_id)
+            ).rowcount
+            if inserted:
+                return True
+            row = self.conn.execute(
+                "SELECT booking_id FROM reservations WHERE barber_name = ? AND date = ? AND time_slot = ?",
+                (barber_name, date_str, time_slot)
+            ).fetchone()
+        return bool(row) and row[0] == booking_id
+
+    def release(self, booking_id: str):
+        """Free the slot held by a booking (no-op if it holds none)"""
+        with self._lock:
+            self.conn.execute("DELETE FROM reservations WHERE booking_id = ?", (booking_id,))
+
+    def reserved_slots(self, barber_name: str, date_str: str) -> List[str]:
+        """Slots held for a barber on a date, by any worker"""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT time_slot FROM reservations WHERE barber_name = ? AND date = ?", (barber_name, date_str)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def count(self) -> int:
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM reservations").fetchone()[0]
@@ -0,0 +1,267 @@
+import os
+import re
+import json
+import time
+import queue
+import logging
+import threading
+import functools
+import contextvars
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+import requests
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+TRACE_ID_RE = re.compile(r"^[0-9a-f]{32}$")
+TRACEPARENT_RE = re.compile(r"^[0-9a-f]{2}-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$")
+
+class Span:
+    """One timed operation in a trace"""
+
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "start_ns", "end_ns", "attributes", "error")
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], attributes: Dict):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.attributes = attributes
+        self.error = None
+
+    def set_attribute(self, key: str, value):
+        self.attributes[key] = value
+
+    @property
+    def traceparent(self) -> str:
+        """W3C traceparent header value for calls made inside this span"""
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    def to_dict(self) -> Dict:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "duration_ms": round((self.end_ns - self.start_ns) / 1e6, 3),
+            "attributes": self.attributes,
+            "error": self.error
+        }
+
+_current_span: contextvars.ContextVar = contextvars.ContextVar("current_span", default=None)
+_queue: "queue.Queue[Span]" = queue.Queue(maxsize=max(1, settings.TRACING_QUEUE_SIZE))
+_exporter_thread: Optional[threading.Thread] = None
+_stop_event = threading.Event()
+_stats = {"spans": 0, "dropped": 0, "exported": 0, "export_failures": 0, "batches": 0}
+
+def parse_trace_context(trace_id: str = None, traceparent: str = None) -> tuple:
+    """
+    Get (trace_id, parent_span_id) from a bridge-supplied trace id or a W3C traceparent header
+
+    Invalid or missing values give (None, None), so a new trace is started.
+    """
+    match = TRACEPARENT_RE.match((traceparent or "").strip().lower())
+    if match:
+        return match.group(1), match.group(2)
+    trace_id = (trace_id or "").strip().lower().replace("-", "")
+    if TRACE_ID_RE.match(trace_id):
+        return trace_id, None
+    return None, None
+
+def _finish(span: Span):
+    span.end_ns = time.time_ns()
+    _stats["spans"] += 1
+    try:
+        _queue.put_nowait(span)
+    except queue.Full:
+        _stats["dropped"] += 1
+
+@contextmanager
+def _run(span: Span):
+    token = _current_span.set(span)
+    try:
+        yield span
+    except BaseException as e:
+        span.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _current_span.reset(token)
+        _finish(span)
+
+@contextmanager
+def start_trace(name: str, trace_id: str = None, parent_id: str = None, **attributes):
+    """
+    Start the root span of a trace (e.g. one webhook request)
+
+    Yields None when TRACING_ENABLED is off, so nothing below is recorded.
+    """
+    if not settings.TRACING_ENABLED:
+        yield None
+        return
+    with _run(Span(name, trace_id or os.urandom(16).hex(), parent_id, attributes)) as span:
+        yield span
+
+@contextmanager
+def span(name: str, **attributes):
+    """Time a child span of the current trace; a no-op (yielding None) outside a trace"""
+    parent = _current_span.get()
+    if parent is None:
+        yield None
+        return
+    with _run(Span(name, parent.trace_id, parent.span_id, attributes)) as child:
+        yield child
+
+def traced(name: str):
+    """Decorator recording each call as a child span of the current trace"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _current_span.get() is None:
+                return fn(*args, **kwargs)
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+def set_attribute(key: str, value):
+    """Set an attribute on the current span, if there is one"""
+    current = _current_span.get()
+    if current is not None:
+        current.attributes[key] = value
+
+def record_span(name: str, trace_id: str, parent_id: Optional[str], start_ns: int, end_ns: int, error: str = None, **attributes):
+    """Record an already-timed span into an earlier trace (e.g. background work done for a request)"""
+    if not settings.TRACING_ENABLED or not trace_id:
+        return
+    recorded = Span(name, trace_id, parent_id, attributes)
+    recorded.start_ns, recorded.end_ns, recorded.error = start_ns, end_ns, error
+    _stats["spans"] += 1
+    try:
+        _queue.put_nowait(recorded)
+    except queue.Full:
+        _stats["dropped"] += 1
+
+def _otlp_value(value) -> Dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+def _otlp_payload(spans: List[Span]) -> Dict:
+    """OTLP/HTTP JSON body (ExportTraceServiceRequest) for a batch of spans"""
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": [
+                {"key": "service.name", "value": {"stringValue": settings.TRACING_SERVICE_NAME}},
+                {"key": "process.pid", "value": {"intValue": str(os.getpid())}}
+            ]},
+            "scopeSpans": [{
+                "scope": {"name": "app.services.tracing"},
+                "spans": [{
+                    "traceId": s.trace_id,
+                    "spanId": s.span_id,
+                    **({"parentSpanId": s.parent_id} if s.parent_id else {}),
+                    "name": s.name,
+                    "kind": 1 if s.parent_id else 2,  # INTERNAL, or SERVER for roots
+                    "startTimeUnixNano": str(s.start_ns),
+                    "endTimeUnixNano": str(s.end_ns),
+                    "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in s.attributes.items() if v is not None],
+                    "status": {"code": 2, "message": s.error} if s.error else {"code": 1}
+                } for s in spans]
+            }]
+        }]
+    }
+
+def _export(spans: List[Span]):
+    """Write one batch to the configured exporter ("file" or "otlp")"""
+    try:
+        if settings.TRACING_EXPORTER == "otlp":
+            response = requests.post(settings.TRACING_OTLP_ENDPOINT, json=_otlp_payload(spans), timeout=settings.TRACING_EXPORT_TIMEOUT)
+            response.raise_for_status()
+        else:
+            directory = os.path.dirname(settings.TRACING_FILE)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(settings.TRACING_FILE, "a", encoding="utf-8") as f:
+                f.write("".join(json.dumps(s.to_dict(), default=str) + "\n" for s in spans))
+        _stats["exported"] += len(spans)
+        _stats["batches"] += 1
+    except Exception as e:
+        _stats["export_failures"] += len(spans)
+        logger.warning(f"⚠️ Could not export {len(spans)} spans: {str(e)}")
+
+def _drain(limit: int) -> List[Span]:
+    batch = []
+    while len(batch) < limit:
+        try:
+            batch.append(_queue.get_nowait())
+        except queue.Empty:
+            break
+    return batch
+
+def _exporter_loop():
+    """Export spans in batches of TRACING_BATCH_SIZE, or every TRACING_FLUSH_INTERVAL seconds"""
+    while not _stop_event.is_set():
+        deadline = time.monotonic() + settings.TRACING_FLUSH_INTERVAL
+        batch = []
+        while len(batch) < settings.TRACING_BATCH_SIZE and not _stop_event.is_set():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(_queue.get(timeout=min(remaining, 0.5)))
+            except queue.Empty:
+                continue
+            batch.extend(_drain(settings.TRACING_BATCH_SIZE - len(batch)))
+        if batch:
+            _export(batch)
+
+def start_tracing():
+    """Start the background exporter (if TRACING_ENABLED)"""
+    global _exporter_thread
+    if not settings.TRACING_ENABLED:
+        logger.info("📭 Tracing disabled")
+        return
+    if _exporter_thread and _exporter_thread.is_alive():
+        return
+    _stop_event.clear()
+    _exporter_thread = threading.Thread(target=_exporter_loop, name="trace-exporter", daemon=True)
+    _exporter_thread.start()
+    target = settings.TRACING_OTLP_ENDPOINT if settings.TRACING_EXPORTER == "otlp" else settings.TRACING_FILE
+    logger.info(f"🧵 Tracing started, exporting to {settings.TRACING_EXPORTER} ({target})")
+
+def stop_tracing(timeout: float = 5.0):
+    """Stop the exporter and flush spans still queued"""
+    global _exporter_thread
+    if _exporter_thread:
+        _stop_event.set()
+        _exporter_thread.join(timeout=timeout)
+        _exporter_thread = None
+    while True:
+        batch = _drain(settings.TRACING_BATCH_SIZE)
+        if not batch:
+            break
+        _export(batch)
+
+def get_tracing_stats() -> Dict:
+    """Get span counters"""
+    return {
+        "enabled": settings.TRACING_ENABLED,
+        "exporter": settings.TRACING_EXPORTER,
+        "queued": _queue.qsize(),
+        **_stats
+    }
@@ -0,0 +1,138 @@
+import time
+import logging
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List
+
+from app.config import get_settings
+from app.services import firestore_simple
+from app.services.whatsapp import warm_connections
+from app.services.availability import build_matrix
+from app.services.load_balancer import load_barber_loads
+from app.services.booking_stats import load_booking_stats
+from app.services.calendar_service import prefetch_busy_intervals
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Warmup state, reported by the readiness endpoint
+_warmup_state = {
+    "ready": False,
+    "started_at": None,
+    "completed_at": None,
+    "duration_ms": None,
+    "degraded": False,
+    "error": None,
+    "steps": {}
+}
+
+def _warm_catalog() -> Dict:
+    """Load services and barbers into the catalog cache"""
+    return firestore_simple.refresh_catalog()
+
+def _warm_service_index() -> Dict:
+    """Build the service→barber index for every service"""
+    services = firestore_simple.get_all_services()
+    counts = {s.id: len(firestore_simple.get_barbers_for_service(s.id)) for s in services}
+    return {"services_indexed": len(counts)}
+
+def _warm_availability() -> Dict:
+    """Precompute today's and tomorrow's availability for every barber, plus the availability matrix"""
+    today = datetime.now()
+    days = [today, today + timedelta(days=1)]
+    barbers = firestore_simple.get_all_barbers()
+    for barber in barbers:
+        for day in days:
+            firestore_simple.get_available_slots(barber.name, day)
+    matrix = build_matrix()
+    load_barber_loads()
+    return {"barber_days": len(barbers) * len(days), "matrix_shape": list(matrix.free.shape)}
+
+def _warm_calendar() -> Dict:
+    """Fetch every barber calendar's busy intervals for the free/busy window in one request"""
+    if not settings.GOOGLE_CALENDAR_USE_FREEBUSY:
+        return {"skipped": "free/busy disabled"}
+    return {"calendars": len(prefetch_busy_intervals())}
+
+def _warm_booking_stats() -> Dict:
+    """Load booking analytics from the stats counters"""
+    return load_booking_stats()
+
+def _warm_connections() -> Dict:
+    """Pre-open pooled connections to the WhatsApp bridge"""
+    return {"whatsapp_bridge": "connected" if warm_connections() else "unreachable"}
+
+WARMUP_STEPS: Dict[str, Callable[[], Dict]] = {
+    "catalog": _warm_catalog,
+    "service_index": _warm_service_index,
+    "availability": _warm_availability,
+    "calendar": _warm_calendar,
+    "booking_stats": _warm_booking_stats,
+    "connections": _warm_connections,
+}
+
+def get_configured_steps() -> List[str]:
+    """Get the warmup steps enabled in settings, in pipeline order"""
+    requested = [step.strip() for step in settings.WARMUP_STEPS.split(",") if step.strip()]
+    unknown = [step for step in requested if step not in WARMUP_STEPS]
+    if unknown:
+        logger.warning(f"⚠️ Unknown warmup steps ignored: {', '.join(unknown)}")
+    return [step for step in requested if step in WARMUP_STEPS]
+
+def run_warmup() -> Dict:
+    """
+    Run the warmup pipeline and mark the instance ready
+
+    A failing step is recorded and skipped rather than blocking readiness
+    forever; the instance still becomes ready once every step has run.
+    """
+    _warmup_state["ready"] = False
+    _warmup_state["degraded"] = False
+    _warmup_state["error"] = None
+    _warmup_state["started_at"] = datetime.now().isoformat()
+    _warmup_state["steps"] = {}
+    started = time.perf_counter()
+
+    if not settings.WARMUP_ENABLED:
+        logger.info("⏭️ Warmup disabled - marking instance ready")
+    else:
+        logger.info("🔥 Warming up before accepting traffic...")
+        for step in get_configured_steps():
+            step_started = time.perf_counter()
+            try:
+                details = WARMUP_STEPS[step]()
+                status = "ok"
+            except Exception as e:
+                logger.error(f"❌ Warmup step '{step}' failed: {str(e)}")
+                details = {"error": str(e)}
+                status = "failed"
+            elapsed_ms = round((time.perf_counter() - step_started) * 1000, 1)
+            _warmup_state["steps"][step] = {"status": status, "duration_ms": elapsed_ms, **details}
+            logger.info(f"✅ Warmup step '{step}' {status} in {elapsed_ms} ms")
+
+    _warmup_state["duration_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    _warmup_state["completed_at"] = datetime.now().isoformat()
+    _warmup_state["ready"] = True
+    logger.info(f"🚦 Instance ready after {_warmup_state['duration_ms']} ms of warmup")
+    return get_warmup_status()
+
+def record_warmup_failure(error: Exception) -> Dict:
+    """
+    Mark the instance ready but degraded after startup initialization raised
+
+    It then serves whatever it has (the catalog snapshot, fallbacks) rather
+    than reporting 503 forever; /ready and /health show the error.
+    """
+    _warmup_state["error"] = f"{type(error).__name__}: {error}"
+    _warmup_state["degraded"] = True
+    _warmup_state["completed_at"] = datetime.now().isoformat()
+    _warmup_state["ready"] = True
+    logger.error(f"❌ Startup initialization failed ({_warmup_state['error']}) - instance ready in degraded mode")
+    return get_warmup_status()
+
+def is_ready() -> bool:
+    """Check if warmup has completed"""
+    return _warmup_state["ready"]
+
+def get_warmup_status() -> Dict:
+    """Get a copy of the warmup state"""
+    return {**_warmup_state, "steps": dict(_warmup_state["steps"])}
@@ -2,11 +2,34 @@ import requests
 from datetime import datetime
 import logging
 from app.config import get_settings
+from app.services.circuit_breaker import CircuitOpenError, get_breaker
+from app.services.tracing import span
 from typing import Dict, Optional
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
+# Pooled HTTP session to the WhatsApp Web bridge (keeps connections alive between sends)
+_http_session: Optional[requests.Session] = None
+
+# Fails sends fast while the bridge is down instead of waiting out the timeout on every call
+_bridge_breaker = get_breaker("whatsapp_bridge")
+
+def get_http_session() -> requests.Session:
+    """Get the shared HTTP session for the WhatsApp bridge"""
+    global _http_session
+    if _http_session is None:
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=10)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        _http_session = session
+    return _http_session
+
+def warm_connections() -> bool:
+    """Open pooled connections to the WhatsApp bridge ahead of the first send"""
+    return check_whatsapp_service_health()
+
 def send_whatsapp_message(to_number: str, message: str) -> bool:
     """
     Send a WhatsApp message using WhatsApp Web service
@@ -23,14 +46,20 @@ def send_whatsapp_message(to_number: str, message: str) -> bool:
         phone_number = to_number.replace("whatsapp:", "").strip()
         
         # Make request to WhatsApp Web service
-        response = requests.post(
-            f"{settings.WHATSAPP_SERVICE_URL}/send-message",
-            json={
-                "phone": phone_number,
-                "message": message
-            },
-            timeout=10
-        )
+        with span("whatsapp.send") as send_span, _bridge_breaker.guard():
+            response = get_http_session().post(
+                f"{settings.WHATSAPP_SERVICE_URL}/send-message",
+                json={
+                    "phone": phone_number,
+                    "message": message
+                },
+                headers={"traceparent": send_span.traceparent} if send_span else None,
+                timeout=settings.WHATSAPP_REQUEST_TIMEOUT
+            )
+            if send_span:
+                send_span.set_attribute("http.status_code", response.status_code)
+            if response.status_code >= 500:
+                response.raise_for_status()  # bridge errors count against the breaker
         
         if response.status_code == 200:
             logger.info(f"Message sent successfully to {phone_number}")
@@ -39,6 +68,9 @@ def send_whatsapp_message(to_number: str, message: str) -> bool:
             logger.error(f"Failed to send message. Status: {response.status_code}, Response: {response.text}")
             return False
             
+    except CircuitOpenError:
+        logger.warning(f"WhatsApp bridge circuit open - not sending message to {to_number}")
+        return False
     except requests.exceptions.RequestException as e:
         logger.error(f"Network error sending message: {str(e)}")
         return False
@@ -81,11 +113,54 @@ def send_confirmation(phone: str, barber: str, time_slot: str, service: str) ->
         logger.error(f"Error sending confirmation: {str(e)}")
         return False
 
+def send_reminder(phone: str, barber: str, time_slot: str, service: str) -> bool:
+    """
+    Send a WhatsApp reminder ahead of an appointment
+
+    Args:
+        phone: Customer's phone number
+        barber: Barber's name
+        time_slot: ISO format datetime string
+        service: Service type
+
+    Returns:
+        bool: True if message was sent successfully
+    """
+    try:
+        booking_time = datetime.fromisoformat(time_slot)
+        formatted_time = booking_time.strftime("%I:%M %p on %B %d, %Y")
+        # From the calendar dates, not the reminder offset: a 12h reminder for a 9 AM slot goes out the evening before
+        days_ahead = (booking_time.date() - datetime.now().date()).days
+        if days_ahead <= 0:
+            when = "today"
+        elif days_ahead == 1:
+            when = "tomorrow"
+        else:
+            when = f"on {booking_time.strftime('%A')}"
+
+        message = (
+            f"⏰ Appointment Reminder\n\n"
+            f"Your {service} with {barber} is {when}:\n"
+            f"📅 {formatted_time}\n\n"
+            f"See you soon! Reply 'CANCEL' to cancel your appointment."
+        )
+
+        return send_whatsapp_message(phone, message)
+
+    except Exception as e:
+        logger.error(f"Error sending reminder: {str(e)}")
+        return False
+
 def check_whatsapp_service_health() -> bool:
     """Check if WhatsApp Web service is healthy"""
     try:
-        response = requests.get(f'{settings.WHATSAPP_SERVICE_URL}/health', timeout=5)
+        with _bridge_breaker.guard():
+            response = get_http_session().get(f'{settings.WHATSAPP_SERVICE_URL}/health', timeout=5)
+            if response.status_code >= 500:
+                response.raise_for_status()
         return response.status_code == 200
+    except CircuitOpenError:
+        return False
     except Exception as e:
         logger.warning(f"WhatsApp service health check failed: {e}")
         return False
@@ -93,7 +168,7 @@ def check_whatsapp_service_health() -> bool:
 def get_whatsapp_service_info() -> Optional[Dict]:
     """Get WhatsApp service information"""
     try:
-        response = requests.get(f'{settings.WHATSAPP_SERVICE_URL}/info', timeout=5)
+        response = get_http_session().get(f'{settings.WHATSAPP_SERVICE_URL}/info', timeout=5)
         if response.status_code == 200:
             return response.json()
         return None
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Intent Matcher Benchmark - Time free-text matching over realistic messages
+
+Compiles the matcher for a sample catalog, then times matching a corpus
+of customer messages (greetings, typos, "haircut tomorrow with Maya",
+commands) against a brute-force matcher that edit-distance compares every
+word with the whole vocabulary.
+"""
+
+import argparse
+import statistics
+import time
+from datetime import datetime
+
+from app.services.firestore_simple import Service, Barber
+from app.services.intent_matcher import IntentMatcher, TOKEN_RE, REPEATS_RE, STOPWORDS, MIN_TYPO_LENGTH, _max_edits, edit_distance
+
+SERVICES = [
+    Service(id="haircut", name="Hair Cut", duration=30, price=35.0),
+    Service(id="hair_color", name="Hair Color", duration=120, price=85.0),
+    Service(id="beard_trim", name="Beard Trim", duration=20, price=15.0),
+    Service(id="blowout", name="Blowout", duration=45, price=40.0),
+    Service(id="manicure", name="Manicure", duration=40, price=30.0),
+    Service(id="pedicure", name="Pedicure", duration=50, price=40.0),
+    Service(id="highlights", name="Highlights", duration=150, price=120.0),
+    Service(id="kids_cut", name="Kids Cut", duration=20, price=20.0)
+]
+
+BARBERS = [
+    Barber(name=name, services=[s.id for s in SERVICES])
+    for name in ["Maya", "Alex", "Sam", "Jordan", "Priya", "Luis", "Chen", "Fatima"]
+]
+
+CORPUS = [
+    "hi", "hello", "helo", "hiii", "heyyy there", "good morning!",
+    "restart", "start over please", "resart",
+    "haircut tomorrow", "hair cut with maya", "can i get a haircut with Maya on friday?",
+    "I'd like a beard trim tomorrow", "beard trm with alex", "blowout saturday",
+    "hair colour with priya next tuesday", "hiar color", "highlights with jordan",
+    "kids cut today", "manicure and pedicure", "pedicure tmrw", "manicur",
+    "cancel", "cancel my booking", "cancel my appointment please", "cancle",
+    "my bookings", "what are my appointments", "bookings?",
+    "rebook", "book again", "same again please", "the usual",
+    "maya", "alex please", "with chen", "luis", "fatima tomorrow",
+    "tomorrow", "tomorow", "today", "day after tomorrow", "monday", "wednesday",
+    "what time do you open", "thanks!", "ok", "how much is a haircut",
+    "can you fit me in this afternoon", "need a trim with sam on thursday"
+]
+
+class BruteForceMatcher(IntentMatcher):
+    """Same matcher, but typos are corrected by comparing against every vocabulary word"""
+
+    def correct(self, token):
+        if token in self._vocabulary:
+            return token
+        if REPEATS_RE.sub(r"\1", token) in self._vocabulary:
+            return REPEATS_RE.sub(r"\1", token)
+        if len(token) < MIN_TYPO_LENGTH or token in STOPWORDS or token.isdigit():
+            return None
+        limit = _max_edits(token)
+        best, best_distance = None, limit + 1
+        for word in sorted(self._vocabulary):
+            distance = edit_distance(token, word, min(limit, _max_edits(word)))
+            if distance < best_distance:
+                best, best_distance = word, distance
+        return best
+
+def bench(fn, runs: int, number: int) -> float:
+    """Median seconds per call"""
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter() - start) / number)
+    return statistics.median(samples)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark free-text intent matching")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--show", action="store_true", help="Print what each message matched")
+    args = parser.parse_args()
+
+    print("⏱️ Intent Matcher Benchmark")
+    print("=" * 50)
+
+    compile_time = bench(lambda: IntentMatcher(SERVICES, BARBERS), args.runs, 20)
+    matcher = IntentMatcher(SERVICES, BARBERS)
+    brute = BruteForceMatcher(SERVICES, BARBERS)
+    today = datetime.now()
+    words = sum(len(TOKEN_RE.findall(m.lower())) for m in CORPUS)
+    print(f"🧠 Compile ({len(SERVICES)} services, {len(BARBERS)} barbers, {len(matcher._vocabulary)} words): {compile_time * 1000:.2f} ms")
+
+    matched = sum(1 for m in CORPUS if any(v for k, v in matcher.match(m, today).items() if k != "corrections"))
+    mismatched = [m for m in CORPUS if matcher.match(m, today) != brute.match(m, today)]
+    fast = bench(lambda: [matcher.match(m, today) for m in CORPUS], args.runs, 50) / len(CORPUS)
+    slow = bench(lambda: [brute.match(m, today) for m in CORPUS], args.runs, 5) / len(CORPUS)
+
+    print(f"📨 Corpus: {len(CORPUS)} messages, {words} words, {matched} with an intent")
+    print(f"⚡ Trie + deletion index:       {fast * 1e6:8.1f} µs/message")
+    print(f"🐢 Trie + brute-force typos:    {slow * 1e6:8.1f} µs/message ({slow / fast:.1f}x)")
+    if mismatched:
+        print(f"⚠️ Results differ for: {mismatched}")
+
+    if args.show:
+        print()
+        for message in CORPUS:
+            result = {k: v for k, v in matcher.match(message, today).items() if v}
+            print(f"  {message!r:50} -> {result}")
+
+    print("\n✅ Done")
+
+if __name__ == "__main__":
+    main()
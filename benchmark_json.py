@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+JSON Benchmark - Compare the stdlib and orjson paths
+
+Times webhook parsing (json.loads plus dict lookups, against orjson plus
+the typed WhatsAppWebhookMessage model) and rendering of a /bookings
+sized response (FastAPI's jsonable_encoder plus json.dumps, against
+orjson rendering the payload directly).
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.schemas import WhatsAppWebhookMessage
+
+try:
+    import orjson
+    from app.fast_json import FastJSONResponse
+except ImportError:
+    orjson = None
+
+WEBHOOK_BODY = json.dumps({
+    "body": "2",
+    "from": "15551234567@c.us",
+    "contactName": "Jamie"
+}).encode()
+
+def make_bookings(count: int) -> list:
+    """Bookings shaped like the Firestore documents returned by /bookings"""
+    start = datetime(2025, 1, 6)
+    return [
+        {
+            "booking_id": f"booking_{1736150400 + i}_{i:06x}",
+            "service_id": "haircut",
+            "service_name": "Hair Cut",
+            "barber_name": ["Maya", "Alex", "Sam"][i % 3],
+            "phone": f"1555{i:07d}",
+            "contact_name": f"Customer {i}",
+            "date": (start + timedelta(days=i % 30)).strftime("%Y-%m-%d"),
+            "time_slot": "10:30 AM",
+            "status": "confirmed",
+            "created_at": (start + timedelta(minutes=i)).isoformat(),
+            "source": "whatsapp",
+            "calendar_event_id": f"{i:040x}"
+        }
+        for i in range(count)
+    ]
+
+def bench(fn, runs: int, number: int) -> float:
+    """Median seconds per call"""
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter() - start) / number)
+    return statistics.median(samples)
+
+def parse_stdlib():
+    data = json.loads(WEBHOOK_BODY)
+    return data.get("body", "").lower().strip(), data.get("from", ""), data.get("contactName", "Unknown"), data.get("isGroupMsg", False)
+
+def parse_fast():
+    data = WhatsAppWebhookMessage.model_validate(orjson.loads(WEBHOOK_BODY))
+    return data.body.lower().strip(), data.from_, data.contact_name, data.is_group_msg
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare stdlib and orjson JSON paths")
+    parser.add_argument("--bookings", type=int, default=5000, help="Bookings in the rendered response")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    if orjson is None:
+        print("❌ orjson is not installed (pip install orjson)")
+        sys.exit(1)
+
+    print("⏱️ JSON Benchmark")
+    print("=" * 50)
+
+    stdlib_parse = bench(parse_stdlib, args.runs, 20000)
+    fast_parse = bench(parse_fast, args.runs, 20000)
+    print(f"📨 Webhook parse, json + dict.get:        {stdlib_parse * 1e6:7.2f} µs")
+    print(f"📨 Webhook parse, orjson + typed model:   {fast_parse * 1e6:7.2f} µs ({stdlib_parse / fast_parse:.2f}x)")
+
+    content = {"status": "success", "salon": "Beauty Salon", "count": args.bookings, "bookings": make_bookings(args.bookings)}
+    stdlib_render = bench(lambda: JSONResponse(jsonable_encoder(content)), args.runs, 5)
+    fast_render = bench(lambda: FastJSONResponse(content), args.runs, 5)
+    size_kb = len(FastJSONResponse(content).body) / 1024
+    print(f"📤 /bookings ({args.bookings}, {size_kb:.0f} KB), jsonable_encoder + json: {stdlib_render * 1000:7.2f} ms")
+    print(f"📤 /bookings ({args.bookings}, {size_kb:.0f} KB), orjson:                  {fast_render * 1000:7.2f} ms ({stdlib_render / fast_render:.1f}x)")
+
+    print("\n✅ Done")
+
+if __name__ == "__main__":
+    main()
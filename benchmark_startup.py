@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Startup Benchmark - Measure cold import time of the backend
+
+Runs each module import in a fresh interpreter (so nothing is cached in
+sys.modules), reports the median wall time and the slowest imports from
+`python -X importtime`, and optionally fails when a budget is exceeded so
+cold-start regressions can be tracked in CI.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+MODULES = [
+    "app.config",
+    "app.services.firestore_simple",
+    "app.services.calendar_service",
+    "app.main",
+]
+
+def time_import(module: str) -> float:
+    """Import a module in a fresh interpreter and return the wall time in seconds"""
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "-c", f"import {module}"],
+        check=True,
+        capture_output=True,
+        cwd=os.path.dirname(os.path.abspath(__file__))
+    )
+    return time.perf_counter() - start
+
+def slowest_imports(module: str, top: int = 10) -> list:
+    """Get the slowest cumulative imports for a module from -X importtime"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        cwd=os.path.dirname(os.path.abspath(__file__))
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        # Format: "import time: <self us> | <cumulative us> | <module>"
+        _, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((int(cumulative_us), name.strip()))
+    rows.sort(reverse=True)
+    return rows[:top]
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure backend cold import time")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per module")
+    parser.add_argument("--budget", type=float, default=None, help="Fail if app.main median exceeds this many seconds")
+    parser.add_argument("--json", dest="json_path", default=None, help="Append results to this JSON lines file")
+    args = parser.parse_args()
+
+    print("⏱️ Backend Cold Start Benchmark")
+    print("=" * 50)
+
+    baseline = statistics.median(time_import("sys") for _ in range(args.runs))
+    print(f"🐍 Interpreter startup: {baseline * 1000:.0f} ms")
+
+    results = {}
+    for module in MODULES:
+        samples = [time_import(module) for _ in range(args.runs)]
+        median = statistics.median(samples) - baseline
+        results[module] = round(median, 4)
+        print(f"📦 {module}: {median * 1000:.0f} ms (median of {args.runs})")
+
+    print("\n🐢 Slowest imports under app.main:")
+    for cumulative_us, name in slowest_imports("app.main"):
+        print(f"  {cumulative_us / 1000:8.1f} ms  {name}")
+
+    if args.json_path:
+        with open(args.json_path, "a") as f:
+            f.write(json.dumps({"timestamp": datetime.now().isoformat(), "results": results}) + "\n")
+        print(f"\n📝 Results appended to {args.json_path}")
+
+    if args.budget is not None and results["app.main"] > args.budget:
+        print(f"\n❌ app.main import took {results['app.main']:.3f}s (budget {args.budget:.3f}s)")
+        sys.exit(1)
+
+    print("\n✅ Done")
+
+if __name__ == "__main__":
+    main()
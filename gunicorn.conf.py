@@ -0,0 +1,67 @@
+"""
+Pre-fork production server: gunicorn master + uvicorn workers
+
+    gunicorn -c gunicorn.conf.py app.main:app
+
+The app is imported once in the master (preload_app), and the catalog
+snapshot, slot grid and service index are loaded there before forking, so
+workers share those pages copy-on-write. Firebase/gRPC clients are not
+fork-safe; every worker opens its own connection in its startup event.
+
+Signals:
+    HUP   graceful reload: start fresh workers with the current config, then stop the old ones
+    TERM  graceful shutdown (workers drain the booking journal within graceful_timeout)
+    USR2  re-exec the master with new code; send TERM to the old master once the new one is ready
+    TTIN / TTOU  add / remove a worker
+"""
+
+import gc
+import os
+import multiprocessing
+
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+worker_class = "uvicorn.workers.UvicornWorker"
+bind = f"{os.environ.get('BACKEND_HOST', '0.0.0.0')}:{os.environ.get('BACKEND_PORT', '8000')}"
+preload_app = os.environ.get("GUNICORN_PRELOAD", "true").lower() == "true"
+
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", "60"))  # a worker silent this long is killed and replaced
+graceful_timeout = int(os.environ.get("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+keepalive = 5
+
+# Recycle workers periodically (jittered so they don't all restart at once)
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", "5000"))
+max_requests_jitter = max_requests // 10
+
+accesslog = "-"
+errorlog = "-"
+loglevel = os.environ.get("LOG_LEVEL", "info").lower()
+
+# Webhook requests for one customer can hit any worker, so conversations must be shared
+if workers > 1:
+    os.environ.setdefault("SESSION_STORE", "sqlite")
+
+def when_ready(server):
+    """Load shared read-mostly state in the master, then freeze it out of the GC"""
+    if not preload_app:
+        return
+    from app.services import firestore_simple
+
+    # Without a snapshot the barbers would come from Firestore, and its clients must not be created before forking
+    if firestore_simple.load_catalog_snapshot():
+        firestore_simple.get_schedule()
+    # Keep the collector from touching (and so copying) preloaded objects in every worker
+    gc.collect()
+    gc.freeze()
+    server.log.info(f"Preloaded catalog snapshot for {workers} workers: {firestore_simple.get_catalog_snapshot_info()}")
+
+def pre_fork(server, worker):
+    """Give each worker the lowest free slot, so a replacement inherits its predecessor's slot"""
+    taken = {getattr(w, "slot", None) for w in server.WORKERS.values()}
+    worker.slot = next(slot for slot in range(len(taken) + 1) if slot not in taken)
+
+def post_fork(server, worker):
+    os.environ["WORKER_SLOT"] = str(worker.slot)
+    server.log.info(f"Worker {worker.pid} started in slot {worker.slot}")
+
+def worker_exit(server, worker):
+    server.log.info(f"Worker {worker.pid} (slot {getattr(worker, 'slot', '?')}) exited")
@@ -0,0 +1,36 @@
+// POST /send-message: messages the backend sends on its own (reminders), outside a webhook reply
+
+// The backend stores phones as bare digits; WhatsApp Web addresses a chat as <digits>@c.us
+function chatId(phone) {
+    const value = String(phone || '').replace('whatsapp:', '').trim();
+    if (value.includes('@')) {
+        return value;
+    }
+    const digits = value.replace(/\D/g, '');
+    return digits ? `${digits}@c.us` : null;
+}
+
+function sendMessageHandler(getClient, isReady, salonName) {
+    return async (req, res) => {
+        const { phone, message } = req.body || {};
+        const to = chatId(phone);
+        if (!to || typeof message !== 'string' || !message) {
+            return res.status(400).json({ error: 'phone and message are required' });
+        }
+        const client = getClient();
+        if (!isReady() || !client) {
+            // 5xx so the backend's circuit breaker backs off until the client connects
+            return res.status(503).json({ error: 'WhatsApp client not ready' });
+        }
+        try {
+            await client.sendMessage(to, message);
+            console.log(`📤 [${salonName}] Message sent to ${to}`);
+            return res.json({ status: 'sent' });
+        } catch (error) {
+            console.error(`❌ [${salonName}] Error sending message to ${to}:`, error.message);
+            return res.status(502).json({ error: 'Failed to send message' });
+        }
+    };
+}
+
+module.exports = { chatId, sendMessageHandler };
@@ -0,0 +1,59 @@
+// Contract the backend relies on for reminders: node --test test-send-message.js
+const test = require('node:test');
+const assert = require('node:assert');
+const { chatId, sendMessageHandler } = require('./send-message');
+
+function fakeResponse() {
+    return {
+        statusCode: 200,
+        body: null,
+        status(code) { this.statusCode = code; return this; },
+        json(body) { this.body = body; return this; }
+    };
+}
+
+function fakeClient(fail = false) {
+    return {
+        sent: [],
+        async sendMessage(to, message) {
+            if (fail) throw new Error('page crashed');
+            this.sent.push([to, message]);
+        }
+    };
+}
+
+test('bare digits become a WhatsApp chat id', () => {
+    assert.strictEqual(chatId('15550001'), '15550001@c.us');
+    assert.strictEqual(chatId('+1 555-0001'), '15550001@c.us');
+    assert.strictEqual(chatId('whatsapp:15550001'), '15550001@c.us');
+    assert.strictEqual(chatId('15550001@c.us'), '15550001@c.us');
+    assert.strictEqual(chatId(''), null);
+});
+
+test('sends to the chat and answers 200 once the client is ready', async () => {
+    const client = fakeClient();
+    const res = fakeResponse();
+    await sendMessageHandler(() => client, () => true, 'Test')({ body: { phone: '15550001', message: 'Hi' } }, res);
+    assert.strictEqual(res.statusCode, 200);
+    assert.deepStrictEqual(client.sent, [['15550001@c.us', 'Hi']]);
+});
+
+test('answers 503 until the client is ready', async () => {
+    const client = fakeClient();
+    const res = fakeResponse();
+    await sendMessageHandler(() => client, () => false, 'Test')({ body: { phone: '15550001', message: 'Hi' } }, res);
+    assert.strictEqual(res.statusCode, 503);
+    assert.deepStrictEqual(client.sent, []);
+});
+
+test('rejects a request without a phone or message', async () => {
+    const res = fakeResponse();
+    await sendMessageHandler(() => fakeClient(), () => true, 'Test')({ body: { phone: '15550001' } }, res);
+    assert.strictEqual(res.statusCode, 400);
+});
+
+test('a failed send is a 5xx so the backend retries it', async () => {
+    const res = fakeResponse();
+    await sendMessageHandler(() => fakeClient(true), () => true, 'Test')({ body: { phone: '15550001', message: 'Hi' } }, res);
+    assert.strictEqual(res.statusCode, 502);
+});
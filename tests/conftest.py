@@ -0,0 +1,22 @@
+import pytest
+
+from app.services import firestore_simple
+from app.services.firestore_simple import Barber
+
+EVERY_DAY = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+
+@pytest.fixture
+def memory_store(monkeypatch):
+    """The in-memory booking store, empty, with one barber working every day"""
+    monkeypatch.setattr(firestore_simple, "_firebase_init_attempted", True)
+    monkeypatch.setattr(firestore_simple, "_firebase_connected", False)
+    for collection in firestore_simple._in_memory_storage.values():
+        collection.clear()
+    firestore_simple._booked_slots_cache.clear()
+    firestore_simple._phone_index_cache.clear()
+    firestore_simple._known_bookings.clear()
+    firestore_simple._set_cached_catalog("barbers", [Barber(name="Maya", email="maya@salon.test", working_days=EVERY_DAY)])
+    yield firestore_simple
+    firestore_simple.close_booking_journal()
+    firestore_simple._catalog_cache.clear()
+    firestore_simple._booked_slots_cache.clear()
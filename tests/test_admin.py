@@ -0,0 +1,28 @@
+import pytest
+
+from app.config import get_settings
+from app.services.profiler import ProfilerMiddleware
+
+def scope(*headers) -> dict:
+    return {"type": "http", "path": "/webhook/whatsapp", "headers": list(headers)}
+
+@pytest.fixture
+def admin(monkeypatch):
+    settings = get_settings()
+    monkeypatch.setattr(settings, "ADMIN_TOKEN", "s3cret")
+    monkeypatch.setattr(settings, "PROFILER_PATHS", "/webhook/whatsapp")
+    monkeypatch.setattr(settings, "PROFILER_SAMPLE_EVERY", 10 ** 9)
+    return settings
+
+def test_admin_token_check(admin):
+    assert admin.is_admin_token("s3cret")
+    assert not admin.is_admin_token("s3cre") and not admin.is_admin_token("") and not admin.is_admin_token(None)
+
+def test_empty_admin_token_never_matches(admin, monkeypatch):
+    monkeypatch.setattr(admin, "ADMIN_TOKEN", "")
+    assert not admin.is_admin_token("")
+
+def test_profile_header_needs_the_admin_token(admin):
+    assert ProfilerMiddleware._selected(scope((b"x-profile", b"1"), (b"x-admin-token", b"s3cret")))
+    assert not ProfilerMiddleware._selected(scope((b"x-profile", b"1"), (b"x-admin-token", b"guess")))
+    assert not ProfilerMiddleware._selected(scope((b"x-profile", b"1")))
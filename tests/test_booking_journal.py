@@ -0,0 +1,39 @@
+import time
+import threading
+
+from app.services.booking_journal import BookingJournal
+
+# Two booking records fill a segment, so the second one's 'replicated' marker starts the next
+SEGMENT_SIZE = 340
+
+def booking(time_slot: str) -> dict:
+    return {"barber_name": "Maya", "date": "2026-11-02", "time_slot": time_slot, "phone": "15550001", "status": "confirmed"}
+
+def test_replicated_booking_is_not_replayed_after_a_crash(tmp_path):
+    """A segment holding only markers is kept while an older segment still holds the records they cover"""
+    replicated = {booking_id: threading.Event() for booking_id in ("cut", "later")}
+
+    def replicate(booking_id, data):
+        if booking_id == "stuck":
+            raise ConnectionError("store down")
+        replicated[booking_id].set()
+
+    journal = BookingJournal(str(tmp_path), replicate, segment_size=SEGMENT_SIZE, flush_interval_ms=1, retry_delay=0.01)
+    journal.open()
+    journal.append("stuck", booking("09:00 AM"))
+    journal.append("cut", booking("10:00 AM"))
+    assert replicated["cut"].wait(5.0)
+    # Roll past the segment holding cut's marker; replicating "later" compacts
+    journal.append("later", booking("11:00 AM"))
+    journal.append("later", booking("11:30 AM"))
+    deadline = time.monotonic() + 5.0
+    while journal.stats()["pending"] > 1 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    journal.drain(timeout=0)  # crash with "stuck" still unreplicated
+
+    replayed = []
+    recovered = BookingJournal(str(tmp_path), lambda booking_id, data: replayed.append(booking_id), segment_size=SEGMENT_SIZE, flush_interval_ms=1)
+    recovered.open()
+    recovered.drain(timeout=5.0)
+
+    assert replayed == ["stuck"]
@@ -0,0 +1,36 @@
+from datetime import datetime
+from types import SimpleNamespace
+
+from app.services.booking_replica import BookingReplica
+
+class FakeQuery:
+    def __init__(self):
+        self.watch = SimpleNamespace(is_active=True, unsubscribe=lambda: None)
+        self.callback = None
+
+    def where(self, *args):
+        return self
+
+    def on_snapshot(self, callback):
+        self.callback = callback
+        return self.watch
+
+def live_replica():
+    query = FakeQuery()
+    replica = BookingReplica()
+    replica.subscribe(SimpleNamespace(collection=lambda name: query), days=2)
+    booking = {"barber_name": "Maya", "date": datetime.now().strftime("%Y-%m-%d"), "time_slot": "09:00 AM", "status": "confirmed"}
+    change = SimpleNamespace(type=SimpleNamespace(name="ADDED"), document=SimpleNamespace(id="booking_1", to_dict=lambda: booking))
+    query.callback([], [change], None)
+    return replica, query.watch, booking["date"]
+
+def test_live_replica_answers_from_memory():
+    replica, _, today = live_replica()
+    assert replica.booked_slots("Maya", today) == ["09:00 AM"]
+
+def test_replica_stops_answering_once_its_stream_closes():
+    replica, watch, today = live_replica()
+    watch.is_active = False
+
+    assert replica.booked_slots("Maya", today) is None
+    assert replica.stats["fallbacks"] == 1
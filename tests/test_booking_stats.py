@@ -0,0 +1,97 @@
+import pytest
+
+from app.services import booking_stats, firestore_simple
+from app.services.circuit_breaker import CircuitBreaker
+from app.services.firestore_simple import Service
+
+BOOKING = {"date": "2026-11-02", "barber_name": "Maya", "service_id": "cut", "price": 25.0, "duration": 30}
+
+@pytest.fixture
+def stats(monkeypatch):
+    catalog = {"cut": Service(id="cut", name="Haircut", duration=30, price=25.0)}
+    monkeypatch.setattr(booking_stats, "get_service", catalog.get)
+    monkeypatch.setattr(booking_stats, "_aggregates", booking_stats.BookingAggregates())
+    monkeypatch.setattr(booking_stats, "_pending", {})
+    monkeypatch.setattr(booking_stats, "_backfill_pending", {})
+    return catalog
+
+def test_cancel_takes_back_the_price_and_duration_as_booked(stats):
+    booking_stats._on_booking_event("booked", dict(BOOKING))
+    stats["cut"] = Service(id="cut", name="Haircut", duration=45, price=40.0)
+    booking_stats._on_booking_event("cancelled", dict(BOOKING))
+
+    assert booking_stats._aggregates.day("2026-11-02") == {"bookings": 0, "minutes": 0, "revenue": 0.0}
+    assert list(booking_stats._pending.values())[0]["revenue"] == 0.0
+
+def test_bookings_without_recorded_values_fall_back_to_the_catalog(stats):
+    legacy = {key: value for key, value in BOOKING.items() if key not in ("price", "duration")}
+    assert booking_stats._booking_delta(legacy) == {"bookings": 1, "minutes": 30, "revenue": 25.0}
+    # Bookings written through the REST API hold every field as a string
+    assert booking_stats._booking_delta({**legacy, "price": "19.5", "duration": "45"}) == {"bookings": 1, "minutes": 45, "revenue": 19.5}
+
+def test_flusher_registers_its_listener_once(monkeypatch):
+    registered = []
+    monkeypatch.setattr(booking_stats, "add_booking_listener", registered.append)
+    monkeypatch.setattr(booking_stats.settings, "BOOKING_STATS_FLUSH_INTERVAL", 3600)
+    booking_stats.start_stats_flusher()
+    booking_stats.start_stats_flusher()
+    booking_stats._stop_event.set()
+    booking_stats._flusher.join(5.0)
+
+    assert registered == [booking_stats._on_booking_event]
+
+class FakeBatchClient:
+    """Admin SDK stand-in that rejects batches over Firestore's 500-write limit"""
+
+    def __init__(self, fail_commit: int = None):
+        self.commits = []
+        self.fail_commit = fail_commit
+
+    def collection(self, name):
+        return self
+
+    def document(self, name):
+        return self
+
+    def batch(self):
+        client, writes = self, []
+        class Batch:
+            def set(self, ref, data, merge=False):
+                writes.append(data)
+            def commit(self):
+                if len(writes) > 500 or len(client.commits) == client.fail_commit:
+                    raise RuntimeError("batch rejected")
+                client.commits.append(len(writes))
+        return Batch()
+
+def counters(n: int) -> dict:
+    return {f"c{i}": {"date": "2026-11-02", "barber_name": "Maya", "service_id": f"s{i}", "bookings": 1, "minutes": 30, "revenue": 25.0} for i in range(n)}
+
+@pytest.mark.parametrize("fail_commit,written", [(None, 1200), (1, 500)])
+def test_counter_writes_are_split_into_batches_of_500(monkeypatch, fail_commit, written):
+    client = FakeBatchClient(fail_commit)
+    monkeypatch.setattr(firestore_simple, "is_firebase_connected", lambda: True)
+    monkeypatch.setattr(firestore_simple, "get_firebase_client", lambda: client)
+    monkeypatch.setattr(firestore_simple, "_firestore_breaker", CircuitBreaker("firestore-test"))
+
+    assert firestore_simple.increment_booking_stats(counters(1200)) == written
+    assert all(size <= 500 for size in client.commits)
+
+def test_failed_backfill_is_retried_not_queued_again(stats, monkeypatch, tmp_path):
+    written = []
+    monkeypatch.setattr(booking_stats.settings, "WORKER_LOCK_DIR", str(tmp_path))
+    monkeypatch.setattr(booking_stats, "get_booking_stats_shards", lambda: [])
+    monkeypatch.setattr(booking_stats, "get_all_bookings", lambda: [dict(BOOKING)])
+    monkeypatch.setattr(booking_stats, "increment_booking_stats", lambda deltas: 0)
+
+    booking_stats.load_booking_stats()
+    booking_stats.load_booking_stats()
+
+    assert booking_stats._pending == {}
+    assert [delta["bookings"] for delta in booking_stats._backfill_pending.values()] == [1]
+    assert booking_stats._aggregates.day("2026-11-02")["bookings"] == 1
+
+    monkeypatch.setattr(booking_stats, "increment_booking_stats", lambda deltas: written.append(deltas) or len(deltas))
+    assert booking_stats.flush_stats() == 1
+    assert booking_stats._backfill_pending == {} and booking_stats.flush_stats() == 0
+    assert [delta["bookings"] for delta in written[0].values()] == [1]
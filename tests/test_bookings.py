@@ -0,0 +1,143 @@
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.services.circuit_breaker import CircuitBreaker
+
+DATE = (datetime.now() + timedelta(days=3)).strftime("%Y-%m-%d")
+
+def booking(time_slot: str, phone: str = "15550001") -> dict:
+    return {
+        "service_id": "cut",
+        "service_name": "Haircut",
+        "barber_name": "Maya",
+        "time_slot": time_slot,
+        "phone": phone,
+        "date": DATE,
+        "contact_name": "Sam"
+    }
+
+def failing_read(barber_name, date_str):
+    raise ConnectionError("store down")
+
+def slow_read(barber_name, date_str):
+    time.sleep(0.5)
+    return []
+
+def test_a_taken_slot_is_refused(memory_store):
+    assert memory_store.book_slot(booking("10:00 AM"))["status"] == "success"
+    assert memory_store.book_slot(booking("10:00 AM", phone="15550002"))["status"] == "error"
+
+def test_store_error_before_booking_reports_unavailable(memory_store, monkeypatch):
+    monkeypatch.setattr(memory_store, "_get_booked_slots", failing_read)
+
+    # Display still degrades to the schedule, but a booking is never made against it
+    assert "10:00 AM" in memory_store.get_available_slots("Maya", datetime.strptime(DATE, "%Y-%m-%d"))
+    assert memory_store.book_slot(booking("10:00 AM"))["status"] == "unavailable"
+    assert memory_store._in_memory_storage["bookings"] == {}
+
+def test_journaled_booking_checks_the_cached_view_and_pending_slots(memory_store, monkeypatch, tmp_path):
+    memory_store.open_booking_journal(str(tmp_path))
+    memory_store.get_available_slots("Maya", datetime.strptime(DATE, "%Y-%m-%d"))
+    monkeypatch.setattr(memory_store, "_get_booked_slots", failing_read)
+
+    assert memory_store.book_slot(booking("10:00 AM"))["status"] == "success"
+    assert memory_store.book_slot(booking("10:00 AM", phone="15550002"))["status"] == "error"
+
+def test_journaled_booking_rereads_an_expired_cached_view(memory_store, tmp_path):
+    memory_store.open_booking_journal(str(tmp_path))
+    memory_store._booked_slots_cache[("Maya", DATE)] = (0.0, set())
+    # Booked by another instance: in the store, but not in this host's reservations
+    memory_store._in_memory_storage["bookings"]["booking_elsewhere"] = {**booking("10:00 AM", phone="15550002"), "status": "confirmed"}
+
+    assert memory_store.book_slot(booking("10:00 AM"))["status"] == "error"
+
+def test_journaled_booking_gives_up_on_a_slow_store_read(memory_store, monkeypatch, tmp_path):
+    memory_store.open_booking_journal(str(tmp_path))
+    monkeypatch.setattr(memory_store.settings, "BOOKING_CHECK_TIMEOUT", 0.05)
+    monkeypatch.setattr(memory_store, "_get_booked_slots", slow_read)
+
+    assert memory_store.book_slot(booking("10:00 AM"))["status"] == "unavailable"
+
+    # Let the abandoned read finish so later tests don't join its flight
+    while memory_store._single_flight.stats()["in_flight"]:
+        time.sleep(0.05)
+
+@pytest.fixture
+def store_down(memory_store, monkeypatch):
+    """Firestore connected but failing fast: its breaker is open"""
+    breaker = CircuitBreaker("firestore-test", window=1, min_calls=1)
+    breaker.record(0.0, failed=True)
+    monkeypatch.setattr(memory_store, "_firestore_breaker", breaker)
+    monkeypatch.setattr(memory_store, "_firebase_connected", True)
+    yield memory_store
+    # Leave the unreplicated records in the journal rather than waiting on the store
+    memory_store.close_booking_journal(timeout=0)
+
+def test_open_breaker_without_journal_reports_unavailable(store_down):
+    assert store_down.book_slot(booking("10:00 AM"))["status"] == "unavailable"
+
+def test_open_breaker_books_and_cancels_through_the_journal(store_down, tmp_path):
+    journal = store_down.open_booking_journal(str(tmp_path))
+    store_down._booked_slots_cache[("Maya", DATE)] = (0.0, {"09:00 AM"})
+
+    assert store_down.book_slot(booking("09:00 AM"))["status"] == "error"
+    booking_id = store_down.book_slot(booking("10:00 AM"))["booking_id"]
+    assert store_down.book_slot(booking("10:00 AM", phone="15550002"))["status"] == "error"
+
+    cancelled = store_down.cancel_booking(booking_id)
+    assert cancelled["status"] == "success"
+    assert journal.pending_booking(booking_id)["status"] == "cancelled"
+    assert store_down.book_slot(booking("10:00 AM", phone="15550002"))["status"] == "success"
+
+def test_open_breaker_cancels_a_known_replicated_booking_through_the_journal(store_down, tmp_path):
+    store_down._remember_booking({**booking("11:00 AM"), "booking_id": "booking_1", "status": "confirmed"})
+    journal = store_down.open_booking_journal(str(tmp_path))
+
+    assert store_down.cancel_booking("booking_1")["status"] == "success"
+    assert journal.pending_booking("booking_1")["status"] == "cancelled"
+    assert store_down.cancel_booking("booking_unknown")["status"] == "unavailable"
+
+def test_concurrent_cancels_notify_once(memory_store):
+    booking_id = memory_store.book_slot(booking("10:00 AM"))["booking_id"]
+    notified, results = [], []
+    memory_store.add_booking_listener(lambda event, data: notified.append(event) if event == "cancelled" else None)
+    try:
+        workers = [threading.Thread(target=lambda: results.append(memory_store.cancel_booking(booking_id)["status"])) for _ in range(8)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+    finally:
+        memory_store._booking_listeners.pop()
+
+    assert sorted(results) == ["already_cancelled"] * 7 + ["success"]
+    assert notified == ["cancelled"]
+
+class FakeResponse:
+    def __init__(self, status_code: int, body: dict = None):
+        self.status_code = status_code
+        self._body = body or {}
+
+    def json(self):
+        return self._body
+
+def test_rest_cancel_rereads_when_the_booking_changed_since_the_read(memory_store, monkeypatch):
+    """Another worker cancels between our read and our commit: the precondition fails and we report it"""
+    stored = {"status": {"stringValue": "confirmed"}, "barber_name": {"stringValue": "Maya"}}
+    reads = iter([
+        FakeResponse(200, {"fields": stored, "updateTime": "2026-10-19T09:00:00.000001Z"}),
+        FakeResponse(200, {"fields": {**stored, "status": {"stringValue": "cancelled"}}, "updateTime": "2026-10-19T09:00:00.000002Z"})
+    ])
+    commits = []
+    monkeypatch.setattr(memory_store, "_firebase_connected", True)
+    monkeypatch.setattr(memory_store, "_firebase_client", "REST_API")
+    monkeypatch.setattr(memory_store.requests, "get", lambda url, timeout: next(reads))
+    monkeypatch.setattr(memory_store.requests, "post", lambda url, json, timeout: commits.append(json) or FakeResponse(400))
+
+    result = memory_store.cancel_booking("booking_1")
+
+    assert result["status"] == "already_cancelled"
+    assert commits[0]["writes"][0]["currentDocument"] == {"updateTime": "2026-10-19T09:00:00.000001Z"}
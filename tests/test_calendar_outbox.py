@@ -0,0 +1,46 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.services import calendar_outbox, calendar_service, firestore_simple
+from app.services.calendar_stub import LocalCalendarService
+
+@pytest.fixture
+def store(memory_store):
+    service = LocalCalendarService()
+    calendar_service.set_calendar_service(service)
+    yield service
+    calendar_service.set_calendar_service(None)
+
+def booking(time_slot: str) -> dict:
+    return {
+        "service_id": "cut",
+        "service_name": "Haircut",
+        "barber_name": "Maya",
+        "time_slot": time_slot,
+        "phone": "15550001",
+        "date": (datetime.now() + timedelta(days=3)).strftime("%Y-%m-%d"),
+        "contact_name": "Sam"
+    }
+
+def entry_for(booking_id: str, data: dict) -> dict:
+    return calendar_outbox.build_outbox_entry(booking_id, data, 30, ["maya@salon.test"])
+
+def test_booking_and_outbox_entry_are_saved_together(store):
+    result = firestore_simple.book_slot(booking("10:00 AM"), entry_for)
+    booking_id = result["booking_id"]
+
+    assert firestore_simple._in_memory_storage["calendar_outbox"][booking_id]["status"] == "pending"
+    assert firestore_simple.CALENDAR_OUTBOX_KEY not in firestore_simple.get_booking(booking_id)
+
+def test_drain_creates_the_event_once(store):
+    booking_id = firestore_simple.book_slot(booking("11:00 AM"), entry_for)["booking_id"]
+
+    assert calendar_outbox.drain_outbox_once() == 1
+    assert firestore_simple.get_booking(booking_id)["calendar_event_id"] == calendar_outbox.calendar_event_id(booking_id)
+    assert calendar_outbox.drain_outbox_once() == 0
+    assert store.calls["insert"] == 1
+
+def test_batch_size_is_capped_at_googles_limit(monkeypatch):
+    monkeypatch.setattr(calendar_outbox.settings, "CALENDAR_OUTBOX_BATCH_SIZE", 500)
+    assert calendar_outbox._batch_size() == calendar_outbox.CALENDAR_BATCH_MAX_REQUESTS
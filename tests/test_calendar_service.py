@@ -0,0 +1,68 @@
+from datetime import datetime, timedelta
+
+import pytest
+import pytz
+
+from app.services import calendar_service
+from app.services.calendar_stub import LocalCalendarService
+from app.services.firestore_simple import Barber
+from app.services.schedule import compile_schedule
+
+BARBERS = [
+    Barber(name="Maya", email="maya@salon.test", working_days=["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]),
+    Barber(name="Leo", email="leo@salon.test", working_days=["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]),
+    Barber(name="Ana", working_days=["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"])
+]
+
+@pytest.fixture
+def stub(monkeypatch):
+    settings = calendar_service.settings
+    monkeypatch.setattr(settings, "GOOGLE_CALENDAR_USE_FREEBUSY", True)
+    monkeypatch.setattr(settings, "GOOGLE_CALENDAR_TIMEZONE", "UTC")
+    monkeypatch.setattr(settings, "GOOGLE_CALENDAR_FREEBUSY_DAYS", 7)
+    monkeypatch.setattr(settings, "BUSINESS_HOURS", "mon-sun 09:00-17:00")
+    monkeypatch.setattr(settings, "CLOSED_DATES", "")
+    monkeypatch.setattr(calendar_service, "get_all_barbers", lambda: list(BARBERS))
+    monkeypatch.setattr(calendar_service, "get_schedule", lambda: compile_schedule(BARBERS))
+    service = LocalCalendarService()
+    calendar_service.set_calendar_service(service)
+    yield service
+    calendar_service.set_calendar_service(None)
+
+def at(day: datetime, hour: int, minute: int = 0) -> datetime:
+    return pytz.UTC.localize(datetime.combine(day.date(), datetime.min.time()) + timedelta(hours=hour, minutes=minute))
+
+def test_busy_interval_miss_fetches_every_barber_calendar_in_one_request(stub):
+    day = datetime.now() + timedelta(days=1)
+    stub.add_busy("leo@salon.test", at(day, 10), at(day, 11))
+
+    assert calendar_service.get_busy_intervals("maya@salon.test", day) == []
+    assert stub.calls["freebusy"] == 1
+
+    # Leo's calendar and the primary calendar came with Maya's request
+    assert calendar_service.get_busy_intervals("leo@salon.test", day) == [(at(day, 10), at(day, 11))]
+    assert calendar_service.get_busy_intervals("primary", day + timedelta(days=2)) == []
+    assert stub.calls["freebusy"] == 1
+
+def test_prefetch_covers_the_window_and_available_slots_skip_busy_times(stub):
+    day = datetime.now() + timedelta(days=2)
+    stub.add_busy("maya@salon.test", at(day, 9), at(day, 10))
+
+    fetched = calendar_service.prefetch_busy_intervals(datetime.now())
+    assert set(fetched) == {"primary", "maya@salon.test", "leo@salon.test"}
+    assert all(len(per_day) == 7 for per_day in fetched.values())
+
+    slots = calendar_service.get_available_slots("maya@salon.test", day, duration_minutes=30)
+    assert "09:00 AM" not in slots and "09:30 AM" not in slots
+    assert slots[0] == "10:00 AM"
+    assert stub.calls["freebusy"] == 1
+
+def test_created_event_invalidates_the_cached_day(stub):
+    day = datetime.now() + timedelta(days=1)
+    calendar_service.prefetch_busy_intervals(day)
+
+    result = calendar_service.create_calendar_event("Haircut", at(day, 14), 30, attendees=["leo@salon.test"])
+    assert result["status"] == "success"
+
+    assert calendar_service.get_busy_intervals("leo@salon.test", day) == [(at(day, 14), at(day, 14, 30))]
+    assert stub.calls["freebusy"] == 2
@@ -0,0 +1,140 @@
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import data_cli
+
+SERVICES = [
+    {"id": "cut", "name": "Haircut", "duration": 30, "price": 25.0},
+    {"id": "beard", "name": "Beard Trim", "duration": 15, "price": 12.5, "description": "Hot towel"}
+]
+
+BARBERS = [
+    {"name": "Maya Cruz", "services": ["cut", "beard"], "breaks": ["13:00-13:30"], "experience_years": 6},
+    {"name": "Leo", "services": ["cut"], "working_days": ["monday", "friday"]}
+]
+
+def bookings(count: int) -> list:
+    return [
+        {
+            "booking_id": f"booking_{i:04d}",
+            "service_id": "cut",
+            "service_name": "Haircut",
+            "barber_name": "Leo",
+            "phone": f"1555{i:04d}",
+            "contact_name": f"Customer {i}",
+            "date": "2026-11-02",
+            "time_slot": "10:00 AM",
+            "created_at": "2026-10-01T09:00:00",
+            "calendar_event_id": f"evt{i}"
+        }
+        for i in range(count)
+    ]
+
+class FlakyBackend:
+    """Fails every write of one chunk, like a dropped connection"""
+
+    def __init__(self, backend, fail_on_id: str):
+        self.backend = backend
+        self.fail_on_id = fail_on_id
+
+    def write_chunk(self, collection, docs, derived=None):
+        if any(doc_id == self.fail_on_id for doc_id, _ in docs):
+            raise ConnectionError("connection reset")
+        self.backend.write_chunk(collection, docs, derived)
+
+    def __getattr__(self, name):
+        return getattr(self.backend, name)
+
+@pytest.fixture
+def sqlite_backend(tmp_path):
+    return data_cli.SQLiteBackend(str(tmp_path / "offline.db"))
+
+@pytest.mark.parametrize("collection,records", [("services", SERVICES), ("barbers", BARBERS), ("bookings", bookings(3))])
+@pytest.mark.parametrize("extension", ["json", "csv"])
+def test_export_then_import_round_trips_through_sqlite(tmp_path, collection, records, extension):
+    source = data_cli.SQLiteBackend(str(tmp_path / "source.db"))
+    data_cli.import_records(source, collection, records)
+    exported, report = data_cli.export_records(source, collection)
+    assert report["documents"] == len(records)
+
+    path = str(tmp_path / f"{collection}.{extension}")
+    data_cli.write_records(path, exported)
+    target = data_cli.SQLiteBackend(str(tmp_path / "target.db"))
+    data_cli.import_records(target, collection, data_cli.read_records(path))
+
+    # Barbers come back with their document id as "id", so ids stay stable across round trips
+    assert data_cli.export_records(target, collection)[0] == exported
+    assert [doc_id for doc_id, _ in target.stream(collection)] == [doc_id for doc_id, _ in source.stream(collection)]
+
+def test_import_keeps_extra_fields_and_model_defaults(sqlite_backend):
+    data_cli.import_records(sqlite_backend, "bookings", bookings(1))
+    data_cli.import_records(sqlite_backend, "barbers", BARBERS)
+
+    booking = dict(sqlite_backend.stream("bookings"))["booking_0000"]
+    assert booking["calendar_event_id"] == "evt0" and booking["status"] == "confirmed"
+    assert dict(sqlite_backend.stream("barbers"))["maya_cruz"]["working_days"][0] == "monday"
+
+def test_interrupted_import_resumes_from_the_checkpoint(tmp_path, sqlite_backend):
+    records = bookings(10)
+    source = tmp_path / "history.json"
+    source.write_text(json.dumps(records))
+    checkpoint_path = str(tmp_path / "import.ckpt")
+
+    checkpoint = data_cli.Checkpoint(checkpoint_path, "bookings", str(source), 3)
+    with pytest.raises(ConnectionError):
+        data_cli.import_records(FlakyBackend(sqlite_backend, "booking_0007"), "bookings", records, 3, workers=1, checkpoint=checkpoint)
+    assert checkpoint.done == {0, 1}
+
+    resumed = data_cli.Checkpoint(checkpoint_path, "bookings", str(source), 3)
+    report = data_cli.import_records(sqlite_backend, "bookings", records, 3, workers=1, checkpoint=resumed)
+
+    assert report["skipped_chunks"] == 2 and report["documents"] == 4
+    assert [doc_id for doc_id, _ in sqlite_backend.stream("bookings")] == [r["booking_id"] for r in records]
+
+def test_checkpoint_of_another_import_is_ignored(tmp_path):
+    checkpoint_path = str(tmp_path / "import.ckpt")
+    data_cli.Checkpoint(checkpoint_path, "bookings", "a.json", 3).mark(0)
+
+    assert data_cli.Checkpoint(checkpoint_path, "bookings", "b.json", 3).done == set()
+    assert data_cli.Checkpoint(checkpoint_path, "bookings", "a.json", 3).done == {0}
+
+def test_cli_imports_and_exports_with_the_sqlite_backend(tmp_path, capsys):
+    source = tmp_path / "services.json"
+    source.write_text(json.dumps(SERVICES))
+    db = str(tmp_path / "offline.db")
+
+    data_cli.main(["import", "services", str(source), "--backend", "sqlite", "--sqlite-path", db])
+    report = data_cli.main(["export", "services", str(tmp_path / "out.csv"), "--backend", "sqlite", "--sqlite-path", db])
+
+    assert report["documents"] == 2
+    assert {r["id"] for r in data_cli.read_records(str(tmp_path / "out.csv"))} == {"cut", "beard"}
+    assert "Imported 2 services" in capsys.readouterr().out
+
+def test_imported_booking_is_listed_for_a_phone_with_an_index(memory_store):
+    upcoming = (datetime.now() + timedelta(days=3)).strftime("%Y-%m-%d")
+    memory_store.book_slot({
+        "service_id": "cut", "service_name": "Haircut", "barber_name": "Maya", "time_slot": "09:00 AM",
+        "phone": "15550000", "date": upcoming, "contact_name": "Customer 0"
+    })
+    assert len(memory_store.get_upcoming_bookings("15550000")) == 1  # the phone's index now exists
+
+    imported = {**bookings(1)[0], "date": upcoming, "created_at": "2099-01-01T09:00:00"}
+    data_cli.import_records(data_cli.MemoryBackend(), "bookings", [imported])
+    memory_store._phone_index_cache.clear()  # the CLI runs in its own process
+
+    assert {b["booking_id"] for b in memory_store.get_upcoming_bookings("15550000")} >= {"booking_0000"}
+    assert memory_store.get_customer_profile("15550000")["last_barber_name"] == "Leo"
+
+def test_reimported_bookings_count_once_in_existing_stats_counters(sqlite_backend):
+    sqlite_backend.write_chunk("booking_stats", [("seed", {"bookings": 0, "minutes": 0, "revenue": 0.0})])
+    records = [{**record, "price": 25.0, "duration": 30} for record in bookings(2)]
+
+    data_cli.import_records(sqlite_backend, "bookings", records)
+    data_cli.import_records(sqlite_backend, "bookings", records)
+    data_cli.import_records(sqlite_backend, "bookings", [{**records[0], "status": "cancelled"}])
+
+    counter = dict(sqlite_backend.stream("booking_stats"))["2026-11-02__Leo__cut"]
+    assert (counter["bookings"], counter["minutes"], counter["revenue"]) == (1, 30, 25.0)
+    assert dict(sqlite_backend.stream("phone_bookings"))["15550000"]["booking_ids"] == []
@@ -0,0 +1,76 @@
+import heapq
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.services import load_balancer
+from app.services.firestore_simple import Barber, Service
+
+EVERY_DAY = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+BARBERS = [Barber(name="Maya"), Barber(name="Leo"), Barber(name="Ana")]
+
+@pytest.fixture
+def balancer(monkeypatch):
+    monkeypatch.setattr(load_balancer, "get_all_barbers", lambda: list(BARBERS))
+    monkeypatch.setattr(load_balancer, "get_barbers_for_service", lambda service_id: list(BARBERS))
+    monkeypatch.setattr(load_balancer, "_heaps", {})
+    monkeypatch.setattr(load_balancer, "_loaded", True)
+    return load_balancer
+
+def day(offset: int) -> str:
+    return (datetime.now() + timedelta(days=offset)).strftime("%Y-%m-%d")
+
+def test_slot_checks_run_outside_the_lock_in_load_order(balancer, monkeypatch):
+    date_str = day(1)
+    heap = balancer._heap_for(date_str)
+    heap.add("Maya", 60)
+    heap.add("Ana", 30)
+    checked = []
+
+    def is_slot_open(name, date_str, time_slot):
+        assert not balancer._lock.locked()
+        checked.append(name)
+        return name != "Leo"
+
+    monkeypatch.setattr(balancer, "is_slot_open", is_slot_open)
+    assert balancer.pick_least_loaded_barber("cut", date_str, "10:00 AM") == "Ana"
+    assert checked == ["Leo", "Ana"]
+
+def test_heaps_for_past_days_are_pruned(balancer):
+    balancer._heap_for(day(-2))
+    balancer._heap_for(day(0))
+    balancer._heap_for(day(1))
+    assert sorted(balancer._heaps) == [day(0), day(1)]
+
+def test_a_pick_pops_only_the_entries_it_skips(monkeypatch):
+    heap = load_balancer.DailyLoadHeap([f"barber-{i:03d}" for i in range(200)])
+    heappop = heapq.heappop
+    pops = []
+    monkeypatch.setattr(load_balancer.heapq, "heappop", lambda entries: pops.append(1) or heappop(entries))
+
+    assert heap.least_loaded(lambda name: name not in ("barber-000", "barber-001")) == "barber-002"
+    assert len(pops) == 2 and len(heap.heap) == 200
+    assert heap.least_loaded(lambda name: True) == "barber-000"
+
+def test_a_slot_taken_since_the_pick_goes_to_the_next_barber(balancer, memory_store, monkeypatch):
+    from app import main
+
+    memory_store._set_cached_catalog("barbers", [Barber(name=b.name, working_days=EVERY_DAY) for b in BARBERS])
+    # The availability matrix is stale: every barber still looks free
+    monkeypatch.setattr(balancer, "is_slot_open", lambda name, date_str, time_slot: True)
+    monkeypatch.setattr(main.settings, "GOOGLE_CALENDAR_MIRROR_ENABLED", False)
+    date_str = day(2)
+    heap = balancer._heap_for(date_str)
+    heap.add("Maya", 60)
+    heap.add("Ana", 30)
+    # Leo, the least loaded, was booked at 10:00 by another worker
+    memory_store._in_memory_storage["bookings"]["booking_elsewhere"] = {
+        "barber_name": "Leo", "date": date_str, "time_slot": "10:00 AM", "phone": "15550002", "status": "confirmed"
+    }
+
+    service = Service(id="cut", name="Haircut", duration=30, price=25.0)
+    barber_name = balancer.pick_least_loaded_barber("cut", date_str, "10:00 AM")
+    reply = main.confirm_booking("15550001", "Sam", service, barber_name, date_str, "10:00 AM", any_barber=True)
+
+    assert barber_name == "Leo"
+    assert "Booking Confirmed" in reply and "Ana" in reply
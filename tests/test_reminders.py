@@ -0,0 +1,54 @@
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.services import reminders, whatsapp
+
+@pytest.fixture
+def sent(monkeypatch):
+    messages = []
+    monkeypatch.setattr(whatsapp, "send_whatsapp_message", lambda phone, message: messages.append(message) or True)
+    return messages
+
+def reminder_for(booking_id: str) -> dict:
+    starts_at = datetime.now() + timedelta(hours=2)
+    return {
+        "booking_id": booking_id, "label": "2h", "hours": 2.0, "phone": "15550001",
+        "barber_name": "Maya", "service_name": "Haircut", "starts_at": starts_at.isoformat()
+    }
+
+def sender_slot() -> threading.BoundedSemaphore:
+    """A sender slot taken, as the worker loop hands it to _fire"""
+    slot = threading.BoundedSemaphore(1)
+    slot.acquire()
+    return slot
+
+@pytest.mark.parametrize("booking", [None, {"status": "cancelled"}])
+def test_reminder_for_a_cancelled_or_missing_booking_is_skipped(monkeypatch, booking):
+    calls = []
+    monkeypatch.setattr(reminders, "get_booking", lambda booking_id: booking)
+    monkeypatch.setattr(reminders, "send_reminder", lambda *args: calls.append(args) or True)
+    skipped = reminders._stats["skipped"]
+
+    reminders._fire("booking_1:2h", datetime.now().timestamp(), reminder_for("booking_1"), sender_slot())
+
+    assert calls == [] and reminders._stats["skipped"] == skipped + 1
+
+def test_reminder_for_a_confirmed_booking_is_sent(monkeypatch):
+    calls, updates = [], []
+    monkeypatch.setattr(reminders, "get_booking", lambda booking_id: {"status": "confirmed"})
+    monkeypatch.setattr(reminders, "send_reminder", lambda *args: calls.append(args) or True)
+    monkeypatch.setattr(reminders, "update_booking", lambda booking_id, fields: updates.append(fields))
+
+    reminders._fire("booking_1:2h", datetime.now().timestamp(), reminder_for("booking_1"), sender_slot())
+
+    assert len(calls) == 1 and "reminder_2h_sent_at" in updates[0]
+
+@pytest.mark.parametrize("days_ahead,when", [(0, "is today"), (1, "is tomorrow"), (3, "is on ")])
+def test_reminder_wording_follows_the_calendar_date(sent, days_ahead, when):
+    starts_at = datetime.combine(datetime.now().date() + timedelta(days=days_ahead), datetime.min.time()).replace(hour=23, minute=30)
+    assert whatsapp.send_reminder("15550001", "Maya", starts_at.isoformat(), "Haircut")
+    assert when in sent[0]
+    if days_ahead == 3:
+        assert f"is on {starts_at.strftime('%A')}" in sent[0]
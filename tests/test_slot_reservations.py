@@ -0,0 +1,49 @@
+from datetime import datetime, timedelta
+
+from app.services.slot_reservations import SlotReservations
+
+DATE = (datetime.now() + timedelta(days=3)).strftime("%Y-%m-%d")
+
+def booking(time_slot: str, phone: str) -> dict:
+    return {
+        "service_id": "cut",
+        "service_name": "Haircut",
+        "barber_name": "Maya",
+        "time_slot": time_slot,
+        "phone": phone,
+        "date": DATE,
+        "contact_name": "Sam"
+    }
+
+def test_one_booking_holds_a_slot_across_workers(tmp_path):
+    path = str(tmp_path / "reservations.db")
+    worker_0, worker_1 = SlotReservations(path), SlotReservations(path)
+
+    assert worker_0.reserve("Maya", DATE, "10:00 AM", "booking_a")
+    assert not worker_1.reserve("Maya", DATE, "10:00 AM", "booking_b")
+    assert worker_0.reserve("Maya", DATE, "10:00 AM", "booking_a")  # a replay of the same booking
+    assert worker_1.reserved_slots("Maya", DATE) == ["10:00 AM"]
+
+    worker_0.release("booking_a")
+    assert worker_1.reserve("Maya", DATE, "10:00 AM", "booking_b")
+
+def test_past_dates_are_purged(tmp_path):
+    reservations = SlotReservations(str(tmp_path / "reservations.db"))
+    yesterday = (datetime.now() - timedelta(days=1)).strftime("%Y-%m-%d")
+    reservations.conn.execute("INSERT INTO reservations VALUES ('Maya', ?, '10:00 AM', 'booking_old')", (yesterday,))
+
+    reservations.reserve("Maya", DATE, "10:00 AM", "booking_a")
+    assert reservations.count() == 1
+
+def test_journaled_booking_sees_slots_claimed_by_another_worker(memory_store, tmp_path):
+    path = str(tmp_path / "reservations.db")
+    memory_store.open_booking_journal(str(tmp_path / "worker-0"), path)
+    SlotReservations(path).reserve("Maya", DATE, "10:00 AM", "booking_from_worker_1")
+
+    assert "10:00 AM" not in memory_store.get_available_slots("Maya", datetime.strptime(DATE, "%Y-%m-%d"))
+    assert memory_store.book_slot(booking("10:00 AM", "15550001"))["status"] == "error"
+
+    booking_id = memory_store.book_slot(booking("11:00 AM", "15550001"))["booking_id"]
+    assert memory_store.get_booking_journal_stats()["reservations"] == 2
+    assert memory_store.cancel_booking(booking_id)["status"] == "success"
+    assert SlotReservations(path).reserved_slots("Maya", DATE) == ["10:00 AM"]
@@ -0,0 +1,74 @@
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import main
+
+def message(body: str, sender: str = "15550001@c.us") -> dict:
+    return {"id": f"false_{sender}_{body}", "from": sender, "body": body, "contactName": "Sam"}
+
+@pytest.fixture
+def client(memory_store, monkeypatch):
+    monkeypatch.setattr(main.settings, "RATE_LIMIT_ENABLED", False)
+    return TestClient(main.app)
+
+def test_messages_are_processed_off_the_event_loop(client, monkeypatch):
+    threads = []
+
+    def process_message(message, phone, contact_name):
+        threads.append(threading.current_thread())
+        main.get_session_data(phone)["step"] = "barber"
+        return f"echo {message}"
+
+    monkeypatch.setattr(main, "process_message", process_message)
+    assert client.post("/webhook/whatsapp", json=message("Hi")).json() == {"reply": "echo hi"}
+    assert threads[0] is not threading.main_thread()
+    assert main.sessions.load("15550001")["step"] == "barber"
+
+def test_one_phones_messages_take_turns(memory_store, monkeypatch):
+    active, overlaps = [], []
+
+    def process_message(message, phone, contact_name):
+        active.append(phone)
+        if active.count(phone) > 1:
+            overlaps.append(phone)
+        time.sleep(0.05)
+        main.get_session_data(phone)["step"] = message
+        active.remove(phone)
+        return message
+
+    monkeypatch.setattr(main, "process_message", process_message)
+    workers = [
+        threading.Thread(target=main.handle_message, args=(str(i), phone, "Sam"))
+        for i in range(3) for phone in ("15550001", "15550002")
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    assert overlaps == []
+    assert main._session_locks == {} and main._active_sessions == {}
+
+def test_shared_rate_limit_check_runs_off_the_event_loop(memory_store, monkeypatch):
+    from app.services import rate_limiter
+    from app.services.circuit_breaker import CircuitBreaker
+
+    threads = []
+
+    class SlowSharedLimiter:
+        def check(self, phone):
+            threads.append(threading.current_thread())
+            raise TimeoutError("Timeout reading from socket")
+
+    monkeypatch.setattr(rate_limiter.settings, "RATE_LIMIT_ENABLED", True)
+    monkeypatch.setattr(rate_limiter, "_memory_limiter", rate_limiter.MemoryRateLimiter(1, 5, 50, 200, 600))
+    monkeypatch.setattr(rate_limiter, "_shared_limiter", SlowSharedLimiter())
+    monkeypatch.setattr(rate_limiter, "_shared_breaker", CircuitBreaker("test_rate_limit"))
+    monkeypatch.setattr(main, "process_message", lambda message, phone, contact_name: f"echo {message}")
+
+    # A failing Redis fails open to the worker's own buckets
+    assert TestClient(main.app).post("/webhook/whatsapp", json=message("Hi")).json() == {"reply": "echo hi"}
+    assert threads[0] is not threading.main_thread()
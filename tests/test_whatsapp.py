@@ -0,0 +1,43 @@
+from types import SimpleNamespace
+
+import pytest
+import requests
+
+from app.services import whatsapp
+from app.services.circuit_breaker import CircuitBreaker
+
+class FakeSession:
+    """Records posts and answers with a fixed status, like the bridge's /send-message"""
+
+    def __init__(self, status_code: int):
+        self.status_code = status_code
+        self.posts = []
+
+    def post(self, url, json=None, headers=None, timeout=None):
+        self.posts.append((url, json))
+        response = SimpleNamespace(status_code=self.status_code, text="")
+        def raise_for_status():
+            if self.status_code >= 400:
+                raise requests.exceptions.HTTPError(f"{self.status_code}")
+        response.raise_for_status = raise_for_status
+        return response
+
+@pytest.fixture
+def bridge(monkeypatch):
+    def answering(status_code: int) -> FakeSession:
+        session = FakeSession(status_code)
+        monkeypatch.setattr(whatsapp, "_http_session", session)
+        return session
+    monkeypatch.setattr(whatsapp, "_bridge_breaker", CircuitBreaker("whatsapp-test"))
+    return answering
+
+def test_reminders_post_bare_digits_to_the_bridge_send_route(bridge):
+    session = bridge(200)
+    assert whatsapp.send_whatsapp_message("whatsapp:15550001", "See you soon")
+    url, body = session.posts[0]
+    assert url == f"{whatsapp.settings.WHATSAPP_SERVICE_URL}/send-message"
+    assert body == {"phone": "15550001", "message": "See you soon"}
+
+def test_bridge_not_ready_is_a_failed_send(bridge):
+    bridge(503)
+    assert not whatsapp.send_whatsapp_message("15550001", "See you soon")
@@ -3,6 +3,8 @@ const express = require('express');
 const qrcode = require('qrcode');
 const axios = require('axios');
 const fs = require('fs');
+const crypto = require('crypto');
+const { sendMessageHandler } = require('./send-message');
 
 const PORT = process.env.WHATSAPP_PORT || process.env.PORT || 3000;
 const SALON_NAME = process.env.SALON_NAME || 'Beauty Salon';
@@ -217,16 +219,24 @@ try {
         try {
             console.log(`🔗 [${SALON_NAME}] Sending to backend webhook...`);
             
-            // Send to backend webhook
+            // Send to backend webhook; the trace id ties the backend's spans to this message
+            const traceId = crypto.randomBytes(16).toString('hex');
             const webhookData = {
+                id: message.id._serialized,
+                type: message.type,
+                timestamp: message.timestamp,
                 body: message.body,
                 from: message.from,
-                contactName: message._data.notifyName || 'Unknown'
+                contactName: message._data.notifyName || 'Unknown',
+                isGroupMsg: message.from.includes('@g.us'),
+                isStatus: message.isStatus,
+                traceId
             };
             
             console.log(`📤 [${SALON_NAME}] Webhook data:`, JSON.stringify(webhookData, null, 2));
             
             const response = await axios.post(`${BACKEND_URL}/webhook/whatsapp`, webhookData, {
+                // Only the trace id: the bridge exports no spans, so a traceparent would name a parent span that never exists
                 headers: {
                     'Content-Type': 'application/json'
                 },
@@ -239,7 +249,7 @@ try {
             if (response.data && response.data.reply) {
                 console.log(`📤 [${SALON_NAME}] Sending reply to ${message.from}: ${response.data.reply}`);
                 await whatsappClient.sendMessage(message.from, response.data.reply);
-                console.log(`✅ [${SALON_NAME}] Reply sent successfully`);
+                console.log(`✅ [${SALON_NAME}] Reply sent successfully (trace ${traceId})`);
             } else {
                 console.log(`ℹ️ [${SALON_NAME}] No reply from backend`);
             }
@@ -283,6 +293,9 @@ app.get('/health', (req, res) => {
     });
 });
 
+// Reminders and other messages the backend sends on its own
+app.post('/send-message', sendMessageHandler(() => whatsappClient, () => isReady, SALON_NAME));
+
 app.get('/qr', (req, res) => {
     if (isReady) {
         res.send(`